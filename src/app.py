@@ -2,16 +2,15 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
 import sys
-import subprocess
 import threading
-import re
-import shutil
 import datetime
-import tempfile
-import random
+import time
 import ctypes
-from config import AppConfig, LIGHT_THEME, DARK_THEME, OCR_PATIENCE_MESSAGES, MOVIE_EXTENSIONS, SUBTITLE_EXTENSIONS, IMAGE_BASED_CODECS, TEXT_BASED_OUTPUT_FORMATS
+import queue
+from config import AppConfig, LANGUAGE_SCAN_POLL_MS, LIGHT_THEME, DARK_THEME, LOG_SPILL_FILENAME, UI_TICK_MS, SCAN_BATCH_MAX_ROWS
+from engine import ExtractionEngine
 from ui import SubtitleExtractorUI
+from ui_events import UiEventBus, LogRing, message_level, level_allows
 
 class SubtitleExtractorApp:
     def __init__(self, master):
@@ -27,18 +26,22 @@ class SubtitleExtractorApp:
         self._parse_loaded_languages()
 
         self.movie_files_paths = []
-        self.files_with_success, self.files_with_no_subs, self.files_timed_out, self.files_with_errors, self.files_skipped = [], [], [], [], []
-        self.log_buffer, self.log_window, self.log_text_widget = [], None, None
-        self.cancel_requested = threading.Event()
+        self.scan_generation, self.scan_cancel_event, self.scan_found_count = 0, None, 0
+        self.log_window, self.log_text_widget = None, None
+        self.log_view_level = self.settings['log_level']
 
         self._setup_logging()
+        self.ui_events = UiEventBus(max(self.settings['log_buffer_lines'], 1000))
+        self.engine = ExtractionEngine(self.config, log_callback=self.log_message, status_callback=self._update_status_safe, progress_callback=self._update_progress_safe,
+                                      file_callback=self.ui_events.set_row)
 
-        if not self.check_ffmpeg():
+        if not self.engine.check_ffmpeg():
             messagebox.showerror("Error", f"FFmpeg/FFprobe not found (see 'sub_extractor_settings.ini').\nCheck paths and restart.")
             master.destroy()
             return
 
         self.ui = SubtitleExtractorUI(master, self)
+        self.master.after(UI_TICK_MS, self._drain_ui_events)
 
     def _setup_theme(self):
         self.current_theme_name = self.settings['theme']
@@ -53,6 +56,8 @@ class SubtitleExtractorApp:
             except OSError as e:
                 print(f"Error creating log dir: {e}")
                 self.log_dir_path = None
+        spill_path = os.path.join(self.log_dir_path, LOG_SPILL_FILENAME) if self.log_dir_path and self.settings['log_spill_enabled'] else None
+        self.log_ring = LogRing(self.settings['log_buffer_lines'], spill_path, self.settings['log_spill_max_mb'] * 1024 * 1024, self.settings['log_spill_backups'])
 
     def on_skip_toggle(self):
         self.settings['skip_if_exists'] = self.ui.skip_if_exists_var.get()
@@ -68,7 +73,9 @@ class SubtitleExtractorApp:
             self.user_selected_languages = {lang.strip() for lang in loaded_lang_str.split(',') if lang.strip()}
 
     def on_format_selected(self, event=None):
-        selected_format = self.ui.output_format_var.get()
+        primary_format = self.ui.output_format_var.get()
+        extra_formats = [subtitle_format for subtitle_format, selected in self.ui.extra_format_vars.items() if selected.get() and subtitle_format != primary_format]
+        selected_format = ','.join([primary_format] + extra_formats)
         self.settings['default_output_format'] = selected_format
         self.log_message(f"Output format set to: {selected_format}", to_console=False)
 
@@ -84,45 +91,23 @@ class SubtitleExtractorApp:
         if not self.movie_files_paths:
             messagebox.showinfo("No Targets", "Scan a star system (folder) first, Commander.", parent=self.master)
             return
-        current_files_in_listbox = [self.movie_files_paths[i] for i in range(self.ui.file_listbox.size()) if i < len(self.movie_files_paths)]
+        current_files_in_listbox = list(self.ui.file_tree.get_children())
         if not current_files_in_listbox:
             messagebox.showinfo("No Targets", "No transmissions (files) in the list to scan for languages.", parent=self.master)
             return
 
-        available_languages = set()
-        lang_probe_dialog = tk.Toplevel(self.master)
-        lang_probe_dialog.title("Scanning Transmissions")
-        lang_probe_dialog.geometry("350x100")
-        lang_probe_dialog.resizable(False, False)
-        lang_probe_dialog.configure(bg=self.current_theme["bg"])
-        ttk.Label(lang_probe_dialog, text="Scanning for alien languages (subtitle tracks)...").pack(pady=20, padx=10)
-        lang_probe_dialog.transient(self.master)
-        lang_probe_dialog.grab_set()
-        self.master.update_idletasks()
-
-        for file_path in current_files_in_listbox:
-            try:
-                cmd_probe = [self.settings['ffprobe_path'], '-v', 'error', '-show_entries', 'stream_tags=language', '-select_streams', 's', '-of', 'csv=p=0', file_path]
-                process = subprocess.Popen(cmd_probe, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-                stdout, _ = process.communicate(timeout=self.settings['ffprobe_timeout'])
-                if stdout:
-                    for lang_code_line in stdout.strip().split('\n'):
-                        lang_code = lang_code_line.strip()
-                        if lang_code and len(lang_code) == 3: available_languages.add(lang_code.lower())
-            except subprocess.TimeoutExpired: self.log_message(f"Comlink timeout probing languages in {os.path.basename(file_path)}", True)
-            except Exception as e: self.log_message(f"Astromech droid malfunction probing languages in {os.path.basename(file_path)}: {e}", True)
-        lang_probe_dialog.destroy()
-
-        if not available_languages:
-            messagebox.showinfo("No Languages", "No distinct alien languages found in current transmissions.", parent=self.master)
-            self.extract_all_languages_flag = True
-            self.user_selected_languages = set()
-            self.ui.current_lang_filter_label.config(text=self._get_current_lang_filter_display())
-            return
+        # Languages are discovered on a background thread and streamed into the dialog as they are found.
+        scan_cancel_event = threading.Event(); scan_results = queue.Queue()
+        threading.Thread(target=self.engine.discover_languages, args=(current_files_in_listbox, scan_cancel_event, scan_results), daemon=True).start()
 
-        dialog = tk.Toplevel(self.master); dialog.title("Set Language Filters"); dialog.transient(self.master); dialog.grab_set(); dialog.configure(bg=self.current_theme["bg"]); dialog.minsize(350, 250)
+        dialog = tk.Toplevel(self.master); dialog.title("Set Language Filters"); dialog.transient(self.master); dialog.grab_set(); dialog.configure(bg=self.current_theme["bg"]); dialog.minsize(350, 300)
         content_frame = ttk.Frame(dialog, padding=10); content_frame.pack(expand=True, fill=tk.BOTH)
         ttk.Label(content_frame, text="Select languages for translation (extraction):").pack(anchor='w', pady=(0, 5))
+        scan_frame = ttk.Frame(content_frame); scan_frame.pack(fill='x', pady=(0, 5))
+        scan_status_label = ttk.Label(scan_frame, text="Scanning for alien languages (subtitle tracks)..."); scan_status_label.pack(side=tk.LEFT, fill='x', expand=True)
+        cancel_scan_button = ttk.Button(scan_frame, text="Stop Scan", command=scan_cancel_event.set); cancel_scan_button.pack(side=tk.RIGHT)
+        scan_progress_var = tk.DoubleVar()
+        ttk.Progressbar(content_frame, orient="horizontal", mode="determinate", variable=scan_progress_var, style="Custom.Horizontal.TProgressbar").pack(fill='x', pady=(0, 5))
         scrollable_outer_frame = ttk.Frame(content_frame); scrollable_outer_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         canvas = tk.Canvas(scrollable_outer_frame, borderwidth=0, background=self.current_theme["list_bg"], highlightthickness=0)
         checkbox_frame_for_langs_in_canvas = ttk.Frame(canvas, style="TFrame"); vsb = ttk.Scrollbar(scrollable_outer_frame, orient="vertical", command=canvas.yview)
@@ -132,23 +117,54 @@ class SubtitleExtractorApp:
         checkbox_frame_for_langs_in_canvas.bind("<Configure>", on_checkbox_frame_configure)
         def on_canvas_configure(event): canvas.itemconfig(canvas_frame_id, width=event.width)
         canvas.bind("<Configure>", on_canvas_configure)
-        lang_vars = {}; sorted_langs = sorted(list(available_languages)); all_var = tk.BooleanVar(value=self.extract_all_languages_flag); lang_checkbutton_widgets = []
+        lang_vars = {}; lang_checkbutton_widgets = {}; lang_file_counts = {}; all_var = tk.BooleanVar(value=self.extract_all_languages_flag)
+        scan_state = {"scanned": 0, "total": len(current_files_in_listbox), "done": False}
         def on_toggle_all_languages():
             is_all_selected = all_var.get()
-            for cb_widget in lang_checkbutton_widgets: cb_widget.config(state=tk.DISABLED if is_all_selected else tk.NORMAL)
+            for cb_widget in lang_checkbutton_widgets.values(): cb_widget.config(state=tk.DISABLED if is_all_selected else tk.NORMAL)
             if is_all_selected:
                 for lang_code_key in lang_vars: lang_vars[lang_code_key].set(False)
             else:
                 for lang_code_key, var_instance in lang_vars.items(): var_instance.set(lang_code_key in self.user_selected_languages)
         all_cb = ttk.Checkbutton(checkbox_frame_for_langs_in_canvas, text="Translate All (Galactic Basic Default)", variable=all_var, command=on_toggle_all_languages, style="TCheckbutton"); all_cb.pack(anchor='w', pady=2, padx=5)
         ttk.Separator(checkbox_frame_for_langs_in_canvas, orient='horizontal').pack(fill='x', pady=5, padx=5)
-        for lang_code in sorted_langs:
-            var = tk.BooleanVar();
-            if not self.extract_all_languages_flag and lang_code in self.user_selected_languages: var.set(True)
-            cb = ttk.Checkbutton(checkbox_frame_for_langs_in_canvas, text=lang_code, variable=var, style="TCheckbutton"); cb.pack(anchor='w', padx=10, pady=1)
-            lang_vars[lang_code] = var; lang_checkbutton_widgets.append(cb)
-        on_toggle_all_languages()
+
+        def add_language_rows(new_langs):
+            for lang_code in new_langs:
+                var = tk.BooleanVar(value=not all_var.get() and lang_code in self.user_selected_languages)
+                cb = ttk.Checkbutton(checkbox_frame_for_langs_in_canvas, text=lang_code, variable=var, style="TCheckbutton", state=tk.DISABLED if all_var.get() else tk.NORMAL)
+                lang_vars[lang_code] = var; lang_checkbutton_widgets[lang_code] = cb
+            # Re-pack so the list stays sorted while languages trickle in.
+            for lang_code in sorted(lang_checkbutton_widgets): lang_checkbutton_widgets[lang_code].pack_forget()
+            for lang_code in sorted(lang_checkbutton_widgets): lang_checkbutton_widgets[lang_code].pack(anchor='w', padx=10, pady=1)
+
+        def poll_scan_results():
+            if not dialog.winfo_exists(): return
+            new_langs = set(); touched_langs = set()
+            try:
+                while True:
+                    file_langs = scan_results.get_nowait()
+                    if file_langs is None: scan_state["done"] = True; break
+                    scan_state["scanned"] += 1
+                    for lang_code in file_langs:
+                        if lang_code not in lang_file_counts: new_langs.add(lang_code)
+                        lang_file_counts[lang_code] = lang_file_counts.get(lang_code, 0) + 1; touched_langs.add(lang_code)
+            except queue.Empty: pass
+            if new_langs: add_language_rows(new_langs)
+            for lang_code in touched_langs: lang_checkbutton_widgets[lang_code].config(text=f"{lang_code} ({lang_file_counts[lang_code]} file{'s' if lang_file_counts[lang_code] != 1 else ''})")
+            scan_progress_var.set(scan_state["scanned"] * 100 / scan_state["total"])
+            if scan_state["done"]:
+                cancel_scan_button.config(state=tk.DISABLED)
+                if scan_cancel_event.is_set(): scan_status_label.config(text=f"Scan stopped after {scan_state['scanned']}/{scan_state['total']} transmissions.")
+                elif not lang_file_counts: scan_status_label.config(text="No distinct alien languages found in current transmissions.")
+                else: scan_status_label.config(text=f"Scan complete: {len(lang_file_counts)} language(s) in {scan_state['total']} transmissions.")
+                return
+            scan_status_label.config(text=f"Scanning for alien languages... {scan_state['scanned']}/{scan_state['total']} transmissions")
+            dialog.after(LANGUAGE_SCAN_POLL_MS, poll_scan_results)
+
         button_frame = ttk.Frame(content_frame); button_frame.pack(fill='x', pady=(10, 0), side=tk.BOTTOM)
+        def on_close():
+            scan_cancel_event.set(); dialog.destroy()
         def on_ok():
             self.extract_all_languages_flag = all_var.get()
             if self.extract_all_languages_flag: self.user_selected_languages = set()
@@ -156,27 +172,58 @@ class SubtitleExtractorApp:
             lang_str_to_save = 'all' if self.extract_all_languages_flag or not self.user_selected_languages else ','.join(sorted(list(self.user_selected_languages)))
             self.settings['selected_languages'] = lang_str_to_save
             self.ui.current_lang_filter_label.config(text=self._get_current_lang_filter_display())
-            self.log_message(f"Language filter set to: {self._get_current_lang_filter_display()}", to_console=False); dialog.destroy()
+            self.log_message(f"Language filter set to: {self._get_current_lang_filter_display()}", to_console=False); on_close()
         ok_button = ttk.Button(button_frame, text="Affirmative", command=on_ok, style="Accent.TButton"); ok_button.pack(side=tk.RIGHT, padx=5)
-        cancel_button = ttk.Button(button_frame, text="Negative", command=dialog.destroy); cancel_button.pack(side=tk.RIGHT)
+        cancel_button = ttk.Button(button_frame, text="Negative", command=on_close); cancel_button.pack(side=tk.RIGHT)
+        dialog.protocol("WM_DELETE_WINDOW", on_close)
+        on_toggle_all_languages()
+        poll_scan_results()
         dialog.wait_window()
 
     def _on_closing_main(self):
         self.settings['theme'] = self.current_theme_name; self.config.save_config(self.extract_all_languages_flag, self.user_selected_languages)
         if self.log_window and self.log_window.winfo_exists(): self.log_window.destroy()
+        if self.scan_cancel_event: self.scan_cancel_event.set()
+        self.engine.close(); self.log_ring.close()
         self.master.destroy()
 
     def log_message(self, message, to_console=True):
+        # Safe from any thread: the line reaches the ring buffer and the log window on the next UI tick.
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         full_message = f"[{timestamp}] {message}"
-        self.log_buffer.append(full_message + "\n")
-        if self.log_window and self.log_window.winfo_exists() and self.log_text_widget:
-            try:
-                self.log_text_widget.config(state=tk.NORMAL); self.log_text_widget.insert(tk.END, full_message + "\n")
-                self.log_text_widget.see(tk.END); self.log_text_widget.config(state=tk.DISABLED)
-            except tk.TclError: pass
+        self.ui_events.post_log(message_level(message, to_console), full_message); self.log_ring.spill(full_message)
         if to_console: print(full_message)
 
+    def _drain_ui_events(self):
+        try: self.master.after(UI_TICK_MS, self._drain_ui_events)
+        except tk.TclError: return
+        lines, status, progress, rows, calls = self.ui_events.drain()
+        if lines:
+            self.log_ring.extend(lines)
+            if self.log_window and self.log_window.winfo_exists() and self.log_text_widget:
+                self._append_to_log_widget(''.join(line + "\n" for level, line in lines if level_allows(level, self.log_view_level)))
+        if status is not None: self.ui.status_label.config(text=status)
+        if progress is not None: self.ui.progress_var.set(progress)
+        for row_id, row_status in rows.items():
+            if row_status and self.ui.file_tree.exists(row_id): self.ui.file_tree.set(row_id, "Status", row_status)
+        for callback in calls: callback()
+
+    def _append_to_log_widget(self, text):
+        if not text: return
+        try:
+            self.log_text_widget.config(state=tk.NORMAL); self.log_text_widget.insert(tk.END, text)
+            # The widget holds no more than the ring buffer does.
+            excess_lines = int(self.log_text_widget.index('end-1c').split('.')[0]) - self.settings['log_buffer_lines']
+            if excess_lines > 0: self.log_text_widget.delete('1.0', f"{excess_lines + 1}.0")
+            self.log_text_widget.see(tk.END); self.log_text_widget.config(state=tk.DISABLED)
+        except tk.TclError: pass
+
+    def on_log_level_selected(self, event=None):
+        self.log_view_level = self.ui.log_level_var.get()
+        if self.log_text_widget:
+            self.log_text_widget.config(state=tk.NORMAL); self.log_text_widget.delete('1.0', tk.END); self.log_text_widget.config(state=tk.DISABLED)
+            self._append_to_log_widget(self.log_ring.text(self.log_view_level))
+
     def copy_log_to_clipboard(self):
         if self.log_text_widget:
             log_content = self.log_text_widget.get("1.0", tk.END); self.master.clipboard_clear(); self.master.clipboard_append(log_content)
@@ -186,11 +233,13 @@ class SubtitleExtractorApp:
 
     def save_log_to_file(self):
         if not self.log_dir_path: messagebox.showerror("Error", "Log archive directory not available.", parent=self.log_window if self.log_window and self.log_window.winfo_exists() else self.master); return
-        if not self.log_buffer: messagebox.showinfo("Info", "Mission log is empty, Commander.", parent=self.log_window if self.log_window and self.log_window.winfo_exists() else self.master); return
+        if not self.log_ring.lines: messagebox.showinfo("Info", "Mission log is empty, Commander.", parent=self.log_window if self.log_window and self.log_window.winfo_exists() else self.master); return
         log_filename = f"sub_extractor_log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         log_filepath = os.path.join(self.log_dir_path, log_filename)
         try:
-            with open(log_filepath, "w", encoding="utf-8") as f: f.writelines(self.log_buffer)
+            with open(log_filepath, "w", encoding="utf-8") as f:
+                if self.log_ring.dropped: f.write(f"[{self.log_ring.dropped} earlier line(s) no longer in memory{f'; the full log is in {self.log_ring.spill_path}' if self.log_ring.spill_path else ''}]\n")
+                f.write(self.log_ring.text())
             self.log_message(f"Mission log archived: {log_filepath}", to_console=False)
             parent_win = self.log_window if self.log_window and self.log_window.winfo_exists() else self.master
             messagebox.showinfo("Log Archived", f"Mission log archived to:\n{log_filepath}", parent=parent_win)
@@ -202,13 +251,6 @@ class SubtitleExtractorApp:
     def _on_closing_log_window(self):
         if self.log_window: self.log_window.destroy(); self.log_window = None; self.log_text_widget = None
 
-    def check_ffmpeg(self):
-        ffmpeg_to_check = self.settings['ffmpeg_path']; ffprobe_to_check = self.settings['ffprobe_path']
-        ffmpeg_found = shutil.which(ffmpeg_to_check) is not None; ffprobe_found = shutil.which(ffprobe_to_check) is not None
-        if not ffmpeg_found: self.log_message(f"Warning: Hyperdrive motivator (FFmpeg: {ffmpeg_to_check}) offline or invalid coordinates.", to_console=True)
-        if not ffprobe_found: self.log_message(f"Warning: Navigation computer (FFprobe: {ffprobe_to_check}) offline or invalid coordinates.", to_console=True)
-        return ffmpeg_found and ffprobe_found
-
     def toggle_theme(self):
         if self.is_dark_mode: self.current_theme, self.current_theme_name, self.is_dark_mode = LIGHT_THEME, "light", False
         else: self.current_theme, self.current_theme_name, self.is_dark_mode = DARK_THEME, "dark", True
@@ -222,21 +264,52 @@ class SubtitleExtractorApp:
             self.log_message(f"Selected star system (folder): {folder_path}", to_console=False); self.scan_folder(folder_path)
 
     def scan_folder(self, folder_path):
+        # The walk runs on a background thread; rows reach the list in batches on the UI tick, so the list is
+        # usable while a large library is still being scanned. A new scan supersedes (and stops) the previous one.
+        if self.scan_cancel_event: self.scan_cancel_event.set()
         self.ui.file_tree.delete(*self.ui.file_tree.get_children())
-        self.movie_files_paths = []
+        self.movie_files_paths = []; self.scan_found_count = 0
+        self.scan_generation += 1; self.scan_cancel_event = threading.Event()
         self.ui.status_label.config(text=f"Scanning {os.path.basename(folder_path)} sector..."); self.log_message(f"Scanning sector: {folder_path}...", to_console=False)
-        self.master.update_idletasks(); found_count = 0
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if file.lower().endswith(MOVIE_EXTENSIONS):
-                    full_path = os.path.join(root, file)
-                    self.movie_files_paths.append(full_path)
-                    status = "Subtitles Present" if self._check_for_existing_subs(full_path) else "Ready to Extract"
-                    self.ui.file_tree.insert("", tk.END, values=(os.path.basename(file), status), iid=full_path)
-                    found_count += 1
-        msg = f"Found {found_count} transmissions (movie files)." if found_count > 0 else "No transmissions detected in this sector."
+        self._toggle_scan_controls(is_scanning=True)
+        threading.Thread(target=self._scan_worker, args=(folder_path, self.scan_generation, self.scan_cancel_event), daemon=True, name="folder-scan").start()
+
+    def _scan_worker(self, folder_path, generation, cancel_event):
+        rows = []; last_flush = time.monotonic()
+        try:
+            for full_path in self.engine.find_movie_files(folder_path, cancel_event):
+                rows.append((full_path, self.engine.has_existing_subs(full_path)))
+                if len(rows) >= SCAN_BATCH_MAX_ROWS or time.monotonic() - last_flush >= UI_TICK_MS / 1000:
+                    self.ui_events.call(lambda batch=rows: self._add_scan_rows(generation, batch)); rows = []; last_flush = time.monotonic()
+        except Exception as e:
+            self.log_message(f"Astromech droid malfunction scanning {folder_path}: {e}", to_console=True)
+        finally:
+            self.ui_events.call(lambda batch=rows: self._scan_finished(generation, batch, cancel_event.is_set()))
+
+    def _add_scan_rows(self, generation, rows):
+        if generation != self.scan_generation: return
+        for full_path, has_subs in rows:
+            if self.ui.file_tree.exists(full_path): continue
+            self.movie_files_paths.append(full_path)
+            self.ui.file_tree.insert("", tk.END, values=(os.path.basename(full_path), "Subtitles Present" if has_subs else "Ready to Extract"), iid=full_path)
+            self.scan_found_count += 1
+        self.ui.status_label.config(text=f"Scanning sector... {self.scan_found_count} transmission(s) found so far.")
+
+    def _scan_finished(self, generation, rows, cancelled):
+        if generation != self.scan_generation: return
+        self._add_scan_rows(generation, rows); self._toggle_scan_controls(is_scanning=False)
+        if cancelled: msg = f"Scan stopped, {self.scan_found_count} transmission(s) listed."
+        else: msg = f"Found {self.scan_found_count} transmissions (movie files)." if self.scan_found_count > 0 else "No transmissions detected in this sector."
         self.ui.status_label.config(text=msg); self.log_message(msg, to_console=False)
 
+    def stop_folder_scan(self):
+        if self.scan_cancel_event: self.scan_cancel_event.set()
+
+    def _toggle_scan_controls(self, is_scanning):
+        # Extraction waits for the full list; removing rows and browsing stay available meanwhile.
+        self.ui.stop_scan_button.config(state=tk.NORMAL if is_scanning else tk.DISABLED)
+        self.ui.extract_button.config(state=tk.DISABLED if is_scanning else tk.NORMAL)
+
     def remove_selected_files(self):
         selected_items = self.ui.file_tree.selection()
         if not selected_items: messagebox.showinfo("Info", "No targets selected for removal, Commander.", parent=self.master); return
@@ -276,31 +349,34 @@ class SubtitleExtractorApp:
             return
 
         self._toggle_extraction_controls(is_extracting=True)
-        self.log_buffer.clear()
-        self.files_with_success.clear(); self.files_with_no_subs.clear(); self.files_timed_out.clear(); self.files_with_errors.clear(); self.files_skipped.clear()
+        self.log_ring.clear()
         self.ui.progress_var.set(0)
         if self.log_window and self.log_window.winfo_exists() and self.log_text_widget:
             self.log_text_widget.config(state=tk.NORMAL); self.log_text_widget.delete('1.0', tk.END); self.log_text_widget.config(state=tk.DISABLED)
         self.log_message("--- Starting New Extraction Mission ---", to_console=False)
         
-        thread = threading.Thread(target=self._extract_subtitles_logic, args=(files_to_process_paths,), daemon=True)
+        language_filter = None if self.extract_all_languages_flag else set(self.user_selected_languages)
+        thread = threading.Thread(target=self._run_extraction, args=(files_to_process_paths, self.settings['default_output_format'], language_filter), daemon=True)
         thread.start()
 
         self.master.after(300000, self.show_patience_message)
 
+    def _run_extraction(self, files_to_process_paths, output_format, language_filter):
+        summary_message = self.engine.run(files_to_process_paths, output_format, language_filter)
+        self.ui_events.call(lambda: self._extraction_finished_safe(summary_message))
+
     def show_patience_message(self):
         if self.ui.extract_button['text'] == "Cancel Extraction":
             messagebox.showinfo("Don't Panic!", "The extraction is taking a while. Don't panic, the Force is with you!")
 
     def _cancel_extraction(self):
         self.log_message("--- MISSION ABORT SIGNAL RECEIVED ---", to_console=True)
-        self.ui.status_label.config(text="Cancelling mission... Please wait for the current target to finish.")
-        self.cancel_requested.set()
+        self.ui.status_label.config(text="Cancelling mission... Terminating running FFmpeg/OCR processes.")
+        self.engine.cancel()
         self.ui.extract_button.config(state=tk.DISABLED, text="Cancelling...")
 
     def _toggle_extraction_controls(self, is_extracting):
         if is_extracting:
-            self.cancel_requested.clear()
             self.ui.extract_button.config(text="Cancel Extraction", command=self._cancel_extraction)
             for btn in [self.ui.remove_button, self.ui.select_folder_button, self.ui.select_langs_button, self.ui.ocr_settings_button, self.ui.remove_with_subs_button]:
                 btn.config(state=tk.DISABLED)
@@ -310,268 +386,24 @@ class SubtitleExtractorApp:
                 btn.config(state=tk.NORMAL)
 
     def _update_status_safe(self, message):
-        self.master.after(0, lambda: self.ui.status_label.config(text=message))
+        self.ui_events.set_status(message)
 
     def _update_progress_safe(self, value):
-        self.master.after(0, lambda: self.ui.progress_var.set(value))
+        self.ui_events.set_progress(value)
 
     def _extraction_finished_safe(self, summary_message=None):
-        if self.cancel_requested.is_set():
+        if self.engine.cancel_requested.is_set():
             summary_message = "Mission aborted by user."
             self.log_message("\n--- MISSION ABORTED BY USER ---", to_console=True)
         else:
-            final_log_summary = ["\n--- MISSION DEBRIEF ---", summary_message or "Mission completed, Commander."]
-            if self.files_with_success:
-                final_log_summary.append("\nTransmissions successfully decoded from:")
-                final_log_summary.extend([f"- {f}" for f in self.files_with_success])
-            if self.files_skipped:
-                final_log_summary.append("\nTargets bypassed (existing subtitles):")
-                final_log_summary.extend([f"- {f}" for f in self.files_skipped])
-            if self.files_with_no_subs:
-                final_log_summary.append("\nTransmissions with no subtitle signals:")
-                final_log_summary.extend([f"- {f}" for f in self.files_with_no_subs])
-            if self.files_timed_out:
-                final_log_summary.append("\nTransmissions lost in hyperspace (timed out):")
-                final_log_summary.extend([f"- {f}" for f in self.files_timed_out])
-            if self.files_with_errors:
-                final_log_summary.append("\nTransmissions corrupted (errors):")
-                final_log_summary.extend([f"- {f}" for f in self.files_with_errors])
-            for line in final_log_summary: self.log_message(line, to_console=False)
+            for line in self.engine.summary_lines(summary_message): self.log_message(line, to_console=False)
             self.log_message("\n--- End of Mission Log ---", to_console=True)
 
         self._update_status_safe(summary_message or "Mission accomplished!"); self.ui.progress_var.set(0)
         messagebox.showinfo("Mission Complete", (summary_message or "Extraction run complete, Commander.") + "\n\nCheck Mission Debrief (Log) for details.", parent=self.master)
         self._toggle_extraction_controls(is_extracting=False)
 
-        for item in self.ui.file_tree.get_children():
-            file_path = self.ui.file_tree.item(item, "values")[0]
-            if file_path in self.files_with_success:
-                self.ui.file_tree.set(item, "Status", "Completed")
-            elif file_path in self.files_with_errors or file_path in self.files_timed_out:
-                self.ui.file_tree.set(item, "Status", "Failed")
-
-    def _check_for_existing_subs(self, movie_file_path):
-        movie_dir = os.path.dirname(movie_file_path)
-        base_name_no_ext = os.path.splitext(os.path.basename(movie_file_path))[0]
-        try:
-            for filename in os.listdir(movie_dir):
-                if filename.startswith(base_name_no_ext) and filename.lower().endswith(SUBTITLE_EXTENSIONS):
-                    return True
-        except FileNotFoundError:
-            self.log_message(f"[WARN] Directory not found while checking for existing subs: {movie_dir}", to_console=True)
-            return False
-        return False
-
-    def _run_ocr_on_image_sub(self, movie_file_path, base_name_no_ext, stream_idx, lang_code, input_codec, target_srt_path):
-        filename_short = os.path.basename(movie_file_path)
-        witty_ocr_message = random.choice(OCR_PATIENCE_MESSAGES).format(filename=filename_short)
-        self._update_status_safe(witty_ocr_message)
-        self.log_message(f"[OCR] Attempting OCR for stream {stream_idx} ({input_codec}, lang {lang_code}) from {filename_short}", to_console=True)
-
-        temp_dir_base = self.settings.get('ocr_temp_dir', '') or os.path.dirname(movie_file_path)
-        ocr_session_temp_dir = tempfile.mkdtemp(prefix=f"ocr_{base_name_no_ext}_s{stream_idx}_", dir=temp_dir_base if os.path.isdir(temp_dir_base) else None)
-        image_sub_ext = self.settings['ocr_input_ext_map'].get(input_codec, f".{input_codec}")
-        temp_image_sub_basename = f"{base_name_no_ext}_s{stream_idx}_temp{image_sub_ext}"
-        temp_image_sub_path = os.path.join(ocr_session_temp_dir, temp_image_sub_basename)
-
-        cmd_extract_image = [self.settings['ffmpeg_path'], '-y', '-analyzeduration', '100M', '-probesize', '100M', '-i', movie_file_path, '-map', f'0:{stream_idx}', '-c:s', 'copy', temp_image_sub_path]
-        self.log_message(f"[OCR FFmpeg CMD] {' '.join(cmd_extract_image)}")
-        extract_proc = subprocess.Popen(cmd_extract_image, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-        _, ext_stderr = extract_proc.communicate(timeout=self.settings['ffmpeg_extract_timeout'])
-        if ext_stderr and ext_stderr.strip():
-            self.log_message(f"[OCR FFmpeg STDERR for {temp_image_sub_basename}]:\n{ext_stderr.strip()}")
-            if "file ended prematurely" in ext_stderr.lower():
-                 self.log_message("[INFO] Note: The 'file ended prematurely' message is often non-critical for temporary image subtitle extraction.", to_console=False)
-
-        if extract_proc.returncode != 0 or not os.path.exists(temp_image_sub_path) or os.path.getsize(temp_image_sub_path) == 0:
-            self.log_message(f"[OCR ERROR] Failed to extract temporary image subtitle or file is empty: {temp_image_sub_basename}. FFmpeg RC: {extract_proc.returncode}.", to_console=True)
-            if os.path.isdir(ocr_session_temp_dir): shutil.rmtree(ocr_session_temp_dir, ignore_errors=True)
-            return False
-
-        temp_ocr_output_srt_path = os.path.join(ocr_session_temp_dir, f"{os.path.splitext(temp_image_sub_basename)[0]}.srt")
-        ocr_command_raw = self.settings['ocr_command_template']
-        safe_lang_code_for_ocr = lang_code if len(lang_code) == 3 else self.settings.get('ocr_default_lang', 'eng')
-        
-        # Build the command as a list of arguments
-        command_parts = ocr_command_raw.replace("{INPUT_FILE_PATH}", temp_image_sub_path)
-        command_parts = command_parts.replace("{OUTPUT_SRT_PATH}", temp_ocr_output_srt_path)
-        command_parts = command_parts.replace("{LANG_3_CODE}", safe_lang_code_for_ocr)
-
-        self.log_message(f"[OCR CMD] {command_parts}", to_console=True)
-        ocr_success = False
-        try:
-            ocr_proc = subprocess.run(command_parts, shell=True, capture_output=True, text=True, encoding='utf-8', timeout=self.settings['ffmpeg_ocr_timeout'], creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0, check=False)
-            if ocr_proc.stdout and ocr_proc.stdout.strip(): self.log_message(f"[OCR STDOUT]:\n{ocr_proc.stdout.strip()}")
-            if ocr_proc.stderr and ocr_proc.stderr.strip(): self.log_message(f"[OCR STDERR]:\n{ocr_proc.stderr.strip()}")
-            self.log_message(f"[OCR RETURN CODE]: {ocr_proc.returncode}")
-            if ocr_proc.returncode == 0 and os.path.exists(temp_ocr_output_srt_path) and os.path.getsize(temp_ocr_output_srt_path) > 0:
-                shutil.move(temp_ocr_output_srt_path, target_srt_path)
-                self.log_message(f"[OCR SUCCESS] Translation complete: {os.path.basename(target_srt_path)}", to_console=True); ocr_success = True
-            elif ocr_proc.returncode == 0: self.log_message(f"[OCR FAILED] Droid translation unit (RC 0) but output datapad (SRT) is empty/missing: {temp_ocr_output_srt_path}", to_console=True)
-            else: self.log_message(f"[OCR FAILED] Droid translation unit malfunctioned (RC {ocr_proc.returncode}).", to_console=True)
-        except subprocess.TimeoutExpired: self.log_message(f"[OCR TIMEOUT] Comlink lost with OCR droid for {temp_image_sub_basename} after {self.settings['ffmpeg_ocr_timeout']}s.", to_console=True)
-        except FileNotFoundError: self.log_message(f"[OCR ERROR] OCR Droid (tool) not found. Check Holocron (Config) for: {command_parts}", to_console=True)
-        except Exception as e:
-            self.log_message(f"[OCR CRITICAL ERROR] Catastrophic droid failure during OCR: {e}", to_console=True); import traceback; self.log_message(traceback.format_exc(), to_console=True)
-        finally:
-            if os.path.isdir(ocr_session_temp_dir): shutil.rmtree(ocr_session_temp_dir, ignore_errors=True); self.log_message(f"[OCR Cleanup] Erased temporary droid memory banks: {ocr_session_temp_dir}", to_console=False)
-        return ocr_success
-
-    def _extract_subtitles_logic(self, files_to_process):
-        total_files = len(files_to_process); overall_subs_extracted_count = 0; processed_for_progress_count = 0
-        selected_gui_output_format = self.ui.output_format_var.get()
-        self.log_message(f"Using output format: {selected_gui_output_format}", to_console=True)
-        self.log_message(f"Language filter: {self._get_current_lang_filter_display()}", to_console=True)
-        if self.settings.get('ocr_enabled') and self.settings.get('ocr_command_template'):
-            self.log_message(f"[OCR STATUS] OCR Droid is ONLINE. Protocol: {self.settings['ocr_command_template'][:50]}...", to_console=True)
-        else:
-            self.log_message("[OCR STATUS] OCR Droid OFFLINE or no protocol. Image subs will be copied or skipped (if text output chosen).", to_console=True)
-
-        for i, movie_file_path in enumerate(files_to_process):
-            if self.cancel_requested.is_set():
-                break
-
-            movie_filename = os.path.basename(movie_file_path); current_file_had_error_flag = False
-            general_status_for_file = f"Scanning target ({i + 1}/{total_files}): {movie_filename}"
-            self._update_status_safe(general_status_for_file)
-            self._update_progress_safe((processed_for_progress_count / total_files) * 100 if total_files > 0 else 0)
-            
-            if self.settings.get('skip_if_exists'):
-                if self._check_for_existing_subs(movie_file_path):
-                    self.log_message(f"\n[INFO] Skipping target ({i + 1}/{total_files}): {movie_filename} - Existing subtitle file found.")
-                    self.files_skipped.append(movie_filename)
-                    processed_for_progress_count += 1
-                    self._update_progress_safe((processed_for_progress_count / total_files) * 100 if total_files > 0 else 0)
-                    continue
-
-            self.log_message(f"\n[INFO] Processing target ({i + 1}/{total_files}): {movie_file_path}")
-            movie_dir = os.path.dirname(movie_file_path); base_name_no_ext = os.path.splitext(movie_filename)[0]
-            file_subs_extracted_this_file = 0; file_processed_or_skipped_this_iteration = False
-            try:
-                cmd_probe = [self.settings['ffprobe_path'], '-v', 'error', '-show_entries', 'stream=index,codec_type,codec_name:stream_tags=language', '-select_streams', 's', '-of', 'csv=p=0', movie_file_path]
-                self.log_message(f"[FFPROBE CMD] {' '.join(cmd_probe)}")
-                probe_process = subprocess.Popen(cmd_probe, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-                stdout, stderr = probe_process.communicate(timeout=self.settings['ffprobe_timeout'])
-                self.log_message(f"[FFPROBE STDOUT for {movie_filename}]:\n{stdout.strip() if stdout.strip() else '<no subtitle signals detected>'}")
-                if stderr and stderr.strip(): self.log_message(f"[FFPROBE STDERR for {movie_filename}]:\n{stderr.strip()}")
-                self.log_message(f"[FFPROBE RETURN CODE for {movie_filename}]: {probe_process.returncode}")
-                if probe_process.returncode != 0:
-                    self.log_message(f"[ERROR] FFprobe malfunctioned for {movie_filename}. RC: {probe_process.returncode}. Aborting target.", to_console=True)
-                    if not current_file_had_error_flag: self.files_with_errors.append(movie_filename); current_file_had_error_flag = True
-                    file_processed_or_skipped_this_iteration = True; continue
-                subtitle_streams_from_probe = []
-                if stdout.strip():
-                    lines = stdout.strip().split('\n')
-                    for line_content in lines:
-                        parts = line_content.strip().split(',');
-                        if len(parts) < 3: continue
-                        stream_index_str, codec_type_from_probe, codec_name_from_probe = parts[0].strip(), parts[1].strip().lower(), parts[2].strip().lower()
-                        actual_codec_name = "unknown"; is_subtitle_stream = False
-                        if codec_type_from_probe == 'subtitle': is_subtitle_stream = True; actual_codec_name = codec_name_from_probe
-                        elif codec_name_from_probe == 'subtitle': is_subtitle_stream = True; actual_codec_name = codec_type_from_probe
-                        elif codec_type_from_probe in IMAGE_BASED_CODECS or codec_type_from_probe in TEXT_BASED_OUTPUT_FORMATS: is_subtitle_stream = True; actual_codec_name = codec_type_from_probe
-                        if is_subtitle_stream:
-                            language_str = "und";
-                            if len(parts) > 3 and parts[3].strip(): language_str = parts[3].strip().lower()
-                            subtitle_streams_from_probe.append({"index": stream_index_str, "lang": language_str, "codec": actual_codec_name})
-                            self.log_message(f"[DEBUG]   -> Detected signal: Idx='{stream_index_str}',Lang='{language_str}',Codec='{actual_codec_name}'")
-                if not subtitle_streams_from_probe:
-                    self.log_message(f"[INFO] No subtitle signals found/parsed for {movie_filename}."); self.files_with_no_subs.append(movie_filename)
-                    file_processed_or_skipped_this_iteration = True; continue
-                streams_to_extract_this_file = []
-                if self.extract_all_languages_flag: streams_to_extract_this_file = subtitle_streams_from_probe
-                else:
-                    for stream_info in subtitle_streams_from_probe:
-                        if stream_info["lang"] in self.user_selected_languages: streams_to_extract_this_file.append(stream_info)
-                self.log_message(f"[INFO] Filtered to {len(streams_to_extract_this_file)} signal(s) for {movie_filename} based on language selection: {self.user_selected_languages if not self.extract_all_languages_flag else 'All (Galactic Basic)'}")
-                if not streams_to_extract_this_file:
-                    self.log_message(f"[INFO] No signals match language filter for {movie_filename}. Skipping this target's subtitle extraction.")
-                    file_processed_or_skipped_this_iteration = True; continue
-
-                self._update_status_safe(f"Processing subtitle signals for {movie_filename}...")
-
-                for stream_info in streams_to_extract_this_file:
-                    if self.cancel_requested.is_set(): break
-                    
-                    stream_idx, lang_code, input_codec = stream_info["index"], stream_info["lang"], stream_info["codec"].lower()
-                    safe_lang_code = re.sub(r'[^a-zA-Z0-9_.-]', '', lang_code) or "und"
-                    output_target_format_gui = selected_gui_output_format.lower()
-                    ffmpeg_codec_arg_for_direct_extract = output_target_format_gui; final_output_extension = f".{output_target_format_gui}"
-                    run_ocr = False; use_direct_ffmpeg_extract = True
-                    if output_target_format_gui == 'copy':
-                        ffmpeg_codec_arg_for_direct_extract = 'copy'
-                        if input_codec in ['subrip', 'srt']: final_output_extension = ".srt"
-                        elif input_codec == 'ass': final_output_extension = ".ass"
-                        elif input_codec in ['webvtt', 'vtt']: final_output_extension = ".vtt"
-                        elif input_codec == 'mov_text': ffmpeg_codec_arg_for_direct_extract = 'srt'; final_output_extension = '.srt'; self.log_message(f"[INFO] Forcing mov_text (signal {stream_idx}, lang {lang_code}) to SRT for comlink compatibility, despite 'copy' order.", to_console=True)
-                        elif input_codec in IMAGE_BASED_CODECS: final_output_extension = self.settings['ocr_input_ext_map'].get(input_codec, f".{input_codec}"); self.log_message(f"[INFO] Copying image-based signal '{input_codec}' (stream {stream_idx}, lang {lang_code}) as is. Output ext: {final_output_extension}", to_console=True)
-                        else: final_output_extension = f".{input_codec}"; self.log_message(f"[WARN] Copying unknown signal type '{input_codec}' (stream {stream_idx}, lang {lang_code}). Extension: '{final_output_extension}'.", to_console=True)
-                    elif output_target_format_gui in TEXT_BASED_OUTPUT_FORMATS:
-                        if input_codec in IMAGE_BASED_CODECS:
-                            if self.settings.get('ocr_enabled') and self.settings.get('ocr_command_template'):
-                                run_ocr = True; use_direct_ffmpeg_extract = False
-                            else:
-                                self.log_message(f"[INFO] Skipping image-based signal {stream_idx} ({input_codec}, lang {lang_code}) for {movie_filename}. Cannot convert to {output_target_format_gui.upper()} without OCR Droid. Use 'copy' or deploy OCR Droid via Holocron (Config).", to_console=True)
-                                if not current_file_had_error_flag: self.files_with_errors.append(movie_filename); current_file_had_error_flag = True
-                                continue
-                        elif input_codec == 'mov_text':
-                            self.log_message(f"[INFO] Translating mov_text (signal {stream_idx}, lang {lang_code}) to {output_target_format_gui.upper()}.", to_console=True)
-                    else:
-                        self.log_message(f"[ERROR] Unexpected output format '{output_target_format_gui}' for signal {stream_idx}. Skipping.", to_console=True)
-                        if not current_file_had_error_flag: self.files_with_errors.append(movie_filename); current_file_had_error_flag = True
-                        continue
-
-                    sub_filename_out = f"{base_name_no_ext}.{safe_lang_code}.{stream_idx}{final_output_extension}"
-                    output_path = os.path.join(movie_dir, sub_filename_out)
-                    extraction_successful_this_stream = False
-                    if run_ocr:
-                        if self._run_ocr_on_image_sub(movie_file_path, base_name_no_ext, stream_idx, lang_code, input_codec, output_path): extraction_successful_this_stream = True
-                        else:
-                            if not current_file_had_error_flag: self.files_with_errors.append(movie_filename); current_file_had_error_flag = True
-                        self._update_status_safe(f"OCR Droid finished with {safe_lang_code} for {movie_filename}. Stand by...")
-                    elif use_direct_ffmpeg_extract:
-                        self._update_status_safe(f"Extracting signal {safe_lang_code} (idx {stream_idx}) as {ffmpeg_codec_arg_for_direct_extract.upper()} from {movie_filename}...")
-                        cmd_extract = [self.settings['ffmpeg_path'], '-y', '-analyzeduration', '100M', '-probesize', '100M', '-i', movie_file_path, '-map', f'0:{stream_idx}', '-c:s', ffmpeg_codec_arg_for_direct_extract, output_path]
-                        self.log_message(f"[FFMPEG CMD] {' '.join(cmd_extract)}")
-                        extract_process = subprocess.Popen(cmd_extract, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-                        _, ext_stderr = extract_process.communicate(timeout=self.settings['ffmpeg_extract_timeout'])
-                        if ext_stderr and ext_stderr.strip():
-                            self.log_message(f"[FFMPEG STDERR for {sub_filename_out}]:\n{ext_stderr.strip()}")
-                            if "file ended prematurely" in ext_stderr.lower():
-                                self.log_message("[INFO] Note: The 'file ended prematurely' message from FFmpeg is often non-critical for subtitle streams and may not indicate a failure.", to_console=False)
-                        self.log_message(f"[FFMPEG RETURN CODE for {sub_filename_out}]: {extract_process.returncode}")
-                        if extract_process.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 0: extraction_successful_this_stream = True
-                        elif extract_process.returncode == 0: self.log_message(f"[WARNING] FFmpeg reported success, but output datapad '{output_path}' is empty or missing.", to_console=True)
-                    else:
-                        self.log_message(f"[ERROR] Internal logic error for signal {stream_idx}. Cannot determine extraction method. Skipping.", to_console=True)
-                        if not current_file_had_error_flag: self.files_with_errors.append(movie_filename); current_file_had_error_flag = True
-                        continue
-
-                    if extraction_successful_this_stream:
-                        file_subs_extracted_this_file += 1
-                        self.log_message(f"[SUCCESS] Successfully decoded stream {stream_idx} ({lang_code}) from {movie_filename} to {os.path.basename(output_path)}", to_console=True)
-                
-                if file_subs_extracted_this_file > 0:
-                    overall_subs_extracted_count += file_subs_extracted_this_file
-                    self.files_with_success.append(movie_filename)
-                    self.log_message(f"[INFO] Target {movie_filename} processed, {file_subs_extracted_this_file} signal(s) decoded.")
-                elif not current_file_had_error_flag and movie_filename not in self.files_with_no_subs and movie_filename not in self.files_with_errors:
-                    self.log_message(f"[INFO] Target {movie_filename} processed, no suitable signals decoded/translated.")
-                file_processed_or_skipped_this_iteration = True
-
-            except subprocess.TimeoutExpired:
-                self.log_message(f"[TIMEOUT] Comlink lost processing {movie_filename}. Skipping target.", to_console=True); self.files_timed_out.append(movie_filename); file_processed_or_skipped_this_iteration = True
-                self._update_status_safe(f"Comlink lost with {movie_filename}. Moving to next target.")
-            except Exception as e:
-                self.log_message(f"[CRITICAL SYSTEM ERROR] Unexpected asteroid field encountered with {movie_filename}: {e}", to_console=True); import traceback; self.log_message(traceback.format_exc(), to_console=True)
-                if not current_file_had_error_flag: self.files_with_errors.append(movie_filename)
-                file_processed_or_skipped_this_iteration = True
-                self._update_status_safe(f"Error with {movie_filename}. Jumping to next system.")
-            finally:
-                if file_processed_or_skipped_this_iteration: processed_for_progress_count += 1
-                self._update_progress_safe((processed_for_progress_count / total_files) * 100 if total_files > 0 else 0)
-        
-        summary_message = f"Mission Report: {processed_for_progress_count}/{total_files} targets engaged. "
-        if overall_subs_extracted_count > 0: summary_message += f"{overall_subs_extracted_count} subtitle signal(s) successfully decoded."
-        else: summary_message += "No subtitle signals were decoded in this operation."
-        self._extraction_finished_safe(summary_message)
\ No newline at end of file
+        # Rows were updated as files finished; one pass over the store settles any the journal changed on resume.
+        for file_result in self.engine.result_store.files():
+            row_status = file_result.row_status()
+            if row_status and self.ui.file_tree.exists(file_result.path): self.ui.file_tree.set(file_result.path, "Status", row_status)
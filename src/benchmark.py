@@ -0,0 +1,401 @@
+import os
+import sys
+import json
+import time
+import shutil
+import struct
+import hashlib
+import argparse
+import platform
+import tempfile
+import datetime
+import statistics
+import subprocess
+from config import AppConfig
+from engine import ExtractionEngine
+from pgs_decoder import PGS_MAGIC, PGS_CLOCK_HZ, SEGMENT_HEADER, PDS, ODS, PCS, WDS, END, EPOCH_START
+from subtitle_model import ASS_DEFAULT_HEADER, ASS_EVENTS_HEADER, format_ass_time, format_srt_time
+
+# Reproducible benchmark: generates synthetic movies locally (lavfi video, generated SRT/ASS tracks, PGS bitmap
+# tracks), then times the folder scan, probing and a full extraction run (with a stub OCR command) through the
+# same engine the GUI and CLI use. Results are JSON and are compared against a stored baseline; a throughput drop
+# (or a rise in bytes read) beyond the threshold is a regression and makes the exit code 1.
+#
+#   python benchmark.py                       # quick profile, compare with the stored baseline if there is one
+#   python benchmark.py --save-baseline       # ... and store this run as the new baseline
+#   python benchmark.py --profile full        # adds multi-GB files and a large sidecar tree
+BENCHMARK_VERSION = 1
+FIXTURE_VERSION = 1
+MANIFEST_FILENAME = "fixtures.json"
+EXIT_OK, EXIT_REGRESSION, EXIT_SETUP_ERROR = 0, 1, 2
+DEFAULT_REGRESSION_THRESHOLD = 0.15
+PHASES = ('scan', 'probe', 'extract')
+BENCHMARK_PROFILES = {
+    # track_counts: subtitle tracks per small MKV/MP4; large_mb: size of the large MKV and MP4 (0 = none);
+    # flat_movies: movies in one directory; nested_depth x nested_movies: movies in a deep directory chain.
+    'quick': {'track_counts': (1, 4, 12, 30), 'small_seconds': 60, 'large_mb': 64, 'large_tracks': 3,
+              'flat_movies': 300, 'nested_depth': 10, 'nested_movies': 4, 'sidecars_per_movie': 4},
+    'full': {'track_counts': (1, 2, 4, 8, 12, 20, 30), 'small_seconds': 300, 'large_mb': 2048, 'large_tracks': 6,
+             'flat_movies': 3000, 'nested_depth': 25, 'nested_movies': 20, 'sidecars_per_movie': 6},
+}
+TRACK_LANGUAGES = ('eng', 'fre', 'ger', 'spa', 'ita', 'jpn', 'por', 'dut', 'swe', 'pol')
+CUE_SPACING_SECONDS = 2.0
+PGS_CUES = 40
+PGS_SIZE = (240, 40)
+LOOP_CLIP_SECONDS = 10
+STUB_OCR_SCRIPT = """import sys
+# Benchmark stand-in for an OCR tool: one cue per input, no recognition.
+with open(sys.argv[2], 'w', encoding='utf-8') as srt_file: srt_file.write("1\\n00:00:01,000 --> 00:00:02,000\\nstub\\n\\n")
+"""
+
+
+def log(message):
+    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {message}", file=sys.stderr)
+
+
+# --- Fixture generation ---
+
+def cue_times(duration, count):
+    spacing = duration / max(1, count)
+    return [(number * spacing, number * spacing + min(CUE_SPACING_SECONDS, spacing * 0.8)) for number in range(count)]
+
+
+def write_srt_track(path, track, duration):
+    cues = cue_times(duration, int(duration / CUE_SPACING_SECONDS))
+    with open(path, 'w', encoding='utf-8') as srt_file:
+        srt_file.write(''.join(f"{number}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{'<i>' if number % 5 == 0 else ''}Track {track} line {number}{'</i>' if number % 5 == 0 else ''}\n"
+                               f"of the benchmark fixture\n\n" for number, (start, end) in enumerate(cues, 1)))
+
+
+def write_ass_track(path, track, duration):
+    cues = cue_times(duration, int(duration / CUE_SPACING_SECONDS))
+    with open(path, 'w', encoding='utf-8') as ass_file:
+        ass_file.write(ASS_DEFAULT_HEADER + ASS_EVENTS_HEADER)
+        ass_file.write(''.join(f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},Default,,0,0,0,,{{\\b1}}Track {track}{{\\b0}} line {number}\\Nof the benchmark fixture\n"
+                               for number, (start, end) in enumerate(cues, 1)))
+
+
+def _pgs_segment(segment_type, pts, payload):
+    return SEGMENT_HEADER.pack(PGS_MAGIC, pts, 0, segment_type, len(payload)) + payload
+
+
+def _pgs_rle(rows):
+    # rows of palette indexes; runs of 3+ (and every run of colour 0) are run-length coded.
+    out = bytearray()
+    for row in rows:
+        position = 0
+        while position < len(row):
+            colour = row[position]; run = 1
+            while position + run < len(row) and row[position + run] == colour and run < 16383: run += 1
+            if colour and run < 3:
+                out += bytes([colour]) * run
+            elif colour == 0:
+                out += bytes([0, run]) if run < 64 else bytes([0, 0x40 | (run >> 8), run & 0xFF])
+            else:
+                out += bytes([0, 0x80 | run, colour]) if run < 64 else bytes([0, 0xC0 | (run >> 8), run & 0xFF, colour])
+            position += run
+        out += b'\x00\x00'
+    return bytes(out)
+
+
+def write_pgs_track(path, duration, video_size):
+    # Each cue is its own display set with a distinct bar pattern, followed by an empty display set that clears it.
+    width, height = PGS_SIZE; x, y = (video_size[0] - width) // 2, video_size[1] - height - 20
+    with open(path, 'wb') as sup_file:
+        for number, (start, end) in enumerate(cue_times(duration, PGS_CUES)):
+            rows = [[1 if (column // (4 + number % 7)) % 2 and 8 <= line < height - 8 else 0 for column in range(width)] for line in range(height)]
+            rle = _pgs_rle(rows); pts = int(start * PGS_CLOCK_HZ); clear_pts = int(end * PGS_CLOCK_HZ)
+            video_header = struct.pack('>HHBH', video_size[0], video_size[1], 0x10, number * 2)
+            sup_file.write(_pgs_segment(PCS, pts, video_header + bytes([EPOCH_START, 0, 0, 1]) + struct.pack('>HBBHH', 0, 0, 0, x, y)))
+            sup_file.write(_pgs_segment(WDS, pts, bytes([1, 0]) + struct.pack('>HHHH', x, y, width, height)))
+            sup_file.write(_pgs_segment(PDS, pts, bytes([0, 0]) + bytes([0, 16, 128, 128, 0, 1, 235, 128, 128, 255])))
+            sup_file.write(_pgs_segment(ODS, pts, struct.pack('>HBB', 0, 0, 0xC0) + (len(rle) + 4).to_bytes(3, 'big') + struct.pack('>HH', width, height) + rle))
+            sup_file.write(_pgs_segment(END, pts, b''))
+            sup_file.write(_pgs_segment(PCS, clear_pts, struct.pack('>HHBH', video_size[0], video_size[1], 0x10, number * 2 + 1) + bytes([0, 0, 0, 0])))
+            sup_file.write(_pgs_segment(WDS, clear_pts, bytes([1, 0]) + struct.pack('>HHHH', x, y, width, height)))
+            sup_file.write(_pgs_segment(END, clear_pts, b''))
+
+
+def run_ffmpeg(ffmpeg_path, args):
+    result = subprocess.run([ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y'] + args, capture_output=True, text=True, encoding='utf-8', errors='replace', check=False)
+    if result.returncode != 0: raise RuntimeError(f"ffmpeg failed (RC {result.returncode}): {result.stderr.strip()[:500]}")
+
+
+def make_clip(ffmpeg_path, path, video_size, seconds, quality):
+    # Intra-only MPEG-4 video: quick to encode, and its size is predictable, so looping it gives a target file size.
+    run_ffmpeg(ffmpeg_path, ['-f', 'lavfi', '-i', f"testsrc2=s={video_size[0]}x{video_size[1]}:r=25:d={seconds}", '-c:v', 'mpeg4', '-q:v', str(quality), '-g', '1', path])
+
+
+def make_movie(ffmpeg_path, path, clip_path, loops, duration, track_count, with_pgs, work_dir, video_size):
+    container = os.path.splitext(path)[1].lower()
+    inputs = ['-stream_loop', str(loops - 1), '-i', clip_path]; maps = ['-map', '0:v']; codec_args = ['-c:v', 'copy']; metadata = []
+    for track in range(track_count):
+        # MP4 carries text as mov_text only; MKV gets a mix of SRT and ASS tracks.
+        track_format = 'ass' if container == '.mkv' and track % 3 == 2 else 'srt'
+        track_path = os.path.join(work_dir, f"track{track}.{track_format}")
+        (write_ass_track if track_format == 'ass' else write_srt_track)(track_path, track, duration)
+        inputs += ['-i', track_path]; maps += ['-map', f"{track + 1}:0"]
+        metadata += [f"-metadata:s:s:{track}", f"language={TRACK_LANGUAGES[track % len(TRACK_LANGUAGES)]}"]
+    if with_pgs:
+        sup_path = os.path.join(work_dir, "bitmap.sup"); write_pgs_track(sup_path, duration, video_size)
+        inputs += ['-i', sup_path]; maps += ['-map', f"{track_count + 1}:0"]
+        metadata += [f"-metadata:s:s:{track_count}", "language=eng"]
+    codec_args += ['-c:s', 'mov_text'] if container == '.mp4' else ['-c:s', 'copy']
+    run_ffmpeg(ffmpeg_path, inputs + maps + codec_args + metadata + ['-t', str(duration), path])
+
+
+def link_or_copy(source_path, target_path):
+    # Tree fixtures are hard links of one small movie where the filesystem allows it, so a big tree costs no space.
+    try: os.link(source_path, target_path)
+    except OSError: shutil.copyfile(source_path, target_path)
+
+
+def add_movie_with_sidecars(source_path, directory, name, sidecars):
+    link_or_copy(source_path, os.path.join(directory, f"{name}.mkv"))
+    for number in range(sidecars):
+        with open(os.path.join(directory, f"{name}.{TRACK_LANGUAGES[number % len(TRACK_LANGUAGES)]}.{number}.srt"), 'w', encoding='utf-8') as srt_file:
+            srt_file.write("1\n00:00:01,000 --> 00:00:02,000\nsidecar\n\n")
+
+
+def generate_fixtures(fixtures_dir, profile_name, ffmpeg_path):
+    profile = BENCHMARK_PROFILES[profile_name]
+    media_dir = os.path.join(fixtures_dir, 'media'); tree_dir = os.path.join(fixtures_dir, 'tree'); work_dir = os.path.join(fixtures_dir, '_work')
+    for directory in (media_dir, tree_dir, work_dir):
+        shutil.rmtree(directory, ignore_errors=True); os.makedirs(directory)
+    small_size, large_size = (320, 180), (1280, 720)
+    small_clip = os.path.join(work_dir, "small_clip.mkv"); make_clip(ffmpeg_path, small_clip, small_size, profile['small_seconds'], 8)
+    for track_count in profile['track_counts']:
+        for container in ('mkv', 'mp4'):
+            log(f"Generating {container.upper()} with {track_count} subtitle track(s)...")
+            make_movie(ffmpeg_path, os.path.join(media_dir, f"{container}_{track_count:02d}_tracks.{container}"), small_clip, 1, profile['small_seconds'],
+                       track_count, container == 'mkv' and track_count >= 4, work_dir, small_size)
+    if profile['large_mb']:
+        large_clip = os.path.join(work_dir, "large_clip.mkv"); make_clip(ffmpeg_path, large_clip, large_size, LOOP_CLIP_SECONDS, 2)
+        loops = max(1, -(-profile['large_mb'] * 1024 * 1024 // os.path.getsize(large_clip)))
+        for container in ('mkv', 'mp4'):
+            log(f"Generating {profile['large_mb']} MB {container.upper()}...")
+            make_movie(ffmpeg_path, os.path.join(media_dir, f"{container}_large.{container}"), large_clip, loops, loops * LOOP_CLIP_SECONDS,
+                       profile['large_tracks'], container == 'mkv', work_dir, large_size)
+    log("Generating scan trees...")
+    tree_source = os.path.join(media_dir, f"mkv_{profile['track_counts'][0]:02d}_tracks.mkv")
+    flat_dir = os.path.join(tree_dir, 'flat'); os.makedirs(flat_dir)
+    for number in range(profile['flat_movies']):
+        # Every other movie has sidecars, so the scan sees both answers.
+        add_movie_with_sidecars(tree_source, flat_dir, f"movie_{number:05d}", profile['sidecars_per_movie'] if number % 2 else 0)
+    nested_dir = os.path.join(tree_dir, 'nested')
+    for depth in range(profile['nested_depth']):
+        nested_dir = os.path.join(nested_dir, f"level_{depth:02d}"); os.makedirs(nested_dir)
+        for number in range(profile['nested_movies']): add_movie_with_sidecars(tree_source, nested_dir, f"episode_{depth:02d}_{number:03d}", profile['sidecars_per_movie'])
+    for name in os.listdir(work_dir):
+        if name.startswith('track') or name == 'bitmap.sup': os.remove(os.path.join(work_dir, name))
+    with open(os.path.join(work_dir, "stub_ocr.py"), 'w', encoding='utf-8') as stub_file: stub_file.write(STUB_OCR_SCRIPT)
+    manifest = {"fixture_version": FIXTURE_VERSION, "profile": profile_name, "settings": profile, "created_at": datetime.datetime.now().isoformat(timespec='seconds'),
+                "media": sorted({name: os.path.getsize(os.path.join(media_dir, name)) for name in os.listdir(media_dir)}.items())}
+    manifest["fixture_id"] = hashlib.sha1(json.dumps([FIXTURE_VERSION, profile_name, profile, manifest["media"]], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    with open(os.path.join(fixtures_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as manifest_file: json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+def load_manifest(fixtures_dir, profile_name):
+    try:
+        with open(os.path.join(fixtures_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as manifest_file: manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("fixture_version") != FIXTURE_VERSION or manifest.get("profile") != profile_name: return None
+    if not all(os.path.isfile(os.path.join(fixtures_dir, 'media', name)) for name, _ in manifest["media"]): return None
+    return manifest
+
+
+# --- Timed phases ---
+
+def make_engine(fixtures_dir, args):
+    # Caches, journal and metric files off, so every repetition does the full work and leaves nothing behind.
+    config = AppConfig(os.path.join(fixtures_dir, '_work'))
+    stub_path = os.path.join(fixtures_dir, '_work', "stub_ocr.py")
+    config.settings.update({
+        'ffmpeg_path': args.ffmpeg, 'ffprobe_path': args.ffprobe, 'skip_if_exists': False, 'selected_languages': 'all',
+        'probe_cache_enabled': False, 'ocr_cache_enabled': False, 'job_journal_enabled': False,
+        'metrics_report_enabled': False, 'metrics_prometheus_path': '', 'profile_python': False, 'trace_memory': False,
+        'ocr_enabled': True, 'ocr_engine': 'template', 'ocr_backend': 'template', 'ocr_temp_dir': '',
+        'ocr_command_template': f'"{sys.executable}" "{stub_path}" "{{INPUT_FILE_PATH}}" "{{OUTPUT_SRT_PATH}}"',
+    })
+    if args.workers: config.settings['extraction_workers'] = args.workers
+    if args.ocr_workers: config.settings['ocr_workers'] = args.ocr_workers
+    return ExtractionEngine(config, log_callback=(lambda message, to_console=True: log(message)) if args.verbose else (lambda message, to_console=True: None))
+
+
+def time_scan(engine, tree_dir):
+    started = time.perf_counter()
+    movie_files = list(engine.find_movie_files(tree_dir))
+    with_subs = sum(1 for movie_file in movie_files if engine.has_existing_subs(movie_file))
+    return {"seconds": time.perf_counter() - started, "files": len(movie_files), "files_with_subs": with_subs}
+
+
+def time_probe(engine, media_files):
+    started = time.perf_counter(); streams = 0
+    for movie_file in media_files:
+        file_info = engine.probe_file(movie_file, quiet=True)
+        if file_info is None: raise RuntimeError(f"probe failed for {movie_file}")
+        streams += len(file_info.streams)
+    seconds = time.perf_counter() - started
+    stages = engine.metrics.to_dict()["stages"]
+    return {"seconds": seconds, "files": len(media_files), "streams": streams, "bytes_read": sum(stage["bytes_read"] for stage in stages.values())}
+
+
+def time_extract(engine, media_files, output_format):
+    media_dir = os.path.dirname(media_files[0]); before = set(os.listdir(media_dir))
+    try:
+        started = time.perf_counter()
+        engine.run(media_files, output_format)
+        seconds = time.perf_counter() - started
+        results = engine.results()
+        stages = results["metrics"]["stages"]
+        return {"seconds": seconds, "files": results["processed"], "streams": results["subtitles_extracted"], "failed_files": len(engine.failed_files()),
+                "bytes_read": sum(stage["bytes_read"] for stage in stages.values()), "bytes_written": sum(stage["bytes_written"] for stage in stages.values()),
+                "stages": {name: {"seconds": stage["wall_seconds"], "child_cpu_seconds": stage["child_cpu_seconds"], "count": stage["count"]} for name, stage in stages.items()}}
+    finally:
+        for name in set(os.listdir(media_dir)) - before:
+            path = os.path.join(media_dir, name)
+            if os.path.isdir(path): shutil.rmtree(path, ignore_errors=True)
+            else: os.remove(path)
+
+
+def summarize(samples):
+    # Median wall time over the repetitions; counts are the same every time, the rest comes from the median sample.
+    median_sample = sorted(samples, key=lambda sample: sample["seconds"])[len(samples) // 2]
+    summary = dict(median_sample); seconds = summary["seconds"]
+    summary["seconds"] = round(seconds, 4); summary["seconds_min"] = round(min(sample["seconds"] for sample in samples), 4)
+    summary["seconds_stdev"] = round(statistics.pstdev(sample["seconds"] for sample in samples), 4)
+    summary["files_per_second"] = round(summary["files"] / seconds, 3) if seconds else None
+    if "streams" in summary: summary["streams_per_second"] = round(summary["streams"] / seconds, 3) if seconds else None
+    return summary
+
+
+def run_benchmark(fixtures_dir, manifest, args):
+    media_dir = os.path.join(fixtures_dir, 'media')
+    media_files = sorted(os.path.join(media_dir, name) for name, _ in manifest["media"])
+    phases = {}
+    for phase in args.phases:
+        samples = []
+        for repetition in range(args.repeat):
+            engine = make_engine(fixtures_dir, args)
+            try:
+                log(f"{phase} {repetition + 1}/{args.repeat}...")
+                if phase == 'scan': samples.append(time_scan(engine, os.path.join(fixtures_dir, 'tree')))
+                elif phase == 'probe': samples.append(time_probe(engine, media_files))
+                else: samples.append(time_extract(engine, media_files, args.output_format))
+            finally:
+                engine.close()
+        phases[phase] = summarize(samples)
+    ffmpeg_version = subprocess.run([args.ffmpeg, '-version'], capture_output=True, text=True, errors='replace', check=False).stdout.split('\n', 1)[0]
+    return {"benchmark_version": BENCHMARK_VERSION, "fixture_id": manifest["fixture_id"], "profile": manifest["profile"], "created_at": datetime.datetime.now().isoformat(timespec='seconds'),
+            "repeat": args.repeat, "output_format": args.output_format, "workers": args.workers, "ocr_workers": args.ocr_workers,
+            "host": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()}, "ffmpeg": ffmpeg_version, "phases": phases}
+
+
+# --- Baseline comparison ---
+
+def compare_with_baseline(results, baseline, threshold):
+    # (regressions, notes). Throughput may not drop by more than threshold; bytes read may not grow by more than it.
+    regressions, notes = [], []
+    if baseline.get("fixture_id") != results["fixture_id"] or baseline.get("benchmark_version") != BENCHMARK_VERSION:
+        notes.append("Baseline was recorded on different fixtures or by another benchmark version; not comparable.")
+        return regressions, notes
+    if baseline.get("host", {}).get("platform") != results["host"]["platform"] or baseline.get("ffmpeg") != results["ffmpeg"]:
+        notes.append("Baseline comes from another host or FFmpeg build; differences may not be caused by the code.")
+    for phase, current in results["phases"].items():
+        previous = baseline.get("phases", {}).get(phase)
+        if not previous: continue
+        for metric in ('files_per_second', 'streams_per_second'):
+            if current.get(metric) and previous.get(metric):
+                change = current[metric] / previous[metric] - 1
+                notes.append(f"{phase} {metric}: {previous[metric]} -> {current[metric]} ({change:+.1%})")
+                if change < -threshold: regressions.append(f"{phase} {metric} dropped {-change:.1%} ({previous[metric]} -> {current[metric]})")
+        if previous.get("bytes_read") and current.get("bytes_read") is not None:
+            change = current["bytes_read"] / previous["bytes_read"] - 1
+            if change > threshold: regressions.append(f"{phase} bytes_read grew {change:.1%} ({previous['bytes_read']} -> {current['bytes_read']})")
+    return regressions, notes
+
+
+def print_results(results):
+    for phase, summary in results["phases"].items():
+        line = f"{phase:<8} {summary['seconds']:>9.3f}s (min {summary['seconds_min']:.3f}s, sd {summary['seconds_stdev']:.3f}s)  {summary['files']} files  {summary['files_per_second']} files/s"
+        if "streams" in summary: line += f"  {summary['streams']} streams  {summary['streams_per_second']} streams/s"
+        if "bytes_read" in summary: line += f"  {summary['bytes_read'] / (1024 * 1024):.1f} MB read"
+        print(line)
+        for stage, stage_summary in summary.get("stages", {}).items():
+            print(f"    {stage:<14} {stage_summary['seconds']:>9.3f}s  {stage_summary['count']}x  child CPU {stage_summary['child_cpu_seconds']:.3f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark", description="Time scan, probe and extraction on generated fixtures and compare with a stored baseline.")
+    parser.add_argument('--profile', choices=sorted(BENCHMARK_PROFILES), default='quick', help="Fixture set: 'quick' (small files, 64 MB large files) or 'full' (multi-GB files, big trees).")
+    parser.add_argument('--fixtures', help="Fixture directory (generated on first use). Default: <temp dir>/sub_extractor_benchmark/<profile>.")
+    parser.add_argument('--regenerate', action='store_true', help="Regenerate the fixtures even if they exist.")
+    parser.add_argument('--phases', default=','.join(PHASES), help=f"Comma-separated phases to run (default: {','.join(PHASES)}).")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions per phase; the median is reported (default: 3).")
+    parser.add_argument('--format', dest='output_format', default='srt', help="Output format(s) for the extraction phase (default: srt).")
+    parser.add_argument('-j', '--workers', type=int, help="Extraction workers (default: from the config defaults).")
+    parser.add_argument('--ocr-workers', type=int, help="OCR workers (default: from the config defaults).")
+    parser.add_argument('--ffmpeg', default='ffmpeg', help="FFmpeg binary used for fixtures and extraction.")
+    parser.add_argument('--ffprobe', default='ffprobe', help="FFprobe binary used for probing.")
+    parser.add_argument('--baseline', help="Baseline JSON to compare with. Default: benchmarks/baseline_<profile>.json next to this script.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the baseline.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD, help=f"Allowed relative slowdown before a change counts as a regression (default: {DEFAULT_REGRESSION_THRESHOLD}).")
+    parser.add_argument('--output', help="Write the results JSON here ('-' for stdout).")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Print the engine's log while benchmarking.")
+    args = parser.parse_args(argv)
+    args.phases = [phase for phase in args.phases.split(',') if phase]
+    if not args.phases or any(phase not in PHASES for phase in args.phases): parser.error(f"--phases takes a comma-separated list of {', '.join(PHASES)}")
+    if args.repeat < 1: parser.error("--repeat must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures_dir = os.path.abspath(args.fixtures or os.path.join(tempfile.gettempdir(), 'sub_extractor_benchmark', args.profile))
+    baseline_path = args.baseline or os.path.join(script_dir, 'benchmarks', f"baseline_{args.profile}.json")
+    if shutil.which(args.ffmpeg) is None and not os.path.isfile(args.ffmpeg):
+        print(f"FFmpeg not found: {args.ffmpeg}", file=sys.stderr); return EXIT_SETUP_ERROR
+    manifest = None if args.regenerate else load_manifest(fixtures_dir, args.profile)
+    if manifest is None:
+        log(f"Generating '{args.profile}' fixtures in {fixtures_dir}...")
+        try: manifest = generate_fixtures(fixtures_dir, args.profile, args.ffmpeg)
+        except (OSError, RuntimeError) as e:
+            print(f"Could not generate fixtures: {e}", file=sys.stderr); return EXIT_SETUP_ERROR
+    try:
+        results = run_benchmark(fixtures_dir, manifest, args)
+    except RuntimeError as e:
+        print(f"Benchmark failed: {e}", file=sys.stderr); return EXIT_SETUP_ERROR
+    print_results(results)
+
+    exit_code = EXIT_OK
+    try:
+        with open(baseline_path, 'r', encoding='utf-8') as baseline_file: baseline = json.load(baseline_file)
+    except (OSError, ValueError):
+        baseline = None
+    if baseline and not args.save_baseline:
+        regressions, notes = compare_with_baseline(results, baseline, args.threshold)
+        for note in notes: print(f"  {note}")
+        results["regressions"] = regressions
+        if regressions:
+            print(f"REGRESSION against {baseline_path}:"); exit_code = EXIT_REGRESSION
+            for regression in regressions: print(f"  - {regression}")
+        else: print(f"No regression against {baseline_path} (threshold {args.threshold:.0%}).")
+    elif not args.save_baseline:
+        print(f"No baseline at {baseline_path}; store one with --save-baseline.")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as baseline_file: json.dump(results, baseline_file, indent=2)
+        print(f"Baseline saved to {baseline_path}.")
+    if args.output:
+        results_json = json.dumps(results, indent=2)
+        if args.output == '-': print(results_json)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as output_file: output_file.write(results_json + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
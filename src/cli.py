@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import threading
+import traceback
+from config import AppConfig, MOVIE_EXTENSIONS
+from engine import ExtractionEngine
+from watcher import FolderWatcher
+
+# Headless entry point: shares ExtractionEngine with the GUI but never imports tkinter, so it starts fast
+# enough to be called per file from a download client's post-processing hook or from cron.
+EXIT_OK, EXIT_FAILURES, EXIT_SETUP_ERROR, EXIT_CANCELLED = 0, 1, 2, 130
+
+
+def output_format_arg(value):
+    formats = [subtitle_format for subtitle_format in value.lower().replace(' ', '').split(',') if subtitle_format]
+    if not formats or any(subtitle_format not in ('srt', 'ass', 'vtt', 'copy') for subtitle_format in formats) or 'copy' in formats[1:]:
+        raise argparse.ArgumentTypeError(f"invalid format list '{value}' (srt, ass, vtt, copy; copy only first)")
+    return ','.join(formats)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="sub-extractor", description="Extract subtitle streams from movie files without the GUI.")
+    parser.add_argument('paths', nargs='*', help="Movie files and/or folders (folders are scanned recursively). With --watch: the folders to watch (default: watch_folders from the config).")
+    parser.add_argument('-f', '--format', dest='output_format', type=output_format_arg, help="Output format: srt, ass, vtt or copy, or several comma-separated (e.g. srt,vtt; each track is demuxed once and the rest rendered from it). Default: default_output_format from the config.")
+    parser.add_argument('-l', '--languages', help="Comma-separated 3-letter language codes to extract, or 'all' (default: selected_languages from the config).")
+    ocr_group = parser.add_mutually_exclusive_group()
+    ocr_group.add_argument('--ocr', dest='ocr', action='store_true', default=None, help="Enable OCR of image-based subtitles (needs ocr_command_template in the config).")
+    ocr_group.add_argument('--no-ocr', dest='ocr', action='store_false', help="Disable OCR of image-based subtitles.")
+    skip_group = parser.add_mutually_exclusive_group()
+    skip_group.add_argument('--skip-existing', dest='skip_if_exists', action='store_true', default=None, help="Skip movies that already have a subtitle file next to them.")
+    skip_group.add_argument('--no-skip-existing', dest='skip_if_exists', action='store_false', help="Process movies even if subtitle files exist.")
+    parser.add_argument('-j', '--workers', type=int, help="Number of extraction workers.")
+    parser.add_argument('--ocr-workers', type=int, help="Number of OCR workers.")
+    parser.add_argument('--report', help="Write a JSON run report to this path ('-' for stdout).")
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID', help="Resume an interrupted run from the job journal (default: the latest unfinished run). Finished files and streams are not redone.")
+    parser.add_argument('--retry-failures', action='store_true', help="With --resume: also retry files that failed or timed out.")
+    parser.add_argument('--list-runs', action='store_true', help="List the runs recorded in the job journal and exit.")
+    parser.add_argument('--watch', action='store_true', help="Keep running and extract subtitles from new or changed movies as soon as they stop growing.")
+    parser.add_argument('--process-existing', action='store_true', help="With --watch: also process the movies already present when watching starts.")
+    parser.add_argument('--config-dir', help="Directory holding sub_extractor_settings.ini and the caches (default: the app directory).")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-v', '--verbose', action='store_true', help="Print the full mission log, including FFmpeg output.")
+    verbosity.add_argument('-q', '--quiet', action='store_true', help="Only print the final summary.")
+    args = parser.parse_args(argv)
+    if not args.paths and not (args.watch or args.resume or args.list_runs): parser.error("at least one movie file or folder is required")
+    if args.resume and args.paths: parser.error("--resume takes its files from the job journal; do not pass paths")
+    if args.retry_failures and not args.resume: parser.error("--retry-failures requires --resume")
+    return args
+
+
+def collect_movie_files(paths, engine):
+    movie_files = []
+    for path in paths:
+        if os.path.isdir(path): movie_files.extend(engine.find_movie_files(os.path.abspath(path)))
+        elif os.path.isfile(path) and path.lower().endswith(MOVIE_EXTENSIONS): movie_files.append(os.path.abspath(path))
+        else: print(f"Ignoring {path}: not a folder or a supported movie file.", file=sys.stderr)
+    return movie_files
+
+
+def apply_overrides(settings, args):
+    if args.output_format: settings['default_output_format'] = args.output_format
+    if args.languages: settings['selected_languages'] = args.languages
+    if args.ocr is not None: settings['ocr_enabled'] = args.ocr
+    if args.skip_if_exists is not None: settings['skip_if_exists'] = args.skip_if_exists
+    if args.workers: settings['extraction_workers'] = max(1, args.workers)
+    if args.ocr_workers: settings['ocr_workers'] = max(1, args.ocr_workers)
+
+
+def parse_language_filter(language_setting):
+    language_setting = (language_setting or 'all').strip().lower()
+    if not language_setting or language_setting == 'all': return None
+    return {lang.strip() for lang in language_setting.split(',') if lang.strip()}
+
+
+def watch_folders(engine, config, args):
+    roots = args.paths or [folder.strip() for folder in config.settings['watch_folders'].split(';') if folder.strip()]
+    roots = [root for root in roots if os.path.isdir(root) or print(f"Ignoring {root}: not a folder.", file=sys.stderr)]
+    if not roots:
+        print("Nothing to watch: pass folders or set watch_folders in the config.", file=sys.stderr)
+        return EXIT_SETUP_ERROR
+    settings = config.settings
+    watcher = FolderWatcher(roots, settings['watch_settle_seconds'], settings['watch_poll_interval'], settings['watch_full_rescan_interval'],
+                            settings['watch_use_inotify'], log_callback=engine.log_message)
+    output_format = settings['default_output_format']; language_filter = parse_language_filter(settings['selected_languages'])
+    stop_event = threading.Event(); watch_failed = threading.Event()
+
+    def log_exception(message):
+        engine.log_message(message, to_console=True); engine.log_message(traceback.format_exc(), to_console=True)
+
+    def watch_loop():
+        try:
+            watcher.start(process_existing=args.process_existing)
+            while not stop_event.is_set():
+                batch = watcher.next_batch(stop_event)
+                if not batch or stop_event.is_set(): continue
+                engine.log_message(f"[WATCH] {len(batch)} new transmission(s) landed: {', '.join(os.path.basename(path) for path in batch)}", to_console=True)
+                try:
+                    engine.log_message(engine.run(batch, output_format, language_filter), to_console=True)
+                except Exception as e:
+                    # One failed run does not end the watch; its files are handed over again when they change.
+                    log_exception(f"[CRITICAL SYSTEM ERROR] Run over {len(batch)} new transmission(s) failed, still watching: {e}")
+        except Exception as e:
+            log_exception(f"[CRITICAL SYSTEM ERROR] Folder watcher failed, watch ended: {e}"); watch_failed.set()
+    watch_thread = threading.Thread(target=watch_loop, daemon=True)
+    watch_thread.start()
+    try:
+        while watch_thread.is_alive():
+            try: watch_thread.join(0.5)
+            except KeyboardInterrupt:
+                print("--- WATCH ENDED BY USER ---", file=sys.stderr); stop_event.set(); engine.cancel()
+    finally:
+        watcher.close()
+    if watch_failed.is_set(): return EXIT_FAILURES
+    return EXIT_CANCELLED if stop_event.is_set() else EXIT_OK
+
+
+def list_runs(engine):
+    if not engine.job_journal:
+        print("The job journal is disabled (job_journal_enabled in the config).", file=sys.stderr); return EXIT_SETUP_ERROR
+    for run in engine.job_journal.list_runs():
+        started_at = datetime.datetime.fromtimestamp(run['started_at']).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"#{run['run_id']:<5} {started_at}  {run['state']:<9}  {run['output_format']:<4}  {run['processed']}/{run['total_files']} files")
+    return EXIT_OK
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config_dir = os.path.abspath(args.config_dir) if args.config_dir else os.path.dirname(os.path.abspath(__file__))
+    config = AppConfig(config_dir)
+    apply_overrides(config.settings, args)
+
+    def log_callback(message, to_console=True):
+        if args.quiet or not (to_console or args.verbose): return
+        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {message}", file=sys.stderr)
+
+    engine = ExtractionEngine(config, log_callback=log_callback)
+    try:
+        if args.list_runs: return list_runs(engine)
+        if not engine.check_ffmpeg():
+            print("FFmpeg/FFprobe not found (see 'sub_extractor_settings.ini').", file=sys.stderr)
+            return EXIT_SETUP_ERROR
+        if args.watch: return watch_folders(engine, config, args)
+        resume_run_id = None
+        if args.resume:
+            if not engine.job_journal:
+                print("Cannot resume: the job journal is disabled (job_journal_enabled in the config).", file=sys.stderr); return EXIT_SETUP_ERROR
+            if args.resume != 'latest' and not args.resume.isdigit():
+                print(f"Invalid run id: {args.resume}", file=sys.stderr); return EXIT_SETUP_ERROR
+            journaled_run = engine.resumable_run(None if args.resume == 'latest' else int(args.resume))
+            if journaled_run is None:
+                print("No run to resume in the job journal.", file=sys.stderr); return EXIT_SETUP_ERROR
+            # A resumed run keeps the files, format and languages it was started with.
+            resume_run_id = journaled_run['run_id']; movie_files = journaled_run['files']
+            output_format = journaled_run['output_format']; language_filter = journaled_run['language_filter']
+            config.settings.update(journaled_run['options'])
+        else:
+            movie_files = collect_movie_files(args.paths, engine)
+            output_format = config.settings['default_output_format']
+            language_filter = parse_language_filter(config.settings['selected_languages'])
+        if not movie_files:
+            print("No transmissions (movie files) found.", file=sys.stderr)
+            return EXIT_OK
+
+        started_at = datetime.datetime.now(); started = time.monotonic()
+        outcome = {}
+        # The engine runs on a worker thread so Ctrl+C on the main thread can cancel it cleanly.
+        run_thread = threading.Thread(target=lambda: outcome.update(summary=engine.run(movie_files, output_format, language_filter, resume_run_id, args.retry_failures)), daemon=True)
+        run_thread.start()
+        while run_thread.is_alive():
+            try: run_thread.join(0.5)
+            except KeyboardInterrupt:
+                print("--- MISSION ABORT SIGNAL RECEIVED ---", file=sys.stderr); engine.cancel()
+        cancelled = engine.cancel_requested.is_set()
+        summary_message = "Mission aborted by user." if cancelled else outcome.get("summary", "")
+        if args.verbose:
+            for line in engine.summary_lines(summary_message): print(line, file=sys.stderr)
+        print(summary_message, file=sys.stderr)
+
+        if args.report:
+            report = {"started_at": started_at.isoformat(timespec='seconds'), "elapsed_seconds": round(time.monotonic() - started, 3),
+                      "output_format": output_format, "languages": sorted(language_filter) if language_filter else "all",
+                      "cancelled": cancelled, "summary": summary_message, "total_files": len(movie_files), "run_id": engine.run_id}
+            report.update(engine.results())
+            report_json = json.dumps(report, indent=2)
+            if args.report == '-': print(report_json)
+            else:
+                with open(args.report, 'w', encoding='utf-8') as report_file: report_file.write(report_json + "\n")
+
+        if cancelled: return EXIT_CANCELLED
+        return EXIT_FAILURES if engine.failed_files() else EXIT_OK
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
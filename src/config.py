@@ -10,7 +10,37 @@ DEFAULT_FFPROBE_PATH = "ffprobe"
 DEFAULT_FFPROBE_TIMEOUT = 60
 DEFAULT_FFMPEG_EXTRACT_TIMEOUT = 600
 DEFAULT_FFMPEG_OCR_TIMEOUT = 1800 # 30 minutes for OCR
+DEFAULT_FFMPEG_TIMEOUT_PER_GB = 300 # added to ffmpeg_extract_timeout per GB of movie, so big remuxes over slow links are not cut off
+DEFAULT_FFMPEG_STALL_TIMEOUT = 120 # seconds without any FFmpeg progress before the run is killed
+DEFAULT_FFMPEG_STDERR_MAX_KB = 256 # FFmpeg stderr kept per run (head and tail)
+DEFAULT_OCR_TIMEOUT_PER_MB = 30 # added to ffmpeg_ocr_timeout per MB of staged image track
+DEFAULT_EXTRACTION_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_OCR_WORKERS = 1
+DEFAULT_OCR_STAGING_MAX_MB = 2048 # disk budget for image tracks extracted ahead of OCR
+DEFAULT_LANGUAGE_SCAN_WORKERS = 8
+DEFAULT_IO_WORKERS_PER_DEVICE = 2 # extraction workers reading one disk/mount at once; more make a spindle seek between files
+DEFAULT_PROCESS_NICE = 10 # ffmpeg/ffprobe/OCR children yield CPU to the media server's own transcodes
+DEFAULT_PROCESS_IO_CLASS = 'best-effort' # ionice class for the children: best-effort, idle, realtime or none
+DEFAULT_PROCESS_IO_LEVEL = 7 # 0 (highest) to 7 (lowest) within the best-effort/realtime class
+DEFAULT_PROBE_CACHE_MAX_ENTRIES = 100000
+LANGUAGE_SCAN_POLL_MS = 100
+DEFAULT_OCR_CACHE_MAX_MB = 256
+DEFAULT_JOB_JOURNAL_KEEP_RUNS = 20
+DEFAULT_WATCH_POLL_INTERVAL = 10 # seconds between directory checks in watch mode
+DEFAULT_WATCH_SETTLE_SECONDS = 30 # a file must stop growing for this long before it is queued
+DEFAULT_WATCH_FULL_RESCAN_INTERVAL = 900 # catches files rewritten in place without touching their directory
+DEFAULT_PROBE_SIZE = '5M' # ffmpeg's own default; deeper reads only when a stream comes back unresolved
+DEFAULT_PROBE_SIZE_MAX = '100M'
+DEFAULT_CONTAINER_PROBE_SIZES = {'ts': '50M', 'm2ts': '50M', 'mts': '50M', 'vob': '20M', 'mpg': '20M', 'mpeg': '20M'} # streams can start late in MPEG-PS/TS
+DEFAULT_OCR_BATCH_SIZE = 8 # image tracks per 'batch'/'worker' OCR backend call
 LOG_FOLDER_NAME = "logs"
+LOG_SPILL_FILENAME = "sub_extractor_live.log"
+SCAN_BATCH_MAX_ROWS = 500 # rows handed from the folder scan to the file list per UI tick, at most
+DEFAULT_SCAN_EXCLUDE_DIRS = '@eaDir,#recycle,$RECYCLE.BIN,System Volume Information,.Trash*' # NAS/OS housekeeping folders
+UI_TICK_MS = 100 # how often the GUI drains log/status/progress events from the workers
+DEFAULT_LOG_BUFFER_LINES = 5000
+DEFAULT_LOG_SPILL_MAX_MB = 10
+DEFAULT_LOG_SPILL_BACKUPS = 3
 CONFIG_FILENAME = "sub_extractor_settings.ini"
 
 # --- Theme Colors ---
@@ -51,11 +81,27 @@ class AppConfig:
             'ffmpeg_path': DEFAULT_FFMPEG_PATH, 'ffprobe_path': DEFAULT_FFPROBE_PATH,
             'ffprobe_timeout': DEFAULT_FFPROBE_TIMEOUT,
             'ffmpeg_extract_timeout': DEFAULT_FFMPEG_EXTRACT_TIMEOUT,
-            'ffmpeg_ocr_timeout': DEFAULT_FFMPEG_OCR_TIMEOUT,
+            'ffmpeg_ocr_timeout': DEFAULT_FFMPEG_OCR_TIMEOUT, 'ffmpeg_timeout_per_gb': DEFAULT_FFMPEG_TIMEOUT_PER_GB, 'ffmpeg_stall_timeout': DEFAULT_FFMPEG_STALL_TIMEOUT,
+            'ffmpeg_stderr_max_kb': DEFAULT_FFMPEG_STDERR_MAX_KB, 'ocr_timeout_per_mb': DEFAULT_OCR_TIMEOUT_PER_MB,
             'default_output_format': 'srt', 'selected_languages': 'all',
-            'skip_if_exists': False,
+            'skip_if_exists': False, 'single_pass_extraction': True, 'native_mkv_demuxer': True, 'native_mp4_demuxer': True,
+            'extraction_workers': DEFAULT_EXTRACTION_WORKERS, 'ocr_workers': DEFAULT_OCR_WORKERS, 'ocr_staging_max_mb': DEFAULT_OCR_STAGING_MAX_MB,
+            'language_scan_workers': DEFAULT_LANGUAGE_SCAN_WORKERS, 'io_workers_per_device': DEFAULT_IO_WORKERS_PER_DEVICE, 'device_io_workers': '',
+            'process_nice': DEFAULT_PROCESS_NICE, 'process_io_class': DEFAULT_PROCESS_IO_CLASS,
+            'process_io_level': DEFAULT_PROCESS_IO_LEVEL,
+            'probe_cache_enabled': True, 'probe_cache_max_entries': DEFAULT_PROBE_CACHE_MAX_ENTRIES,
+            'ocr_cache_enabled': True, 'ocr_cache_max_mb': DEFAULT_OCR_CACHE_MAX_MB,
+            'job_journal_enabled': True, 'job_journal_keep_runs': DEFAULT_JOB_JOURNAL_KEEP_RUNS,
+            'watch_folders': '', 'watch_poll_interval': DEFAULT_WATCH_POLL_INTERVAL, 'watch_settle_seconds': DEFAULT_WATCH_SETTLE_SECONDS,
+            'watch_full_rescan_interval': DEFAULT_WATCH_FULL_RESCAN_INTERVAL, 'watch_use_inotify': True,
             'ocr_enabled': False, 'ocr_command_template': '', 'ocr_temp_dir': '',
-            'ocr_default_lang': 'eng',
+            'ocr_default_lang': 'eng', 'ocr_engine': 'template', 'builtin_ocr_backend': 'tesseract', 'tesseract_path': 'tesseract',
+            'probe_size_default': DEFAULT_PROBE_SIZE, 'probe_size_max': DEFAULT_PROBE_SIZE_MAX, 'container_probe_sizes': dict(DEFAULT_CONTAINER_PROBE_SIZES),
+            'ocr_backend': 'template', 'ocr_batch_command_template': '', 'ocr_worker_command': '', 'ocr_batch_size': DEFAULT_OCR_BATCH_SIZE,
+            'scan_exclude_dirs': DEFAULT_SCAN_EXCLUDE_DIRS, 'scan_exclude_files': '',
+            'log_level': 'info', 'log_buffer_lines': DEFAULT_LOG_BUFFER_LINES, 'log_spill_enabled': True,
+            'log_spill_max_mb': DEFAULT_LOG_SPILL_MAX_MB, 'log_spill_backups': DEFAULT_LOG_SPILL_BACKUPS,
+            'metrics_report_enabled': True, 'metrics_prometheus_path': '', 'profile_python': False, 'trace_memory': False,
             'ocr_input_ext_map': {
                 'hdmv_pgs_subtitle': '.sup', 'dvd_subtitle': '.sub'
             }
@@ -84,18 +130,69 @@ class AppConfig:
         self.settings['ffprobe_timeout'] = get_cfg('Timeouts', 'ffprobe_timeout', self.settings['ffprobe_timeout'], type_func=int)
         self.settings['ffmpeg_extract_timeout'] = get_cfg('Timeouts', 'ffmpeg_extract_timeout', self.settings['ffmpeg_extract_timeout'], type_func=int)
         self.settings['ffmpeg_ocr_timeout'] = get_cfg('Timeouts', 'ffmpeg_ocr_timeout', self.settings['ffmpeg_ocr_timeout'], type_func=int)
+        self.settings['ffmpeg_timeout_per_gb'] = max(0, get_cfg('Timeouts', 'ffmpeg_timeout_per_gb', self.settings['ffmpeg_timeout_per_gb'], type_func=int))
+        self.settings['ffmpeg_stall_timeout'] = max(0, get_cfg('Timeouts', 'ffmpeg_stall_timeout', self.settings['ffmpeg_stall_timeout'], type_func=int))
+        self.settings['ffmpeg_stderr_max_kb'] = max(4, get_cfg('Timeouts', 'ffmpeg_stderr_max_kb', self.settings['ffmpeg_stderr_max_kb'], type_func=int))
+        self.settings['ocr_timeout_per_mb'] = max(0, get_cfg('Timeouts', 'ocr_timeout_per_mb', self.settings['ocr_timeout_per_mb'], type_func=int))
         self.settings['default_output_format'] = get_cfg('Extraction', 'default_output_format', self.settings['default_output_format'])
         self.settings['selected_languages'] = get_cfg('Extraction', 'selected_languages', self.settings['selected_languages'])
         self.settings['skip_if_exists'] = get_cfg('Extraction', 'skip_if_exists', self.settings['skip_if_exists'], type_func=bool)
+        self.settings['single_pass_extraction'] = get_cfg('Extraction', 'single_pass_extraction', self.settings['single_pass_extraction'], type_func=bool)
+        self.settings['native_mkv_demuxer'] = get_cfg('Extraction', 'native_mkv_demuxer', self.settings['native_mkv_demuxer'], type_func=bool)
+        self.settings['native_mp4_demuxer'] = get_cfg('Extraction', 'native_mp4_demuxer', self.settings['native_mp4_demuxer'], type_func=bool)
+        self.settings['extraction_workers'] = max(1, get_cfg('Concurrency', 'extraction_workers', self.settings['extraction_workers'], type_func=int))
+        self.settings['ocr_workers'] = max(1, get_cfg('Concurrency', 'ocr_workers', self.settings['ocr_workers'], type_func=int))
+        self.settings['ocr_staging_max_mb'] = max(1, get_cfg('Concurrency', 'ocr_staging_max_mb', self.settings['ocr_staging_max_mb'], type_func=int))
+        self.settings['language_scan_workers'] = max(1, get_cfg('Concurrency', 'language_scan_workers', self.settings['language_scan_workers'], type_func=int))
+        self.settings['io_workers_per_device'] = max(0, get_cfg('Concurrency', 'io_workers_per_device', self.settings['io_workers_per_device'], type_func=int))
+        self.settings['device_io_workers'] = get_cfg('Concurrency', 'device_io_workers', self.settings['device_io_workers']).strip()
+        self.settings['process_nice'] = min(19, max(0, get_cfg('Concurrency', 'process_nice', self.settings['process_nice'], type_func=int)))
+        self.settings['process_io_class'] = get_cfg('Concurrency', 'process_io_class', self.settings['process_io_class']).strip().lower()
+        self.settings['process_io_level'] = min(7, max(0, get_cfg('Concurrency', 'process_io_level', self.settings['process_io_level'], type_func=int)))
+        self.settings['probe_cache_enabled'] = get_cfg('Cache', 'probe_cache_enabled', self.settings['probe_cache_enabled'], type_func=bool)
+        self.settings['probe_cache_max_entries'] = max(1, get_cfg('Cache', 'probe_cache_max_entries', self.settings['probe_cache_max_entries'], type_func=int))
+        self.settings['ocr_cache_enabled'] = get_cfg('Cache', 'ocr_cache_enabled', self.settings['ocr_cache_enabled'], type_func=bool)
+        self.settings['ocr_cache_max_mb'] = max(1, get_cfg('Cache', 'ocr_cache_max_mb', self.settings['ocr_cache_max_mb'], type_func=int))
+        self.settings['job_journal_enabled'] = get_cfg('Journal', 'job_journal_enabled', self.settings['job_journal_enabled'], type_func=bool)
+        self.settings['job_journal_keep_runs'] = max(1, get_cfg('Journal', 'job_journal_keep_runs', self.settings['job_journal_keep_runs'], type_func=int))
+        self.settings['scan_exclude_dirs'] = get_cfg('Scan', 'scan_exclude_dirs', self.settings['scan_exclude_dirs'])
+        self.settings['scan_exclude_files'] = get_cfg('Scan', 'scan_exclude_files', self.settings['scan_exclude_files'])
+        self.settings['log_level'] = get_cfg('Logging', 'log_level', self.settings['log_level']).strip().lower()
+        self.settings['log_buffer_lines'] = max(100, get_cfg('Logging', 'log_buffer_lines', self.settings['log_buffer_lines'], type_func=int))
+        self.settings['log_spill_enabled'] = get_cfg('Logging', 'log_spill_enabled', self.settings['log_spill_enabled'], type_func=bool)
+        self.settings['log_spill_max_mb'] = max(1, get_cfg('Logging', 'log_spill_max_mb', self.settings['log_spill_max_mb'], type_func=int))
+        self.settings['log_spill_backups'] = max(0, get_cfg('Logging', 'log_spill_backups', self.settings['log_spill_backups'], type_func=int))
+        self.settings['metrics_report_enabled'] = get_cfg('Diagnostics', 'metrics_report_enabled', self.settings['metrics_report_enabled'], type_func=bool)
+        self.settings['metrics_prometheus_path'] = get_cfg('Diagnostics', 'metrics_prometheus_path', self.settings['metrics_prometheus_path']).strip()
+        self.settings['profile_python'] = get_cfg('Diagnostics', 'profile_python', self.settings['profile_python'], type_func=bool)
+        self.settings['trace_memory'] = get_cfg('Diagnostics', 'trace_memory', self.settings['trace_memory'], type_func=bool)
+        self.settings['watch_folders'] = get_cfg('Watch', 'watch_folders', self.settings['watch_folders'])
+        self.settings['watch_poll_interval'] = max(1, get_cfg('Watch', 'watch_poll_interval', self.settings['watch_poll_interval'], type_func=int))
+        self.settings['watch_settle_seconds'] = max(0, get_cfg('Watch', 'watch_settle_seconds', self.settings['watch_settle_seconds'], type_func=int))
+        self.settings['watch_full_rescan_interval'] = max(0, get_cfg('Watch', 'watch_full_rescan_interval', self.settings['watch_full_rescan_interval'], type_func=int))
+        self.settings['watch_use_inotify'] = get_cfg('Watch', 'watch_use_inotify', self.settings['watch_use_inotify'], type_func=bool)
+        self.settings['probe_size_default'] = get_cfg('Probing', 'probe_size_default', self.settings['probe_size_default'])
+        self.settings['probe_size_max'] = get_cfg('Probing', 'probe_size_max', self.settings['probe_size_max'])
+        # Per container type (file extension): probe_size_ts = 50M etc.
+        for option, value in self.config.items('Probing'):
+            if option.startswith('probe_size_') and option not in ('probe_size_default', 'probe_size_max'):
+                self.settings['container_probe_sizes'][option[len('probe_size_'):]] = value
         self.settings['ocr_enabled'] = get_cfg('OCR', 'ocr_enabled', self.settings['ocr_enabled'], type_func=bool)
         self.settings['ocr_command_template'] = get_cfg('OCR', 'ocr_command_template', self.settings['ocr_command_template'])
         self.settings['ocr_temp_dir'] = get_cfg('OCR', 'ocr_temp_dir', self.settings['ocr_temp_dir'])
         self.settings['ocr_default_lang'] = get_cfg('OCR', 'ocr_default_lang', self.settings['ocr_default_lang'])
+        self.settings['ocr_engine'] = get_cfg('OCR', 'ocr_engine', self.settings['ocr_engine']).strip().lower()
+        self.settings['builtin_ocr_backend'] = get_cfg('OCR', 'builtin_ocr_backend', self.settings['builtin_ocr_backend']).strip().lower()
+        self.settings['tesseract_path'] = get_cfg('OCR', 'tesseract_path', self.settings['tesseract_path'])
+        self.settings['ocr_backend'] = get_cfg('OCR', 'ocr_backend', self.settings['ocr_backend']).strip().lower()
+        self.settings['ocr_batch_command_template'] = get_cfg('OCR', 'ocr_batch_command_template', self.settings['ocr_batch_command_template'])
+        self.settings['ocr_worker_command'] = get_cfg('OCR', 'ocr_worker_command', self.settings['ocr_worker_command'])
+        self.settings['ocr_batch_size'] = max(1, get_cfg('OCR', 'ocr_batch_size', self.settings['ocr_batch_size'], type_func=int))
         self.settings['ocr_input_ext_map'] = {
             'hdmv_pgs_subtitle': get_cfg('OCR', 'ocr_input_ext_map_hdmv_pgs_subtitle', '.sup'),
             'dvd_subtitle': get_cfg('OCR', 'ocr_input_ext_map_dvd_subtitle', '.sub')
         }
-        for sec in ['General', 'Paths', 'Timeouts', 'Extraction', 'OCR']:
+        for sec in ['General', 'Paths', 'Timeouts', 'Extraction', 'Concurrency', 'Cache', 'Journal', 'Watch', 'Scan', 'Logging', 'Diagnostics', 'Probing', 'OCR']:
             if not self.config.has_section(sec): self.config.add_section(sec)
 
     def save_config(self, extract_all_languages_flag, user_selected_languages):
@@ -107,14 +204,63 @@ class AppConfig:
         self.config.set('Timeouts', 'ffprobe_timeout', str(self.settings['ffprobe_timeout']))
         self.config.set('Timeouts', 'ffmpeg_extract_timeout', str(self.settings['ffmpeg_extract_timeout']))
         self.config.set('Timeouts', 'ffmpeg_ocr_timeout', str(self.settings.get('ffmpeg_ocr_timeout', DEFAULT_FFMPEG_OCR_TIMEOUT)))
+        self.config.set('Timeouts', 'ffmpeg_timeout_per_gb', str(self.settings.get('ffmpeg_timeout_per_gb', DEFAULT_FFMPEG_TIMEOUT_PER_GB)))
+        self.config.set('Timeouts', 'ffmpeg_stall_timeout', str(self.settings.get('ffmpeg_stall_timeout', DEFAULT_FFMPEG_STALL_TIMEOUT)))
+        self.config.set('Timeouts', 'ffmpeg_stderr_max_kb', str(self.settings.get('ffmpeg_stderr_max_kb', DEFAULT_FFMPEG_STDERR_MAX_KB)))
+        self.config.set('Timeouts', 'ocr_timeout_per_mb', str(self.settings.get('ocr_timeout_per_mb', DEFAULT_OCR_TIMEOUT_PER_MB)))
         self.config.set('Extraction', 'default_output_format', self.settings['default_output_format'])
         lang_str_to_save = 'all' if extract_all_languages_flag or not user_selected_languages else ','.join(sorted(list(user_selected_languages)))
         self.config.set('Extraction', 'selected_languages', lang_str_to_save)
         self.config.set('Extraction', 'skip_if_exists', str(self.settings.get('skip_if_exists', False)))
+        self.config.set('Extraction', 'single_pass_extraction', str(self.settings.get('single_pass_extraction', True)))
+        self.config.set('Extraction', 'native_mkv_demuxer', str(self.settings.get('native_mkv_demuxer', True)))
+        self.config.set('Extraction', 'native_mp4_demuxer', str(self.settings.get('native_mp4_demuxer', True)))
+        self.config.set('Concurrency', 'extraction_workers', str(self.settings.get('extraction_workers', DEFAULT_EXTRACTION_WORKERS)))
+        self.config.set('Concurrency', 'ocr_workers', str(self.settings.get('ocr_workers', DEFAULT_OCR_WORKERS)))
+        self.config.set('Concurrency', 'ocr_staging_max_mb', str(self.settings.get('ocr_staging_max_mb', DEFAULT_OCR_STAGING_MAX_MB)))
+        self.config.set('Concurrency', 'language_scan_workers', str(self.settings.get('language_scan_workers', DEFAULT_LANGUAGE_SCAN_WORKERS)))
+        self.config.set('Concurrency', 'io_workers_per_device', str(self.settings.get('io_workers_per_device', DEFAULT_IO_WORKERS_PER_DEVICE)))
+        self.config.set('Concurrency', 'device_io_workers', self.settings.get('device_io_workers', ''))
+        self.config.set('Concurrency', 'process_nice', str(self.settings.get('process_nice', DEFAULT_PROCESS_NICE)))
+        self.config.set('Concurrency', 'process_io_class', self.settings.get('process_io_class', DEFAULT_PROCESS_IO_CLASS))
+        self.config.set('Concurrency', 'process_io_level', str(self.settings.get('process_io_level', DEFAULT_PROCESS_IO_LEVEL)))
+        self.config.set('Cache', 'probe_cache_enabled', str(self.settings.get('probe_cache_enabled', True)))
+        self.config.set('Cache', 'probe_cache_max_entries', str(self.settings.get('probe_cache_max_entries', DEFAULT_PROBE_CACHE_MAX_ENTRIES)))
+        self.config.set('Cache', 'ocr_cache_enabled', str(self.settings.get('ocr_cache_enabled', True)))
+        self.config.set('Cache', 'ocr_cache_max_mb', str(self.settings.get('ocr_cache_max_mb', DEFAULT_OCR_CACHE_MAX_MB)))
+        self.config.set('Journal', 'job_journal_enabled', str(self.settings.get('job_journal_enabled', True)))
+        self.config.set('Journal', 'job_journal_keep_runs', str(self.settings.get('job_journal_keep_runs', DEFAULT_JOB_JOURNAL_KEEP_RUNS)))
+        self.config.set('Watch', 'watch_folders', self.settings.get('watch_folders', ''))
+        self.config.set('Watch', 'watch_poll_interval', str(self.settings.get('watch_poll_interval', DEFAULT_WATCH_POLL_INTERVAL)))
+        self.config.set('Watch', 'watch_settle_seconds', str(self.settings.get('watch_settle_seconds', DEFAULT_WATCH_SETTLE_SECONDS)))
+        self.config.set('Watch', 'watch_full_rescan_interval', str(self.settings.get('watch_full_rescan_interval', DEFAULT_WATCH_FULL_RESCAN_INTERVAL)))
+        self.config.set('Watch', 'watch_use_inotify', str(self.settings.get('watch_use_inotify', True)))
+        self.config.set('Scan', 'scan_exclude_dirs', self.settings.get('scan_exclude_dirs', DEFAULT_SCAN_EXCLUDE_DIRS))
+        self.config.set('Scan', 'scan_exclude_files', self.settings.get('scan_exclude_files', ''))
+        self.config.set('Logging', 'log_level', self.settings.get('log_level', 'info'))
+        self.config.set('Logging', 'log_buffer_lines', str(self.settings.get('log_buffer_lines', DEFAULT_LOG_BUFFER_LINES)))
+        self.config.set('Logging', 'log_spill_enabled', str(self.settings.get('log_spill_enabled', True)))
+        self.config.set('Logging', 'log_spill_max_mb', str(self.settings.get('log_spill_max_mb', DEFAULT_LOG_SPILL_MAX_MB)))
+        self.config.set('Logging', 'log_spill_backups', str(self.settings.get('log_spill_backups', DEFAULT_LOG_SPILL_BACKUPS)))
+        self.config.set('Diagnostics', 'metrics_report_enabled', str(self.settings.get('metrics_report_enabled', True)))
+        self.config.set('Diagnostics', 'metrics_prometheus_path', self.settings.get('metrics_prometheus_path', ''))
+        self.config.set('Diagnostics', 'profile_python', str(self.settings.get('profile_python', False)))
+        self.config.set('Diagnostics', 'trace_memory', str(self.settings.get('trace_memory', False)))
+        self.config.set('Probing', 'probe_size_default', self.settings.get('probe_size_default', DEFAULT_PROBE_SIZE))
+        self.config.set('Probing', 'probe_size_max', self.settings.get('probe_size_max', DEFAULT_PROBE_SIZE_MAX))
+        for container, probe_size in sorted(self.settings.get('container_probe_sizes', DEFAULT_CONTAINER_PROBE_SIZES).items()):
+            self.config.set('Probing', f'probe_size_{container}', probe_size)
         self.config.set('OCR', 'ocr_enabled', str(self.settings.get('ocr_enabled', False)))
         self.config.set('OCR', 'ocr_command_template', self.settings.get('ocr_command_template', ''))
         self.config.set('OCR', 'ocr_temp_dir', self.settings.get('ocr_temp_dir', ''))
         self.config.set('OCR', 'ocr_default_lang', self.settings.get('ocr_default_lang', 'eng'))
+        self.config.set('OCR', 'ocr_engine', self.settings.get('ocr_engine', 'template'))
+        self.config.set('OCR', 'builtin_ocr_backend', self.settings.get('builtin_ocr_backend', 'tesseract'))
+        self.config.set('OCR', 'tesseract_path', self.settings.get('tesseract_path', 'tesseract'))
+        self.config.set('OCR', 'ocr_backend', self.settings.get('ocr_backend', 'template'))
+        self.config.set('OCR', 'ocr_batch_command_template', self.settings.get('ocr_batch_command_template', ''))
+        self.config.set('OCR', 'ocr_worker_command', self.settings.get('ocr_worker_command', ''))
+        self.config.set('OCR', 'ocr_batch_size', str(self.settings.get('ocr_batch_size', DEFAULT_OCR_BATCH_SIZE)))
         ocr_ext_map = self.settings.get('ocr_input_ext_map', {})
         self.config.set('OCR', 'ocr_input_ext_map_hdmv_pgs_subtitle', ocr_ext_map.get('hdmv_pgs_subtitle', '.sup'))
         self.config.set('OCR', 'ocr_input_ext_map_dvd_subtitle', ocr_ext_map.get('dvd_subtitle', '.sub'))
@@ -0,0 +1,928 @@
+import os
+import subprocess
+import threading
+import re
+import shutil
+import datetime
+import tempfile
+import random
+import time
+import sqlite3
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from config import OCR_PATIENCE_MESSAGES, IMAGE_BASED_CODECS, TEXT_BASED_OUTPUT_FORMATS, DEFAULT_PROBE_SIZE, DEFAULT_PROBE_SIZE_MAX, LOG_FOLDER_NAME
+from process_supervisor import SUPERVISOR
+from scheduler import ExtractionScheduler, StagingArea, device_key, mount_point, parse_device_limits
+from ffmpeg_progress import run_ffmpeg_with_progress, scaled_timeout, StallTimeout
+from instrumentation import RunMetrics, PythonProfiler, file_bytes, write_atomically, write_json_report, METRICS_JSON_FILENAME, PROFILE_FILENAME
+from probe_cache import ProbeCache, PROBE_CACHE_FILENAME
+from media_info import FileInfo, build_probe_command, parse_probe_output, parse_probe_size, format_probe_size, probe_input_args, next_probe_size, has_unresolved_streams
+from sub_index import SidecarIndex, parse_exclude_patterns
+from result_store import ResultStore
+from ocr_cache import OcrCache, OCR_CACHE_FILENAME, hash_file, ocr_cache_key
+from pgs_decoder import PgsStream, PGS_CODECS, decoder_available, decode_image, expand_events
+from image_ocr import IMAGE_OCR_BACKENDS
+from mkv_demuxer import MatroskaReader, MKV_CODEC_IDS, NATIVE_OUTPUT_FORMATS
+from mp4_demuxer import Mp4Reader, MP4_CODECS, NATIVE_OUTPUT_FORMATS as MP4_OUTPUT_FORMATS
+from subtitle_model import PARSERS, read_subtitle_file, write_subtitle_file, split_output_formats, formats_for_codec, events_to_srt
+from ocr_backends import OcrRequest, OCR_OK, OCR_TIMED_OUT, create_ocr_backend, ocr_command_configured
+from job_journal import JobJournal, JOB_JOURNAL_FILENAME, FILE_PROCESSED, RETRYABLE_FILE_OUTCOMES, JOB_DONE, JOB_FAILED, JOB_TIMED_OUT
+
+NATIVE_MKV_EXTENSIONS = {'.mkv', '.mks'}
+NATIVE_MP4_EXTENSIONS = {'.mp4', '.m4v', '.mov'}
+BUILTIN_OCR_BATCH_SIZE = 200 # unique images decoded and handed to the OCR backend at a time
+SUMMARY_HEADINGS = (('success', "\nTransmissions successfully decoded from:"), ('skipped', "\nTargets bypassed (existing subtitles):"),
+                    ('no_subs', "\nTransmissions with no subtitle signals:"), ('timed_out', "\nTransmissions lost in hyperspace (timed out):"),
+                    ('error', "\nTransmissions corrupted (errors):"))
+JOB_CANCELLED = 'cancelled' # never written to the journal; the job stays 'planned' and is redone on resume
+
+
+def print_log_message(message, to_console=True):
+    if to_console: print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {message}")
+
+
+class ExtractionEngine:
+    # Everything between "here is a list of movies" and "here are the subtitle files": probing, planning,
+    # ffmpeg/OCR runs and result bookkeeping. Has no Tk dependency; the GUI and the CLI both drive it through
+    # the log/status/progress callbacks, which may be called from worker threads.
+    def __init__(self, config, log_callback=None, status_callback=None, progress_callback=None, file_callback=None):
+        self.config = config
+        self.settings = config.settings
+        self.log_callback = log_callback or print_log_message
+        self.status_callback = status_callback
+        self.progress_callback = progress_callback
+        self.file_callback = file_callback # (movie path, row status or None) as each file finishes
+        self.language_filter = None
+        self.result_store = ResultStore()
+        self._run_totals = {"processed": 0, "subs_extracted": 0, "native_bytes_read": 0, "native_file_bytes": 0}
+        self.cancel_requested = threading.Event()
+        self.staging_area = None; self._staging_dirs = set()
+        self.ocr_backend = None
+        self.processes = SUPERVISOR; self.processes.configure(self.settings, self.log_message)
+        self.results_lock = threading.Lock()
+        self.sidecar_index = SidecarIndex()
+        self.probe_escalations = {}
+        self.metrics = RunMetrics(); self.python_profile = {}
+        self._progress_rows = set()
+        self._load_probe_sizes()
+        self.probe_cache = None
+        if self.settings.get('probe_cache_enabled'):
+            try:
+                self.probe_cache = ProbeCache(os.path.join(config.app_dir, PROBE_CACHE_FILENAME), self.settings['probe_cache_max_entries'])
+            except sqlite3.Error as e:
+                self.log_message(f"[WARN] Probe cache unavailable, every target will be re-scanned: {e}", to_console=True)
+        self.ocr_cache = None
+        if self.settings.get('ocr_cache_enabled'):
+            try:
+                self.ocr_cache = OcrCache(os.path.join(config.app_dir, OCR_CACHE_FILENAME), self.settings['ocr_cache_max_mb'] * 1024 * 1024)
+            except sqlite3.Error as e:
+                self.log_message(f"[WARN] OCR cache unavailable, every image signal will be OCRed: {e}", to_console=True)
+        self.job_journal = None; self.run_id = None; self.resuming = False; self.retry_failures = False
+        if self.settings.get('job_journal_enabled'):
+            try:
+                self.job_journal = JobJournal(os.path.join(config.app_dir, JOB_JOURNAL_FILENAME), self.settings['job_journal_keep_runs'])
+            except sqlite3.Error as e:
+                self.log_message(f"[WARN] Job journal unavailable, this run cannot be resumed: {e}", to_console=True)
+
+    def log_message(self, message, to_console=True):
+        self.log_callback(message, to_console)
+
+    def _report_status(self, message):
+        if self.status_callback: self.status_callback(message)
+
+    def _report_progress(self, value):
+        if self.progress_callback: self.progress_callback(value)
+
+    def language_filter_display(self):
+        if not self.language_filter: return "All Languages (Galactic Basic)"
+        return ', '.join(sorted(self.language_filter))
+
+    def _use_builtin_decoder(self, input_codec):
+        return self.settings.get('ocr_engine') == 'builtin' and input_codec in PGS_CODECS and decoder_available()
+
+    def ocr_available(self, input_codec=None):
+        if not self.settings.get('ocr_enabled'): return False
+        if ocr_command_configured(self.settings): return True
+        if input_codec is None: return self.settings.get('ocr_engine') == 'builtin' and decoder_available()
+        return self._use_builtin_decoder(input_codec)
+
+    def check_ffmpeg(self):
+        ffmpeg_to_check = self.settings['ffmpeg_path']; ffprobe_to_check = self.settings['ffprobe_path']
+        ffmpeg_found = shutil.which(ffmpeg_to_check) is not None; ffprobe_found = shutil.which(ffprobe_to_check) is not None
+        if not ffmpeg_found: self.log_message(f"Warning: Hyperdrive motivator (FFmpeg: {ffmpeg_to_check}) offline or invalid coordinates.", to_console=True)
+        if not ffprobe_found: self.log_message(f"Warning: Navigation computer (FFprobe: {ffprobe_to_check}) offline or invalid coordinates.", to_console=True)
+        return ffmpeg_found and ffprobe_found
+
+    def _load_probe_sizes(self):
+        def parsed(value, fallback):
+            try: return parse_probe_size(value)
+            except ValueError as e:
+                self.log_message(f"[WARN] {e}; using {fallback}.", to_console=True); return parse_probe_size(fallback)
+        self.probe_size_default = parsed(self.settings.get('probe_size_default', DEFAULT_PROBE_SIZE), DEFAULT_PROBE_SIZE)
+        self.probe_size_max = max(self.probe_size_default, parsed(self.settings.get('probe_size_max', DEFAULT_PROBE_SIZE_MAX), DEFAULT_PROBE_SIZE_MAX))
+        self.container_probe_sizes = {container.lower(): parsed(value, DEFAULT_PROBE_SIZE) for container, value in self.settings.get('container_probe_sizes', {}).items()}
+
+    def _initial_probe_size(self, movie_file_path):
+        container = os.path.splitext(movie_file_path)[1][1:].lower()
+        return min(self.container_probe_sizes.get(container, self.probe_size_default), self.probe_size_max)
+
+    def _record_probe_escalation(self, movie_file_path, probe_size, update_cache=True):
+        # Remembered in the probe cache too, so the next run starts at the size that worked.
+        with self.results_lock: self.probe_escalations[movie_file_path] = max(probe_size, self.probe_escalations.get(movie_file_path, 0))
+        if update_cache and self.probe_cache: self.probe_cache.update_field(movie_file_path, 'probe_size', probe_size)
+
+    def find_movie_files(self, folder_path, cancel_event=None):
+        # The walk also indexes the sidecar subtitles of every directory it lists, so has_existing_subs
+        # afterwards is a set lookup instead of one directory listing per movie.
+        return self.sidecar_index.walk_movies(folder_path, parse_exclude_patterns(self.settings['scan_exclude_dirs']),
+                                              parse_exclude_patterns(self.settings['scan_exclude_files']), cancel_event)
+
+    def discover_languages(self, file_paths, cancel_event, result_queue):
+        # Background language scan: probes in parallel (bounded by language_scan_workers, mostly
+        # served from the probe cache) and posts one set of 3-letter codes per file, then a None sentinel.
+        def probe_languages(file_path):
+            if cancel_event.is_set(): return
+            file_langs = set()
+            try:
+                file_info = self.probe_file(file_path, quiet=True)
+                if file_info: file_langs = file_info.languages
+            except subprocess.TimeoutExpired: self.log_message(f"Comlink timeout probing languages in {os.path.basename(file_path)}", True)
+            except Exception as e: self.log_message(f"Astromech droid malfunction probing languages in {os.path.basename(file_path)}: {e}", True)
+            result_queue.put(file_langs)
+        try:
+            with ThreadPoolExecutor(max_workers=self.settings['language_scan_workers'], thread_name_prefix="lang-scan") as pool:
+                for _ in pool.map(probe_languages, file_paths): pass
+            if self.probe_cache: self.probe_cache.flush()
+        finally:
+            result_queue.put(None)
+
+    def has_existing_subs(self, movie_file_path):
+        try:
+            return self.sidecar_index.has_subs(movie_file_path)
+        except OSError:
+            self.log_message(f"[WARN] Directory not found while checking for existing subs: {os.path.dirname(movie_file_path)}", to_console=True)
+            return False
+
+    def probe_file(self, movie_file_path, quiet=False):
+        # FileInfo with every subtitle stream of a movie (one JSON ffprobe per file), served from the
+        # persistent probe cache when the file's size and mtime are unchanged. None if ffprobe fails.
+        movie_filename = os.path.basename(movie_file_path)
+        try: movie_stat = os.stat(movie_file_path)
+        except OSError: movie_stat = None
+        if self.probe_cache and movie_stat:
+            cached_info = self.probe_cache.get(movie_file_path, movie_stat)
+            if cached_info is not None:
+                file_info = FileInfo.from_dict(movie_file_path, cached_info)
+                if file_info.probe_size and file_info.probe_size > self._initial_probe_size(movie_file_path): self._record_probe_escalation(movie_file_path, file_info.probe_size, update_cache=False)
+                if not quiet: self.log_message(f"[PROBE CACHE] Using cached scan of {movie_filename}: {len(file_info.streams)} subtitle signal(s).")
+                return file_info
+
+        initial_probe_size = probe_size = self._initial_probe_size(movie_file_path)
+        with self.metrics.stage('probe'):
+            while True:
+                cmd_probe = build_probe_command(self.settings['ffprobe_path'], movie_file_path, probe_size)
+                if not quiet: self.log_message(f"[FFPROBE CMD] {' '.join(cmd_probe)}")
+                probe_process = self.processes.popen(cmd_probe, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+                try:
+                    stdout, stderr = probe_process.communicate(timeout=self.settings['ffprobe_timeout'])
+                except subprocess.TimeoutExpired:
+                    probe_process.kill(); probe_process.communicate()
+                    raise
+                if not quiet:
+                    if stderr and stderr.strip(): self.log_message(f"[FFPROBE STDERR for {movie_filename}]:\n{stderr.strip()}")
+                    self.log_message(f"[FFPROBE RETURN CODE for {movie_filename}]: {probe_process.returncode}")
+                file_info = None
+                if probe_process.returncode == 0:
+                    try:
+                        file_info = parse_probe_output(movie_file_path, stdout)
+                    except ValueError as e:
+                        self.log_message(f"[ERROR] Garbled FFprobe transmission for {movie_filename}: {e}", to_console=True)
+                        return None
+                    if not (has_unresolved_streams(stderr) or file_info.unresolved): break
+                elif not has_unresolved_streams(stderr):
+                    self.log_message(f"[ERROR] FFprobe malfunctioned for {movie_filename}. RC: {probe_process.returncode}. Aborting target.", to_console=True)
+                    return None
+                # Some signal was not resolved within probe_size: read deeper, up to probe_size_max.
+                deeper_probe_size = next_probe_size(probe_size, self.probe_size_max)
+                if deeper_probe_size is None:
+                    self.log_message(f"[WARN] Signal parameters of {movie_filename} still unresolved at the {format_probe_size(probe_size)} probe size limit.", to_console=True)
+                    if file_info is None:
+                        self.log_message(f"[ERROR] FFprobe malfunctioned for {movie_filename}. RC: {probe_process.returncode}. Aborting target.", to_console=True)
+                        return None
+                    break
+                self.log_message(f"[PROBE] Signal parameters of {movie_filename} unresolved at {format_probe_size(probe_size)}, scanning deeper ({format_probe_size(deeper_probe_size)}).", to_console=not quiet)
+                probe_size = deeper_probe_size
+        file_info.probe_size = probe_size
+        if probe_size > initial_probe_size: self._record_probe_escalation(movie_file_path, probe_size, update_cache=False)
+        if not quiet:
+            if not file_info.streams: self.log_message(f"[FFPROBE for {movie_filename}]: <no subtitle signals detected>")
+            for stream in file_info.streams:
+                self.log_message(f"[DEBUG]   -> Detected signal: Idx='{stream.index}',Lang='{stream.lang}',Codec='{stream.codec}',Flags='{stream.flags_display()}',Packets='{stream.packets if stream.packets is not None else '?'}',Title='{stream.title}'")
+        if self.probe_cache and movie_stat: self.probe_cache.put(movie_file_path, file_info.to_dict(), movie_stat)
+        return file_info
+
+    def _ocr_cache_lookup(self, job, staged_path, cache_identity, ocr_lang):
+        # (cache key, restored?) for one staged track; restores the cached SRT straight to the job's output.
+        if not self.ocr_cache: return None, False
+        try:
+            cache_key = ocr_cache_key(hash_file(staged_path), cache_identity, ocr_lang)
+            cached_srt = self.ocr_cache.get(cache_key)
+            if cached_srt is None: return cache_key, False
+            with open(job["output_path"], 'wb') as target_file: target_file.write(cached_srt)
+            self.log_message(f"[OCR CACHE] This signal was translated before. Restored {os.path.basename(job['output_path'])} from the Jedi Archives, OCR Droid not needed.", to_console=True)
+            return cache_key, True
+        except (OSError, sqlite3.Error) as e:
+            self.log_message(f"[WARN] OCR cache lookup failed for {os.path.basename(staged_path)}, running OCR: {e}", to_console=True)
+            return None, False
+
+    def _accept_ocr_output(self, job, ocr_output_path, cache_key):
+        if not (os.path.exists(ocr_output_path) and os.path.getsize(ocr_output_path) > 0):
+            self.log_message(f"[OCR FAILED] Droid translation unit (RC 0) but output datapad (SRT) is empty/missing: {ocr_output_path}", to_console=True)
+            return False
+        if cache_key:
+            try:
+                with open(ocr_output_path, 'rb') as ocr_output_file: self.ocr_cache.put(cache_key, ocr_output_file.read())
+            except (OSError, sqlite3.Error) as e: self.log_message(f"[WARN] Could not store OCR result in the cache: {e}", to_console=True)
+        shutil.move(ocr_output_path, job["output_path"])
+        self.log_message(f"[OCR SUCCESS] Translation complete: {os.path.basename(job['output_path'])}", to_console=True)
+        return True
+
+    def _run_ocr_on_staged_tracks(self, movie_file_path, batch):
+        # OCR for a batch of staged (job, staged_path) tracks of one movie. Cache hits and built-in PGS tracks are
+        # handled here one by one, everything else goes to the OCR backend in a single call. Returns one result
+        # per track: True/False, or None when the run was cancelled before the track was OCRed.
+        filename_short = os.path.basename(movie_file_path)
+        self._report_status(random.choice(OCR_PATIENCE_MESSAGES).format(filename=filename_short))
+        results = [None] * len(batch); backend_tracks = []
+        for position, (job, staged_path) in enumerate(batch):
+            if self.cancel_requested.is_set(): return results
+            self.log_message(f"[OCR] Attempting OCR for stream {job['index']} ({job['codec']}, lang {job['lang']}) from {filename_short}", to_console=True)
+            ocr_lang = job["lang"] if len(job["lang"]) == 3 else self.settings.get('ocr_default_lang', 'eng')
+            use_builtin_decoder = self._use_builtin_decoder(job["codec"])
+            cache_identity = f"builtin-pgs:{self.settings['builtin_ocr_backend']}" if use_builtin_decoder else self.ocr_backend.identity()
+            cache_key, restored = self._ocr_cache_lookup(job, staged_path, cache_identity, ocr_lang)
+            if restored:
+                results[position] = True; continue
+            ocr_output_path = f"{os.path.splitext(staged_path)[0]}_ocr.srt"
+            if not use_builtin_decoder:
+                backend_tracks.append((position, OcrRequest(staged_path, ocr_output_path, ocr_lang), cache_key)); continue
+            try:
+                with self.metrics.stage('ocr') as sample:
+                    self._ocr_with_builtin_decoder(staged_path, ocr_lang, ocr_output_path)
+                    sample.bytes_read += file_bytes(staged_path); sample.bytes_written = file_bytes(ocr_output_path)
+                if self.cancel_requested.is_set(): return results
+                results[position] = self._accept_ocr_output(job, ocr_output_path, cache_key)
+            except subprocess.TimeoutExpired:
+                self.log_message(f"[TIMEOUT] Comlink lost translating image signal {job['index']} from {filename_short}.", to_console=True)
+                job["outcome"] = JOB_TIMED_OUT; results[position] = False
+            except Exception as e:
+                self.log_message(f"[OCR CRITICAL ERROR] Catastrophic droid failure during OCR: {e}", to_console=True); import traceback; self.log_message(traceback.format_exc(), to_console=True)
+                results[position] = False
+        if backend_tracks and not self.cancel_requested.is_set():
+            with self.metrics.stage('ocr') as sample:
+                statuses = self.ocr_backend.recognize_tracks([request for _, request, _ in backend_tracks])
+                sample.bytes_read += file_bytes(*(request.input_path for _, request, _ in backend_tracks))
+                sample.bytes_written = file_bytes(*(request.output_srt_path for _, request, _ in backend_tracks))
+            for (position, request, cache_key), status in zip(backend_tracks, statuses):
+                job = batch[position][0]
+                if status == OCR_TIMED_OUT: job["outcome"] = JOB_TIMED_OUT
+                results[position] = status == OCR_OK and self._accept_ocr_output(job, request.output_srt_path, cache_key)
+        self._report_status(f"OCR Droid finished with {', '.join(job['safe_lang'] for job, _ in batch)} for {filename_short}. Stand by...")
+        return results
+
+    def _ocr_with_builtin_decoder(self, image_sub_path, lang_code, output_srt_path):
+        # Decode the PGS track in-process, OCR each distinct image once and re-expand the text to every event.
+        backend_class = IMAGE_OCR_BACKENDS.get(self.settings['builtin_ocr_backend'])
+        if backend_class is None: raise ValueError(f"Unknown builtin_ocr_backend '{self.settings['builtin_ocr_backend']}' (available: {', '.join(sorted(IMAGE_OCR_BACKENDS))})")
+        backend = backend_class(self.settings)
+        pgs_stream = PgsStream(image_sub_path)
+        unique_sets = pgs_stream.unique_display_sets(); total_sets = len(pgs_stream.display_sets)
+        self.log_message(f"[OCR] Built-in PGS decoder: {total_sets} display event(s), {len(unique_sets)} unique image(s) to OCR with {backend.name}"
+                         f" ({(total_sets - len(unique_sets)) * 100 // total_sets if total_sets else 0}% duplicates skipped).", to_console=True)
+        texts_by_key = {}
+        for batch_start in range(0, len(unique_sets), BUILTIN_OCR_BATCH_SIZE):
+            if self.cancel_requested.is_set(): return
+            batch = unique_sets[batch_start:batch_start + BUILTIN_OCR_BATCH_SIZE]
+            texts = backend.recognize([decode_image(display_set) for display_set in batch], lang_code)
+            texts_by_key.update((display_set.key, text) for display_set, text in zip(batch, texts))
+        with open(output_srt_path, 'w', encoding='utf-8') as srt_file: srt_file.write(events_to_srt(expand_events(pgs_stream.display_sets, texts_by_key)))
+
+    def _report_file_progress(self, movie_file_path, fraction):
+        if not self.file_callback: return
+        with self.results_lock: self._progress_rows.add(movie_file_path)
+        self.file_callback(movie_file_path, f"Extracting {int(fraction * 100)}%")
+
+    def _run_ffmpeg_extract(self, movie_file_path, job, output_args, label):
+        # Starts at the probe size that resolved the file's streams and reads deeper only if ffmpeg still
+        # cannot resolve one of them. Progress is streamed: a run that stops advancing for ffmpeg_stall_timeout
+        # is killed, and the hard limit grows with the file size.
+        probe_size = job["probe_size"]
+        max_seconds = scaled_timeout(self.settings['ffmpeg_extract_timeout'], self.settings['ffmpeg_timeout_per_gb'], job.get("file_size"))
+        while True:
+            cmd_extract = [self.settings['ffmpeg_path'], '-y'] + probe_input_args(movie_file_path, probe_size) + output_args
+            self.log_message(f"[FFMPEG CMD] {' '.join(cmd_extract)}")
+            try:
+                returncode, ext_stderr = run_ffmpeg_with_progress(cmd_extract, job.get("file_duration"), job.get("file_size"), self.settings['ffmpeg_stall_timeout'], max_seconds,
+                                                                  self.settings['ffmpeg_stderr_max_kb'] * 1024, lambda fraction: self._report_file_progress(movie_file_path, fraction))
+            except StallTimeout as e:
+                self.log_message(f"[TIMEOUT] {e} on {label}; FFmpeg is stuck, aborting it.", to_console=True)
+                raise
+            except subprocess.TimeoutExpired:
+                self.log_message(f"[TIMEOUT] FFmpeg still running on {label} after {max_seconds:.0f}s (limit for this file size), aborting it.", to_console=True)
+                raise
+            if ext_stderr and ext_stderr.strip():
+                self.log_message(f"[FFMPEG STDERR for {label}]:\n{ext_stderr.strip()}")
+                if "file ended prematurely" in ext_stderr.lower():
+                    self.log_message("[INFO] Note: The 'file ended prematurely' message from FFmpeg is often non-critical for subtitle streams and may not indicate a failure.", to_console=False)
+            self.log_message(f"[FFMPEG RETURN CODE for {label}]: {returncode}")
+            deeper_probe_size = next_probe_size(probe_size, self.probe_size_max) if returncode != 0 and has_unresolved_streams(ext_stderr) else None
+            if deeper_probe_size is None: return returncode
+            self.log_message(f"[PROBE] FFmpeg could not resolve a signal of {os.path.basename(movie_file_path)} at {format_probe_size(probe_size)}, retrying with {format_probe_size(deeper_probe_size)}.", to_console=True)
+            self._record_probe_escalation(movie_file_path, deeper_probe_size); probe_size = deeper_probe_size
+
+    def _extract_single_stream(self, movie_file_path, base_name_no_ext, job):
+        movie_filename = os.path.basename(movie_file_path); output_path = job["output_path"]
+        job["started_at"] = time.time()
+        self._report_status(f"Extracting signal {job['safe_lang']} (idx {job['index']}) as {job['codec_arg'].upper()} from {movie_filename}...")
+        with self.metrics.stage('extract') as sample:
+            returncode = self._run_ffmpeg_extract(movie_file_path, job, ['-map', f"0:{job['index']}", '-c:s', job['codec_arg'], output_path], os.path.basename(output_path))
+            sample.bytes_written = file_bytes(output_path)
+        if returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 0: return True
+        if returncode == 0: self.log_message(f"[WARNING] FFmpeg reported success, but output datapad '{output_path}' is empty or missing.", to_console=True)
+        return False
+
+    def _make_staging_dir(self, movie_file_path, base_name_no_ext):
+        temp_dir_base = self.settings.get('ocr_temp_dir', '') or os.path.dirname(movie_file_path)
+        staging_dir = tempfile.mkdtemp(prefix=f"ocr_{base_name_no_ext}_stage_", dir=temp_dir_base if os.path.isdir(temp_dir_base) else None)
+        with self.results_lock: self._staging_dirs.add(staging_dir)
+        return staging_dir
+
+    def _staged_image_path(self, staging_dir, base_name_no_ext, job):
+        image_sub_ext = self.settings['ocr_input_ext_map'].get(job["codec"], f".{job['codec']}")
+        return os.path.join(staging_dir, f"{base_name_no_ext}_s{job['index']}_temp{image_sub_ext}")
+
+    def _stage_image_stream(self, movie_file_path, base_name_no_ext, job, staging_dir):
+        # Producer side of the OCR pipeline: copies one image track into the staging area on the I/O lane.
+        staged_path = self._staged_image_path(staging_dir, base_name_no_ext, job)
+        job["started_at"] = time.time()
+        with self.metrics.stage('stage_image') as sample:
+            returncode = self._run_ffmpeg_extract(movie_file_path, job, ['-map', f"0:{job['index']}", '-c:s', 'copy', staged_path], os.path.basename(staged_path))
+            sample.bytes_written = file_bytes(staged_path)
+        if returncode == 0 and os.path.exists(staged_path) and os.path.getsize(staged_path) > 0: return staged_path
+        self.log_message(f"[OCR ERROR] Failed to extract temporary image subtitle or file is empty: {os.path.basename(staged_path)}. FFmpeg RC: {returncode}.", to_console=True)
+        return None
+
+    def _extract_streams_single_pass(self, movie_file_path, base_name_no_ext, planned_jobs, staging_dir):
+        # One demux of the movie feeds every selected stream: text streams go straight to their
+        # final path, image streams bound for OCR go to the staging dir and are handed back as OCR tasks.
+        movie_filename = os.path.basename(movie_file_path)
+        output_args, pass_outputs = [], []
+        for job in planned_jobs:
+            if job["run_ocr"]:
+                pass_output = self._staged_image_path(staging_dir, base_name_no_ext, job)
+                output_args += ['-map', f"0:{job['index']}", '-c:s', 'copy', pass_output]
+            else:
+                pass_output = job["output_path"]
+                output_args += ['-map', f"0:{job['index']}", '-c:s', job['codec_arg'], pass_output]
+            pass_outputs.append(pass_output)
+
+        self._report_status(f"Extracting {len(planned_jobs)} signal(s) in a single pass from {movie_filename}...")
+        pass_started_at = time.time()
+        for job in planned_jobs: job["started_at"] = pass_started_at
+        with self.metrics.stage('extract') as sample:
+            returncode = self._run_ffmpeg_extract(movie_file_path, planned_jobs[0], output_args, f"{movie_filename} (single pass, {len(planned_jobs)} streams)")
+            sample.bytes_written = file_bytes(*pass_outputs)
+        results, ocr_tasks = [], []
+        for job, pass_output in zip(planned_jobs, pass_outputs):
+            if self.cancel_requested.is_set(): break
+            output_ok = os.path.exists(pass_output) and os.path.getsize(pass_output) > 0
+            if returncode != 0 or not output_ok:
+                # A single bad stream aborts the whole muxer run, so each stream that did not
+                # come out cleanly gets its own retry and its own status.
+                self.log_message(f"[WARN] Single-pass output for stream {job['index']} unusable (RC {returncode}). Retrying this stream on its own.", to_console=True)
+                if job["run_ocr"]:
+                    staged_path = self._stage_image_stream(movie_file_path, base_name_no_ext, job, staging_dir)
+                    if staged_path: ocr_tasks.append((job, staged_path))
+                    else: results.append((job, False))
+                else: results.append((job, self._extract_single_stream(movie_file_path, base_name_no_ext, job)))
+            elif job["run_ocr"]:
+                ocr_tasks.append((job, pass_output))
+            else:
+                results.append((job, True))
+        return results, ocr_tasks
+
+    def _native_mkv_target(self, job):
+        # Format the native demuxer would write for this job (it never converts), or None for jobs ffmpeg must do.
+        native_format = NATIVE_OUTPUT_FORMATS.get(MKV_CODEC_IDS.get(job["codec"]))
+        if native_format is None: return None
+        if job["run_ocr"]: return native_format if native_format == 'sup' else None
+        return native_format if job["codec_arg"] in ('copy', native_format) else None
+
+    def _extract_streams_native(self, movie_file_path, base_name_no_ext, planned_jobs, staging_dir, file_info):
+        # Matroska subtitle tracks read by our own demuxer, which skips the audio/video payloads instead of
+        # streaming the whole file through ffmpeg. Returns (results, ocr_tasks, jobs left for ffmpeg).
+        native_jobs = [job for job in planned_jobs if self._native_mkv_target(job)]
+        if not native_jobs: return [], [], planned_jobs
+        movie_filename = os.path.basename(movie_file_path)
+        stream_positions = {stream.index: position for position, stream in enumerate(file_info.streams)}
+        reader = None
+        try:
+            reader = MatroskaReader(movie_file_path)
+            # ffprobe lists subtitle tracks in TrackEntry order, so the n-th subtitle stream is the n-th subtitle track.
+            targets, job_tracks = {}, {}
+            for job in native_jobs:
+                position = stream_positions.get(job["index"])
+                if position is None or position >= len(reader.subtitle_tracks): continue
+                track = reader.subtitle_tracks[position]
+                if track.codec_id != MKV_CODEC_IDS[job["codec"]]: continue
+                output_path = self._staged_image_path(staging_dir, base_name_no_ext, job) if job["run_ocr"] else job["output_path"]
+                targets[track.number] = (output_path, job["packets"]); job_tracks[job["index"]] = (track.number, output_path)
+            if not targets: return [], [], planned_jobs
+            self._report_status(f"Reading {len(targets)} signal(s) from {movie_filename} with the native Matroska demuxer...")
+            started_at = time.time()
+            for job in native_jobs: job["started_at"] = started_at
+            with self.metrics.stage('native_demux') as sample:
+                written = reader.extract(targets)
+                sample.bytes_read = reader.bytes_read; sample.bytes_written = file_bytes(*(output_path for output_path, _ in targets.values()))
+        except (OSError, ValueError) as e:
+            self.log_message(f"[MKV] Native demuxer could not read {movie_filename} ({e}), handing it to FFmpeg.", to_console=True)
+            return [], [], planned_jobs
+        finally:
+            if reader: reader.close()
+        with self.results_lock:
+            self._run_totals["native_bytes_read"] += reader.bytes_read; self._run_totals["native_file_bytes"] += reader.file_size
+        self.log_message(f"[MKV] Native demux of {movie_filename} ({reader.mode}): read {reader.bytes_read / (1024 * 1024):.2f} MB of {reader.file_size / (1024 * 1024):.1f} MB.")
+        results, ocr_tasks, remaining_jobs = [], [], []
+        for job in planned_jobs:
+            track_number, output_path = job_tracks.get(job["index"], (None, None))
+            if not written.get(track_number):
+                if track_number is not None: self.log_message(f"[MKV] No blocks found natively for signal {job['index']} of {movie_filename}, retrying with FFmpeg.")
+                remaining_jobs.append(job)
+            elif job["run_ocr"]: ocr_tasks.append((job, output_path))
+            else: results.append((job, True))
+        return results, ocr_tasks, remaining_jobs
+
+    def _extract_streams_mp4(self, movie_file_path, planned_jobs):
+        # mov_text tracks decoded straight from the MP4/MOV sample tables: only moov and the subtitle samples'
+        # byte ranges are read. Returns (results, jobs left for ffmpeg).
+        native_jobs = [job for job in planned_jobs if job["codec"] in MP4_CODECS and not job["run_ocr"] and job["codec_arg"] in MP4_OUTPUT_FORMATS]
+        if not native_jobs: return [], planned_jobs
+        movie_filename = os.path.basename(movie_file_path)
+        reader = None
+        try:
+            reader = Mp4Reader(movie_file_path)
+            targets = {job["index"]: (job["output_path"], job["codec_arg"]) for job in native_jobs}
+            self._report_status(f"Reading {len(targets)} signal(s) from {movie_filename} with the native MP4 demuxer...")
+            started_at = time.time()
+            for job in native_jobs: job["started_at"] = started_at
+            with self.metrics.stage('native_demux') as sample:
+                written = reader.extract(targets)
+                sample.bytes_read = reader.bytes_read; sample.bytes_written = file_bytes(*(output_path for output_path, _ in targets.values()))
+        except (OSError, ValueError) as e:
+            self.log_message(f"[MP4] Native demuxer could not read {movie_filename} ({e}), handing it to FFmpeg.", to_console=True)
+            return [], planned_jobs
+        finally:
+            if reader: reader.close()
+        with self.results_lock:
+            self._run_totals["native_bytes_read"] += reader.bytes_read; self._run_totals["native_file_bytes"] += reader.file_size
+        self.log_message(f"[MP4] Native demux of {movie_filename}: read {reader.bytes_read / 1024:.1f} KB of {reader.file_size / (1024 * 1024):.1f} MB in {reader.reads} read(s).")
+        results, remaining_jobs = [], []
+        for job in planned_jobs:
+            if written.get(job["index"]): results.append((job, True))
+            else:
+                if job["index"] in written: self.log_message(f"[MP4] No text samples found natively for signal {job['index']} of {movie_filename}, retrying with FFmpeg.")
+                remaining_jobs.append(job)
+        return results, remaining_jobs
+
+    def _ocr_staged_batch(self, movie_file_path, batch, file_state):
+        # Consumer side of the OCR pipeline: OCR a batch of staged tracks, then free their staging space right away.
+        try:
+            return self._run_ocr_on_staged_tracks(movie_file_path, batch)
+        finally:
+            for _, staged_path in batch:
+                staged_bytes = file_state["staged_bytes"].pop(staged_path, 0)
+                try: os.remove(staged_path)
+                except OSError: pass
+                if self.staging_area: self.staging_area.release(staged_bytes)
+
+    def _ocr_batches(self, ocr_tasks):
+        # Built-in PGS tracks are OCRed in-process one by one; the rest go to the backend ocr_batch_size at a time
+        # (one per lane task for the template runner, which launches one tool per track anyway).
+        batch_size = self.settings['ocr_batch_size'] if self.ocr_backend and self.ocr_backend.name != 'template' else 1
+        builtin_tasks = [task for task in ocr_tasks if self._use_builtin_decoder(task[0]["codec"])]
+        backend_tasks = [task for task in ocr_tasks if not self._use_builtin_decoder(task[0]["codec"])]
+        return [[task] for task in builtin_tasks] + [backend_tasks[start:start + batch_size] for start in range(0, len(backend_tasks), batch_size)]
+
+    def _record_file_result(self, outcome, movie_file_path):
+        self.result_store.add_outcome(movie_file_path, outcome)
+        if self.job_journal: self.job_journal.record_file_outcome(self.run_id, movie_file_path, outcome)
+
+    def _mark_file_error(self, file_state):
+        # Work killed by a cancel is not an error; the file is revisited on resume.
+        if not file_state["had_error"] and not self.cancel_requested.is_set():
+            self._record_file_result('error', file_state["movie_path"]); file_state["had_error"] = True
+
+    def _mark_file_timed_out(self, file_state):
+        if not file_state["timed_out"]:
+            self._record_file_result('timed_out', file_state["movie_path"]); file_state["timed_out"] = True
+
+    def _file_finished(self, movie_file_path, total_files, journal_outcome=True):
+        # A file finished while cancelling may have dropped work, so it is not marked processed and a resume revisits it.
+        if journal_outcome and self.job_journal and not self.cancel_requested.is_set():
+            self.job_journal.record_file_outcome(self.run_id, movie_file_path, FILE_PROCESSED)
+        with self.results_lock:
+            self._run_totals["processed"] += 1; processed = self._run_totals["processed"]
+        file_result = self.result_store.file_finished(movie_file_path, time.time())
+        if self.file_callback:
+            # A row that showed extraction progress goes back to its pre-run state if nothing else applies.
+            with self.results_lock:
+                showed_progress = movie_file_path in self._progress_rows; self._progress_rows.discard(movie_file_path)
+            self.file_callback(movie_file_path, file_result.row_status() or ("Ready to Extract" if showed_progress else None))
+        self._report_progress((processed / total_files) * 100 if total_files > 0 else 0)
+
+    def _tally_stream_results(self, file_state, stream_results):
+        movie_filename = file_state["movie_filename"]
+        for job, extraction_successful_this_stream in stream_results:
+            job_status = job.get("outcome") or (JOB_DONE if extraction_successful_this_stream else JOB_CANCELLED if self.cancel_requested.is_set() else JOB_FAILED)
+            if extraction_successful_this_stream and not job.get("from_journal") and job.get("extra_formats") and not self._render_extra_formats(job, file_state):
+                # Journaled as failed, so a resume redoes the track with its extra formats instead of trusting the primary file.
+                extraction_successful_this_stream = False; job_status = JOB_FAILED
+            if job_status != JOB_CANCELLED and not job.get("from_journal"): self.result_store.record_stream(file_state["movie_path"], job, job_status, time.time())
+            if self.job_journal and job_status != JOB_CANCELLED and not job.get("from_journal"):
+                self.job_journal.finish_job(self.run_id, file_state["movie_path"], file_state["output_format"], job, job_status)
+            if job.get("from_journal"):
+                file_state["subs_extracted"] += 1
+            elif extraction_successful_this_stream:
+                file_state["subs_extracted"] += 1
+                self.log_message(f"[SUCCESS] Successfully decoded stream {job['index']} ({job['lang']}) from {movie_filename} to {os.path.basename(job['output_path'])}", to_console=True)
+            elif job["run_ocr"] and job_status == JOB_TIMED_OUT:
+                self._mark_file_timed_out(file_state)
+            elif job["run_ocr"] and job_status != JOB_CANCELLED:
+                self._mark_file_error(file_state)
+        if file_state["subs_extracted"] > 0:
+            with self.results_lock: self._run_totals["subs_extracted"] += file_state["subs_extracted"]
+            self._record_file_result('success', file_state["movie_path"])
+            self.log_message(f"[INFO] Target {movie_filename} processed, {file_state['subs_extracted']} signal(s) decoded.")
+        elif not file_state["had_error"] and not self.result_store.has_outcome(file_state["movie_path"], 'no_subs') and not self.result_store.has_outcome(file_state["movie_path"], 'error'):
+            self.log_message(f"[INFO] Target {movie_filename} processed, no suitable signals decoded/translated.")
+
+    def _render_extra_formats(self, job, file_state):
+        # The other requested formats are rendered from the track just written, instead of demuxing it again.
+        # False when rendering failed; an image-based copy has nothing to render and counts as done.
+        source_format = os.path.splitext(job["output_path"])[1][1:].lower()
+        extra_formats = [subtitle_format for subtitle_format in job["extra_formats"] if subtitle_format != source_format]
+        if not extra_formats: return True
+        if source_format not in PARSERS:
+            self.log_message(f"[INFO] Signal {job['index']} was copied as {source_format.upper()}; {', '.join(extra_formats).upper()} cannot be rendered from an image-based copy.")
+            return True
+        try:
+            with self.metrics.stage('convert') as sample:
+                events = read_subtitle_file(job["output_path"], source_format)
+                extra_paths = [f"{os.path.splitext(job['output_path'])[0]}.{subtitle_format}" for subtitle_format in extra_formats]
+                for subtitle_format, extra_path in zip(extra_formats, extra_paths): write_subtitle_file(events, extra_path, subtitle_format)
+                sample.bytes_read = file_bytes(job["output_path"]); sample.bytes_written = file_bytes(*extra_paths)
+        except (OSError, ValueError) as e:
+            self.log_message(f"[ERROR] Could not render {', '.join(extra_formats).upper()} for signal {job['index']} of {file_state['movie_filename']}: {e}", to_console=True)
+            self._mark_file_error(file_state); return False
+        self.log_message(f"[CONVERT] Rendered {', '.join(extra_formats).upper()} for signal {job['index']} ({len(events)} cue(s)) from {os.path.basename(job['output_path'])} in-process.")
+        return True
+
+    def _release_staging(self, file_state, staging_dir):
+        if staging_dir and os.path.isdir(staging_dir): shutil.rmtree(staging_dir, ignore_errors=True)
+        with self.results_lock: self._staging_dirs.discard(staging_dir)
+        # Tracks whose OCR never ran (cancelled) still hold their bytes.
+        if self.staging_area: self.staging_area.release(sum(file_state["staged_bytes"].values()))
+        file_state["staged_bytes"].clear()
+
+    def _finish_ocr_for_file(self, file_state, stream_results, ocr_futures, staging_dir, total_files):
+        movie_filename = file_state["movie_filename"]
+        try:
+            for batch, future in ocr_futures:
+                try:
+                    # A batch still queued at a cancel is drained without running; its result is None.
+                    ocr_results = future.result()
+                    if ocr_results is None: ocr_results = [None] * len(batch)
+                    for (job, _), ocr_ok in zip(batch, ocr_results):
+                        if ocr_ok is None and self.cancel_requested.is_set(): job["outcome"] = JOB_CANCELLED
+                        stream_results.append((job, bool(ocr_ok)))
+                except subprocess.TimeoutExpired:
+                    self.log_message(f"[TIMEOUT] Comlink lost translating image signal(s) {', '.join(str(job['index']) for job, _ in batch)} from {movie_filename}.", to_console=True)
+                    self._mark_file_timed_out(file_state)
+                    for job, _ in batch:
+                        job["outcome"] = JOB_TIMED_OUT; stream_results.append((job, False))
+                except Exception as e:
+                    self.log_message(f"[CRITICAL SYSTEM ERROR] OCR lane failure on signal(s) {', '.join(str(job['index']) for job, _ in batch)} of {movie_filename}: {e}", to_console=True)
+                    stream_results.extend((job, False) for job, _ in batch)
+            self._tally_stream_results(file_state, stream_results)
+        finally:
+            self._release_staging(file_state, staging_dir)
+            self._file_finished(file_state["movie_path"], total_files)
+
+    def _process_movie_file(self, scheduler, movie_file_path, i, total_files, output_format):
+        movie_filename = os.path.basename(movie_file_path)
+        output_formats = split_output_formats(output_format)
+        file_state = {"movie_path": movie_file_path, "movie_filename": movie_filename, "output_format": ','.join(output_formats),
+                      "had_error": False, "timed_out": False, "subs_extracted": 0, "staged_bytes": {}}
+        self.result_store.file_started(movie_file_path, time.time())
+        self._report_status(f"Scanning target ({i + 1}/{total_files}): {movie_filename}")
+
+        if self.job_journal and self.resuming:
+            journaled_outcomes = self.job_journal.file_outcomes(self.run_id, movie_file_path)
+            if FILE_PROCESSED in journaled_outcomes and not (self.retry_failures and journaled_outcomes & RETRYABLE_FILE_OUTCOMES):
+                self.log_message(f"[JOURNAL] Target ({i + 1}/{total_files}) {movie_filename} already completed in an earlier session.")
+                self._file_finished(movie_file_path, total_files, journal_outcome=False)
+                return
+            # Interrupted or retried: its old outcomes are replaced by this attempt's.
+            if journaled_outcomes: self.job_journal.clear_file_outcomes(self.run_id, movie_file_path)
+
+        # A resumed file the journal already has jobs for may have subtitle files from the interrupted run itself.
+        if self.settings.get('skip_if_exists') and not (self.resuming and self.job_journal.has_jobs(self.run_id, movie_file_path)):
+            if self.has_existing_subs(movie_file_path):
+                self.log_message(f"\n[INFO] Skipping target ({i + 1}/{total_files}): {movie_filename} - Existing subtitle file found.")
+                self._record_file_result('skipped', movie_file_path)
+                self._file_finished(movie_file_path, total_files)
+                return
+
+        self.log_message(f"\n[INFO] Processing target ({i + 1}/{total_files}): {movie_file_path}")
+        movie_dir = os.path.dirname(movie_file_path); base_name_no_ext = os.path.splitext(movie_filename)[0]
+        ocr_handed_off = False; staging_dir = None
+        try:
+            file_info = self.probe_file(movie_file_path)
+            if file_info is None:
+                self._mark_file_error(file_state); return
+            if not file_info.streams:
+                self.log_message(f"[INFO] No subtitle signals found/parsed for {movie_filename}."); self._record_file_result('no_subs', movie_file_path)
+                return
+            streams_to_extract_this_file = []
+            for stream_info in file_info.streams:
+                if self.language_filter and stream_info.lang not in self.language_filter: continue
+                if stream_info.is_empty:
+                    self.log_message(f"[INFO] Skipping empty signal {stream_info.index} ({stream_info.codec}, lang {stream_info.lang}) in {movie_filename}: container reports 0 packets.")
+                    continue
+                streams_to_extract_this_file.append(stream_info)
+            self.log_message(f"[INFO] Filtered to {len(streams_to_extract_this_file)} signal(s) for {movie_filename} based on language selection: {self.language_filter_display()}")
+            if not streams_to_extract_this_file:
+                self.log_message(f"[INFO] No signals match language filter for {movie_filename}. Skipping this target's subtitle extraction.")
+                return
+
+            self._report_status(f"Processing subtitle signals for {movie_filename}...")
+
+            planned_jobs = []
+            for stream_info in streams_to_extract_this_file:
+                stream_idx, lang_code, input_codec = stream_info.index, stream_info.lang, stream_info.codec
+                safe_lang_code = re.sub(r'[^a-zA-Z0-9_.-]', '', lang_code) or "und"
+                stream_formats = formats_for_codec(output_formats, input_codec); output_target_format_gui = stream_formats[0]
+                ffmpeg_codec_arg_for_direct_extract = output_target_format_gui; final_output_extension = f".{output_target_format_gui}"
+                run_ocr = False
+                if output_target_format_gui == 'copy':
+                    ffmpeg_codec_arg_for_direct_extract = 'copy'
+                    if input_codec in ['subrip', 'srt']: final_output_extension = ".srt"
+                    elif input_codec == 'ass': final_output_extension = ".ass"
+                    elif input_codec in ['webvtt', 'vtt']: final_output_extension = ".vtt"
+                    elif input_codec == 'mov_text': ffmpeg_codec_arg_for_direct_extract = 'srt'; final_output_extension = '.srt'; self.log_message(f"[INFO] Forcing mov_text (signal {stream_idx}, lang {lang_code}) to SRT for comlink compatibility, despite 'copy' order.", to_console=True)
+                    elif input_codec in IMAGE_BASED_CODECS: final_output_extension = self.settings['ocr_input_ext_map'].get(input_codec, f".{input_codec}"); self.log_message(f"[INFO] Copying image-based signal '{input_codec}' (stream {stream_idx}, lang {lang_code}) as is. Output ext: {final_output_extension}", to_console=True)
+                    else: final_output_extension = f".{input_codec}"; self.log_message(f"[WARN] Copying unknown signal type '{input_codec}' (stream {stream_idx}, lang {lang_code}). Extension: '{final_output_extension}'.", to_console=True)
+                elif output_target_format_gui in TEXT_BASED_OUTPUT_FORMATS:
+                    if input_codec in IMAGE_BASED_CODECS:
+                        if self.ocr_available(input_codec):
+                            run_ocr = True
+                        else:
+                            self.log_message(f"[INFO] Skipping image-based signal {stream_idx} ({input_codec}, lang {lang_code}) for {movie_filename}. Cannot convert to {output_target_format_gui.upper()} without OCR Droid. Use 'copy' or deploy OCR Droid via Holocron (Config).", to_console=True)
+                            self._mark_file_error(file_state)
+                            continue
+                    elif input_codec == 'mov_text':
+                        self.log_message(f"[INFO] Translating mov_text (signal {stream_idx}, lang {lang_code}) to {output_target_format_gui.upper()}.", to_console=True)
+                else:
+                    self.log_message(f"[ERROR] Unexpected output format '{output_target_format_gui}' for signal {stream_idx}. Skipping.", to_console=True)
+                    self._mark_file_error(file_state)
+                    continue
+
+                sub_filename_out = f"{base_name_no_ext}.{safe_lang_code}.{stream_idx}{final_output_extension}"
+                planned_jobs.append({"index": stream_idx, "lang": lang_code, "safe_lang": safe_lang_code, "codec": input_codec,
+                                     "codec_arg": ffmpeg_codec_arg_for_direct_extract, "run_ocr": run_ocr, "packets": stream_info.packets,
+                                     "probe_size": file_info.probe_size or self._initial_probe_size(movie_file_path), "file_duration": file_info.duration, "file_size": file_info.size or file_bytes(movie_file_path),
+                                     "output_path": os.path.join(movie_dir, sub_filename_out), "extra_formats": stream_formats[1:]})
+
+            journaled_results = []
+            if self.job_journal:
+                done_streams = self.job_journal.done_streams(self.run_id, movie_file_path, file_state["output_format"]) if self.resuming else set()
+                for job in planned_jobs:
+                    if job["index"] in done_streams and os.path.exists(job["output_path"]):
+                        self.log_message(f"[JOURNAL] Signal {job['index']} ({job['lang']}) of {movie_filename} already decoded in an earlier session.")
+                        job["from_journal"] = True; journaled_results.append((job, True))
+                planned_jobs = [job for job in planned_jobs if not job.get("from_journal")]
+                self.job_journal.plan_jobs(self.run_id, movie_file_path, file_state["output_format"], planned_jobs)
+
+            if any(job["run_ocr"] for job in planned_jobs):
+                # Image tracks are staged here on the I/O lane so OCR workers only ever OCR. When the staging
+                # area is full this worker waits for the OCR lane to drain it instead of reading further ahead.
+                if self.staging_area.is_full():
+                    self.log_message(f"[STAGING] OCR staging area full ({self.staging_area.used_bytes // (1024 * 1024)} MB), {movie_filename} waits for the OCR Droids to catch up.")
+                if not self.staging_area.wait_for_room(self.cancel_requested): return
+                staging_dir = self._make_staging_dir(movie_file_path, base_name_no_ext)
+
+            native_results, native_ocr_tasks = [], []
+            if self.settings.get('native_mkv_demuxer') and os.path.splitext(movie_filename)[1].lower() in NATIVE_MKV_EXTENSIONS:
+                native_results, native_ocr_tasks, planned_jobs = self._extract_streams_native(movie_file_path, base_name_no_ext, planned_jobs, staging_dir, file_info)
+            elif self.settings.get('native_mp4_demuxer') and os.path.splitext(movie_filename)[1].lower() in NATIVE_MP4_EXTENSIONS:
+                native_results, planned_jobs = self._extract_streams_mp4(movie_file_path, planned_jobs)
+
+            if self.settings.get('single_pass_extraction') and len(planned_jobs) > 1:
+                stream_results, ocr_tasks = self._extract_streams_single_pass(movie_file_path, base_name_no_ext, planned_jobs, staging_dir)
+            else:
+                stream_results, ocr_tasks = [], []
+                for job in planned_jobs:
+                    if self.cancel_requested.is_set(): break
+                    if job["run_ocr"]:
+                        staged_path = self._stage_image_stream(movie_file_path, base_name_no_ext, job, staging_dir)
+                        if staged_path: ocr_tasks.append((job, staged_path))
+                        else: stream_results.append((job, False))
+                    else: stream_results.append((job, self._extract_single_stream(movie_file_path, base_name_no_ext, job)))
+            stream_results = journaled_results + native_results + stream_results; ocr_tasks = native_ocr_tasks + ocr_tasks
+            for _, staged_path in ocr_tasks: file_state["staged_bytes"][staged_path] = os.path.getsize(staged_path)
+            if self.staging_area: self.staging_area.add(sum(file_state["staged_bytes"].values()))
+
+            if ocr_tasks:
+                # OCR runs on its own lane; this I/O worker moves on to the next movie right away.
+                # Longest tracks (by packet count) go first so they don't end up as the stragglers of the run.
+                ocr_tasks.sort(key=lambda task: task[0]["packets"] or 0, reverse=True)
+                estimated_events = sum(job["packets"] or 0 for job, _ in ocr_tasks)
+                if estimated_events: self.log_message(f"[OCR] Queueing {len(ocr_tasks)} image signal(s) from {movie_filename}, ~{estimated_events} subtitle events to OCR.")
+                ocr_futures = [(batch, scheduler.submit_ocr(self._ocr_staged_batch, movie_file_path, batch, file_state)) for batch in self._ocr_batches(ocr_tasks)]
+                ocr_handed_off = True
+                scheduler.when_all([future for _, future in ocr_futures], lambda: self._finish_ocr_for_file(file_state, stream_results, ocr_futures, staging_dir, total_files))
+            else:
+                self._tally_stream_results(file_state, stream_results)
+
+        except subprocess.TimeoutExpired:
+            self.log_message(f"[TIMEOUT] Comlink lost processing {movie_filename}. Skipping target.", to_console=True); self._record_file_result('timed_out', movie_file_path)
+            self._report_status(f"Comlink lost with {movie_filename}. Moving to next target.")
+        except Exception as e:
+            self.log_message(f"[CRITICAL SYSTEM ERROR] Unexpected asteroid field encountered with {movie_filename}: {e}", to_console=True); import traceback; self.log_message(traceback.format_exc(), to_console=True)
+            self._mark_file_error(file_state)
+            self._report_status(f"Error with {movie_filename}. Jumping to next system.")
+        finally:
+            if not ocr_handed_off:
+                self._release_staging(file_state, staging_dir)
+                self._file_finished(movie_file_path, total_files)
+
+    def resumable_run(self, run_id=None):
+        # Journal entry of the given run (or the latest unfinished one): its files, output format and language filter.
+        return self.job_journal.get_run(run_id) if self.job_journal else None
+
+    def _rebuild_results_from_journal(self):
+        self.result_store.replace_outcomes(self.job_journal.run_outcomes(self.run_id))
+
+    def run(self, files_to_process, output_format, language_filter=None, resume_run_id=None, retry_failures=False):
+        # Blocking extraction run over files_to_process; returns the summary message. Results are left
+        # in result_store. language_filter is a set of 3-letter codes, or None for all languages.
+        # With resume_run_id, files and streams the journal already has as finished are not redone
+        # (failed/timed-out files are retried when retry_failures is set). output_format may list several
+        # formats ("srt,vtt"): each track is demuxed once and the other formats are rendered from it.
+        output_format = ','.join(split_output_formats(output_format))
+        total_files = len(files_to_process); self._run_totals = {"processed": 0, "subs_extracted": 0, "native_bytes_read": 0, "native_file_bytes": 0}
+        self.language_filter = set(language_filter) if language_filter else None
+        self.cancel_requested.clear(); self.processes.reset(); self.processes.configure(self.settings, self.log_message)
+        self.sidecar_index.begin_run()
+        self._load_probe_sizes(); self.probe_escalations = {}
+        self.result_store.clear()
+        self.metrics = RunMetrics(); self.python_profile = {}; self._progress_rows = set()
+        log_dir = os.path.join(self.config.app_dir, LOG_FOLDER_NAME)
+        profiler = PythonProfiler(os.path.join(log_dir, PROFILE_FILENAME) if self.settings.get('profile_python') else None, self.settings.get('trace_memory'))
+        profiler.start()
+        self.resuming = bool(self.job_journal and resume_run_id); self.retry_failures = retry_failures
+        if self.job_journal:
+            if self.resuming:
+                self.run_id = resume_run_id; self.job_journal.reopen_run(resume_run_id)
+                self.log_message(f"[JOURNAL] Resuming run #{resume_run_id}{' (retrying failures)' if retry_failures else ''}.", to_console=True)
+            else:
+                self.run_id = self.job_journal.begin_run(files_to_process, output_format, self.language_filter, {'skip_if_exists': bool(self.settings.get('skip_if_exists'))})
+                self.log_message(f"[JOURNAL] Run #{self.run_id} logged in the job journal; resume it with: cli.py --resume {self.run_id}", to_console=True)
+        self.log_message(f"Using output format: {output_format}", to_console=True)
+        self.log_message(f"Language filter: {self.language_filter_display()}", to_console=True)
+        if self.settings.get('ocr_enabled') and self.settings.get('ocr_engine') == 'builtin':
+            if decoder_available(): self.log_message(f"[OCR STATUS] Built-in PGS decoder ONLINE, reading glyphs with {self.settings['builtin_ocr_backend']}.", to_console=True)
+            else: self.log_message("[OCR STATUS] Built-in PGS decoder OFFLINE: NumPy is not installed (pip install numpy).", to_console=True)
+        self.ocr_backend = create_ocr_backend(self.settings, self.log_message) if self.settings.get('ocr_enabled') else None
+        if self.ocr_backend:
+            self.log_message(f"[OCR STATUS] OCR Droid is ONLINE ({self.ocr_backend.name} backend). Protocol: {self.ocr_backend.identity()[:50]}...", to_console=True)
+        elif not self.ocr_available():
+            self.log_message("[OCR STATUS] OCR Droid OFFLINE or no protocol. Image subs will be copied or skipped (if text output chosen).", to_console=True)
+        self.log_message(f"[SCHEDULER] Deploying {self.settings['extraction_workers']} extraction worker(s) and {self.settings['ocr_workers']} OCR worker(s).", to_console=True)
+
+        scheduler = ExtractionScheduler(self.settings['extraction_workers'], self.settings['ocr_workers'], self.cancel_requested, self.metrics,
+                                        self.settings['io_workers_per_device'], self._device_limits())
+        self.staging_area = StagingArea(self.settings['ocr_staging_max_mb'] * 1024 * 1024)
+        try:
+            device_labels = {}
+            for i, movie_file_path in enumerate(files_to_process):
+                device = device_key(movie_file_path)
+                if device not in device_labels: device_labels[device] = mount_point(movie_file_path) if device is not None else "(unreadable)"
+                scheduler.submit_device(device, device_labels[device], file_bytes(movie_file_path), self._process_movie_file, scheduler, movie_file_path, i, total_files, output_format)
+            if len(device_labels) > 1: self.log_message(f"[SCHEDULER] Targets span {len(device_labels)} devices ({', '.join(sorted(map(str, device_labels.values())))}); workers take them in turn.", to_console=True)
+            scheduler.wait()
+        finally:
+            scheduler.shutdown()
+            # Every worker of this run is done: a cancel must not end the processes started after it (language scans, the next run).
+            self.processes.reset()
+            if self.ocr_backend: self.ocr_backend.close(); self.ocr_backend = None
+            self.metrics.record_devices(scheduler.device_report())
+            self.metrics.finish(); self.python_profile = profiler.stop()
+        if self.probe_cache:
+            self.probe_cache.flush(); self.log_message(f"[PROBE CACHE] {self.probe_cache.stats_line()}", to_console=True)
+        if self._run_totals["native_file_bytes"]:
+            self.log_message(f"[NATIVE] Native demuxers read {self._run_totals['native_bytes_read'] / (1024 * 1024):.1f} MB of {self._run_totals['native_file_bytes'] / (1024 * 1024):.1f} MB of Matroska/MP4 targets.", to_console=True)
+        if self.probe_escalations:
+            self.log_message(f"[PROBE] {len(self.probe_escalations)} target(s) needed a deeper scan than their container default: "
+                             + ', '.join(f"{os.path.basename(path)} ({format_probe_size(size)})" for path, size in sorted(self.probe_escalations.items())), to_console=True)
+        if self.staging_area.peak_bytes:
+            self.log_message(f"[STAGING] Peak OCR staging use {self.staging_area.peak_bytes / (1024 * 1024):.1f} MB of {self.settings['ocr_staging_max_mb']} MB; extraction waited for OCR {self.staging_area.waits} time(s).", to_console=True)
+        if self.ocr_cache and self.ocr_cache.hits + self.ocr_cache.misses:
+            self.log_message(f"[OCR CACHE] {self.ocr_cache.stats_line()}", to_console=True)
+        if self.job_journal:
+            self.job_journal.end_run(self.run_id, 'cancelled' if self.cancel_requested.is_set() else 'finished')
+            self._rebuild_results_from_journal()
+            job_counts = self.job_journal.job_counts(self.run_id)
+            self.log_message(f"[JOURNAL] Run #{self.run_id} jobs: " + (', '.join(f"{count} {status}" for status, count in sorted(job_counts.items())) or "none"), to_console=True)
+
+        for line in self.metrics.summary_lines(): self.log_message(line, to_console=True)
+        for device in self.metrics.devices:
+            if not device["files"]: continue
+            throughput = f"{device['mb_per_second']:.1f} MB/s" if device["mb_per_second"] is not None else "n/a"
+            self.log_message(f"[DEVICE] {device['device']}: {device['files']} target(s), {device['bytes'] / (1024 * 1024):.1f} MB of movies in {device['busy_seconds']:.1f}s busy, {throughput} "
+                             f"(up to {device['max_concurrent']} at once, limit {device['limit'] or 'none'}).", to_console=True)
+        if self.python_profile.get("profile_path"): self.log_message(f"[PROFILE] Python profile of this run saved to {self.python_profile['profile_path']} (open with pstats or snakeviz).", to_console=True)
+        if self.python_profile.get("memory_peak_bytes"): self.log_message(f"[PROFILE] Peak traced Python memory: {self.python_profile['memory_peak_bytes'] / (1024 * 1024):.1f} MB.", to_console=True)
+        self._write_metrics_reports(log_dir)
+
+        summary_message = f"Mission Report: {self._run_totals['processed']}/{total_files} targets engaged. "
+        if self._run_totals["subs_extracted"] > 0: summary_message += f"{self._run_totals['subs_extracted']} subtitle signal(s) successfully decoded."
+        else: summary_message += "No subtitle signals were decoded in this operation."
+        return summary_message
+
+    def _write_metrics_reports(self, log_dir):
+        run_totals = {"files_total": len(self.result_store.files()), "files_processed": self._run_totals["processed"], "subtitles_extracted": self._run_totals["subs_extracted"],
+                      "files_failed": len(self.failed_files())}
+        try:
+            if self.settings.get('metrics_report_enabled'):
+                report = dict(run_totals, run_id=self.run_id, cancelled=self.cancel_requested.is_set(), **self.metrics.to_dict())
+                if self.python_profile: report["python_profile"] = self.python_profile
+                write_json_report(os.path.join(log_dir, METRICS_JSON_FILENAME), report)
+            if self.settings.get('metrics_prometheus_path'): write_atomically(self.settings['metrics_prometheus_path'], self.metrics.prometheus_text(run_totals))
+        except OSError as e:
+            self.log_message(f"[WARN] Could not write the run metrics: {e}", to_console=True)
+
+    def cancel(self, wait=False):
+        # Running ffmpeg/OCR processes are killed right away (SIGTERM, then SIGKILL after a grace period) instead of
+        # being left to finish; their jobs end up cancelled and the files are redone on resume.
+        self.cancel_requested.set()
+        killed = self.processes.terminate_all(wait=wait)
+        if killed: self.log_message(f"[ABORT] Terminated {killed} running FFmpeg/OCR process(es).", to_console=True)
+
+    def _device_limits(self):
+        # device_io_workers entries name any path on the device ("/mnt/nas=1"); paths that cannot be read are skipped.
+        try: limits_by_path = parse_device_limits(self.settings.get('device_io_workers', ''))
+        except ValueError as e:
+            self.log_message(f"[WARN] {e}; per-device overrides ignored.", to_console=True); return {}
+        limits = {}
+        for path, workers in limits_by_path.items():
+            device = device_key(path)
+            if device is None: self.log_message(f"[WARN] Device limit path '{path}' not found; ignored.", to_console=True)
+            else: limits[device] = workers
+        return limits
+
+    def _remove_staging_dirs(self):
+        with self.results_lock: staging_dirs = list(self._staging_dirs); self._staging_dirs.clear()
+        for staging_dir in staging_dirs: shutil.rmtree(staging_dir, ignore_errors=True)
+        if staging_dirs: self.log_message(f"[STAGING] Removed {len(staging_dirs)} leftover OCR staging folder(s).", to_console=True)
+
+    def summary_lines(self, summary_message=None):
+        final_log_summary = ["\n--- MISSION DEBRIEF ---", summary_message or "Mission completed, Commander."]
+        grouped = self.result_store.by_outcome()
+        # Basenames read better; the full path is shown only where two targets share a name.
+        name_counts = collections.Counter(os.path.basename(result.path) for result in self.result_store.files())
+        for outcome, heading in SUMMARY_HEADINGS:
+            if grouped[outcome]:
+                final_log_summary.append(heading)
+                final_log_summary.extend(f"- {path if name_counts[os.path.basename(path)] > 1 else os.path.basename(path)}" for path in grouped[outcome])
+        return final_log_summary
+
+    def failed_files(self):
+        grouped = self.result_store.by_outcome()
+        return grouped['error'] + grouped['timed_out']
+
+    def results(self):
+        results = {"processed": self._run_totals["processed"], "subtitles_extracted": self._run_totals["subs_extracted"]}
+        results.update(self.result_store.report())
+        results["probe_escalations"] = {path: format_probe_size(size) for path, size in self.probe_escalations.items()}
+        results["metrics"] = self.metrics.to_dict()
+        if self.python_profile: results["python_profile"] = self.python_profile
+        return results
+
+    def close(self):
+        # On app close mid-run: kill the children and wait for them, so no staging file is still open when it is removed.
+        if self.processes.live_count(): self.cancel(wait=True)
+        self._remove_staging_dirs()
+        if self.probe_cache: self.probe_cache.close(); self.probe_cache = None
+        if self.ocr_cache: self.ocr_cache.close(); self.ocr_cache = None
+        if self.job_journal: self.job_journal.close(); self.job_journal = None
@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import subprocess
+import collections
+
+from process_supervisor import SUPERVISOR
+
+# FFmpeg runs with -progress on stdout, read line by line while it works. Instead of one flat wall-clock limit,
+# a run is killed when it stops making progress for stall_seconds (no new out_time, output size or input bytes),
+# and only a generous size-scaled hard limit applies on top. stderr is read as it comes and only its head and tail
+# are kept, so a chatty run cannot fill memory.
+PROGRESS_ARGS = ['-nostats', '-progress', 'pipe:1']
+POLL_SECONDS = 0.5
+READER_JOIN_SECONDS = 2
+_PROC_IO = '/proc/{pid}/io'
+
+
+class StallTimeout(subprocess.TimeoutExpired):
+    def __str__(self):
+        return f"No progress from '{os.path.basename(str(self.cmd[0]))}' for {self.timeout:.0f} seconds"
+
+
+class BoundedText:
+    # The first and last max_chars/2 characters of a stream of lines, with a marker where lines were dropped.
+    def __init__(self, max_chars):
+        self.half = max(1024, int(max_chars) // 2)
+        self.head = []; self.head_chars = 0; self.tail = collections.deque(); self.tail_chars = 0; self.dropped_chars = 0
+
+    def add(self, line):
+        if self.head_chars < self.half:
+            self.head.append(line); self.head_chars += len(line); return
+        self.tail.append(line); self.tail_chars += len(line)
+        while self.tail_chars > self.half and len(self.tail) > 1:
+            dropped = self.tail.popleft(); self.tail_chars -= len(dropped); self.dropped_chars += len(dropped)
+
+    def text(self):
+        marker = [f"[... {self.dropped_chars} characters of FFmpeg output dropped ...]\n"] if self.dropped_chars else []
+        return ''.join(self.head + marker + list(self.tail))
+
+
+def scaled_timeout(base_seconds, per_gb_seconds, file_size):
+    return base_seconds + per_gb_seconds * (file_size or 0) / (1024 * 1024 * 1024)
+
+
+def process_read_bytes(pid):
+    # Bytes the process has read so far (Linux); None where /proc is not available.
+    try:
+        with open(_PROC_IO.format(pid=pid), 'r', encoding='ascii') as io_file:
+            for line in io_file:
+                if line.startswith('rchar:'): return int(line.split(':', 1)[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+class ProgressState:
+    __slots__ = ('out_seconds', 'total_size')
+
+    def __init__(self):
+        self.out_seconds = 0.0; self.total_size = 0
+
+
+def _read_progress(stream, state):
+    for line in stream:
+        key, _, value = line.strip().partition('=')
+        try:
+            # out_time_ms is in microseconds too (a long-standing FFmpeg quirk).
+            if key in ('out_time_us', 'out_time_ms') and value not in ('', 'N/A'): state.out_seconds = max(state.out_seconds, int(value) / 1000000)
+            elif key == 'total_size' and value != 'N/A': state.total_size = int(value)
+        except ValueError:
+            pass
+
+
+def _read_stderr(stream, bounded_text):
+    for line in stream: bounded_text.add(line)
+
+
+def run_ffmpeg_with_progress(cmd, duration=None, file_size=None, stall_seconds=120, max_seconds=None, stderr_max_chars=262144, on_progress=None):
+    # Runs cmd (an ffmpeg command line; the progress options are added after the binary) and returns
+    # (returncode, bounded stderr). on_progress(fraction) is called as the run advances. Raises StallTimeout when no
+    # progress arrived for stall_seconds, subprocess.TimeoutExpired past max_seconds.
+    process = SUPERVISOR.popen(cmd[:1] + PROGRESS_ARGS + cmd[1:], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace',
+                               creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    state = ProgressState(); stderr_text = BoundedText(stderr_max_chars)
+    readers = [threading.Thread(target=_read_progress, args=(process.stdout, state), daemon=True, name="ffmpeg-progress"),
+               threading.Thread(target=_read_stderr, args=(process.stderr, stderr_text), daemon=True, name="ffmpeg-stderr")]
+    for reader in readers: reader.start()
+    started = last_advance = time.monotonic(); last_marker = None; last_fraction = -1.0
+    try:
+        while True:
+            try:
+                process.wait(timeout=POLL_SECONDS); break
+            except subprocess.TimeoutExpired:
+                pass
+            now = time.monotonic(); read_bytes = process_read_bytes(process.pid)
+            marker = (state.out_seconds, state.total_size, read_bytes)
+            if marker != last_marker: last_marker = marker; last_advance = now
+            if on_progress:
+                fractions = [state.out_seconds / duration if duration else 0.0, read_bytes / file_size if read_bytes and file_size else 0.0]
+                fraction = min(1.0, max(fractions))
+                if fraction > last_fraction: last_fraction = fraction; on_progress(fraction)
+            if stall_seconds and now - last_advance > stall_seconds: raise StallTimeout(cmd, stall_seconds)
+            if max_seconds and now - started > max_seconds: raise subprocess.TimeoutExpired(cmd, max_seconds)
+    finally:
+        if process.returncode is None:
+            process.kill(); process.wait()
+        # A grandchild that left the process group but inherited the pipes can keep a reader blocked; its pipe is then left to the GC, since
+        # closing it would block on the reader.
+        join_deadline = time.monotonic() + READER_JOIN_SECONDS
+        for reader, stream in zip(readers, (process.stdout, process.stderr)):
+            reader.join(max(0.0, join_deadline - time.monotonic()))
+            if not reader.is_alive(): stream.close()
+    return process.returncode, stderr_text.text()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from process_supervisor import SUPERVISOR
+
+# Image-level OCR backends for the built-in bitmap decoder: recognize(images, lang) takes a list of
+# grayscale NumPy arrays and returns one string per image. Register new backends in IMAGE_OCR_BACKENDS.
+
+# Matroska tags languages with ISO 639-2/B codes, Tesseract's traineddata uses the /T ones.
+TESSERACT_LANGUAGE_CODES = {
+    'fre': 'fra', 'ger': 'deu', 'dut': 'nld', 'cze': 'ces', 'slo': 'slk', 'gre': 'ell', 'rum': 'ron', 'per': 'fas',
+    'ice': 'isl', 'alb': 'sqi', 'arm': 'hye', 'baq': 'eus', 'bur': 'mya', 'geo': 'kat', 'mac': 'mkd', 'mao': 'mri',
+    'may': 'msa', 'tib': 'bod', 'wel': 'cym', 'chi': 'chi_sim',
+}
+
+
+def write_pgm(image, path):
+    height, width = image.shape
+    with open(path, 'wb') as pgm_file:
+        pgm_file.write(f"P5 {width} {height} 255\n".encode('ascii')); pgm_file.write(image.tobytes())
+
+
+class TesseractImageBackend:
+    name = 'tesseract'
+
+    def __init__(self, settings):
+        self.tesseract_path = settings.get('tesseract_path') or 'tesseract'
+        self.timeout = settings.get('ffmpeg_ocr_timeout')
+        self.temp_dir = settings.get('ocr_temp_dir') or None
+
+    def _run(self, args):
+        return SUPERVISOR.run([self.tesseract_path] + args, text=True, encoding='utf-8', errors='replace', timeout=self.timeout,
+                              creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+
+    def recognize(self, images, lang):
+        if not images: return []
+        lang = TESSERACT_LANGUAGE_CODES.get(lang, lang)
+        work_dir = tempfile.mkdtemp(prefix="ocr_frames_", dir=self.temp_dir if self.temp_dir and os.path.isdir(self.temp_dir) else None)
+        try:
+            image_paths = []
+            for number, image in enumerate(images):
+                image_path = os.path.join(work_dir, f"{number:06d}.pgm"); write_pgm(image, image_path); image_paths.append(image_path)
+            list_path = os.path.join(work_dir, "frames.txt")
+            with open(list_path, 'w', encoding='utf-8') as list_file: list_file.write('\n'.join(image_paths) + '\n')
+            # One Tesseract launch (and one model load) for the whole track; pages come back separated by form feeds.
+            result = self._run([list_path, 'stdout', '-l', lang, '--psm', '6'])
+            if result.returncode != 0: raise RuntimeError(f"tesseract failed (RC {result.returncode}): {result.stderr.strip()[:500]}")
+            pages = result.stdout.split('\f')
+            if len(pages) >= len(images) and not ''.join(pages[len(images):]).strip(): return [page.strip() for page in pages[:len(images)]]
+            # Page count does not line up (older Tesseract builds): fall back to one launch per image.
+            texts = []
+            for image_path in image_paths:
+                single = self._run([image_path, 'stdout', '-l', lang, '--psm', '6'])
+                texts.append(single.stdout.replace('\f', '').strip() if single.returncode == 0 else '')
+            return texts
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+IMAGE_OCR_BACKENDS = {TesseractImageBackend.name: TesseractImageBackend}
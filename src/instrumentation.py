@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+import subprocess
+import cProfile
+import pstats
+import tracemalloc
+
+# Per-stage timing for one run: wall time, CPU time of the stage's child processes, bytes read and written, and
+# how long tasks waited for a worker lane. Child CPU comes from the rusage wait4() returns when a MeasuredPopen is
+# reaped, and is credited to the stage open on the reaping thread (os.times() children totals are process-wide and
+# would mix up concurrent workers). Bytes read are what the stage read itself (native demuxers, staged tracks) plus
+# the blocks its children read from disk (page-cache hits are not counted); bytes written are the outputs' sizes.
+STAGES = ('probe', 'extract', 'native_demux', 'stage_image', 'ocr', 'convert')
+METRICS_JSON_FILENAME = "run_metrics.json"
+PROFILE_FILENAME = "run_profile.prof"
+PROMETHEUS_PREFIX = "sub_extractor"
+PROFILE_TOP_FUNCTIONS = 25
+TRACEMALLOC_TOP_LINES = 25
+_BLOCK_BYTES = 512 # ru_inblock unit
+_HAS_WAIT4 = hasattr(os, 'wait4')
+
+_thread_state = threading.local()
+
+
+class StageSample:
+    __slots__ = ('child_cpu', 'bytes_read', 'bytes_written', 'processes')
+
+    def __init__(self):
+        self.child_cpu = 0.0; self.bytes_read = 0; self.bytes_written = 0; self.processes = 0
+
+
+class StageStats:
+    __slots__ = ('count', 'wall_seconds', 'max_wall_seconds', 'child_cpu_seconds', 'bytes_read', 'bytes_written', 'processes')
+
+    def __init__(self):
+        self.count = 0; self.wall_seconds = 0.0; self.max_wall_seconds = 0.0; self.child_cpu_seconds = 0.0
+        self.bytes_read = 0; self.bytes_written = 0; self.processes = 0
+
+    def to_dict(self):
+        return {"count": self.count, "wall_seconds": round(self.wall_seconds, 4), "max_wall_seconds": round(self.max_wall_seconds, 4),
+                "child_cpu_seconds": round(self.child_cpu_seconds, 4), "processes": self.processes, "bytes_read": self.bytes_read, "bytes_written": self.bytes_written,
+                "read_mb_per_second": round(self.bytes_read / self.wall_seconds / (1024 * 1024), 3) if self.wall_seconds else None}
+
+
+class MeasuredPopen(subprocess.Popen):
+    # Popen that reaps its child with wait4() where the OS has it, crediting the child's CPU time and disk reads
+    # to the stage open on the reaping thread. Only the public wait()/poll() are overridden; communicate(), the
+    # context manager and send_signal() all reap through them. Elsewhere (Windows) it is a plain Popen.
+    child_cpu = None; max_rss_kb = None
+
+    def __init__(self, *args, **kwargs):
+        self._reap_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _reap(self, wait_flags):
+        # One wait4(); True once the child has been reaped. Called with _reap_lock held.
+        if self.returncode is not None: return True
+        try:
+            pid, status, usage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            self.returncode = 0; return True # reaped elsewhere (SIGCHLD ignored); Popen reports 0 as well
+        if pid != self.pid: return False
+        self.child_cpu = usage.ru_utime + usage.ru_stime; self.max_rss_kb = usage.ru_maxrss
+        sample = getattr(_thread_state, 'sample', None)
+        if sample is not None:
+            sample.child_cpu += self.child_cpu; sample.bytes_read += usage.ru_inblock * _BLOCK_BYTES; sample.processes += 1
+        self.returncode = os.waitstatus_to_exitcode(status)
+        return True
+
+    def poll(self):
+        if not _HAS_WAIT4: return super().poll()
+        # A thread already blocked in wait() will reap it; poll() never falls back to Popen's own waitpid().
+        if self.returncode is None and self._reap_lock.acquire(blocking=False):
+            try: self._reap(os.WNOHANG)
+            finally: self._reap_lock.release()
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if not _HAS_WAIT4: return super().wait(timeout)
+        if timeout is None:
+            with self._reap_lock: self._reap(0)
+            return self.returncode
+        deadline = time.monotonic() + timeout; delay = 0.0005
+        while True:
+            remaining = deadline - time.monotonic()
+            if self._reap_lock.acquire(timeout=max(0, remaining)):
+                try:
+                    if self._reap(os.WNOHANG): return self.returncode
+                finally: self._reap_lock.release()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(min(delay, remaining)); delay = min(delay * 2, 0.05)
+
+
+def file_bytes(*paths):
+    total = 0
+    for path in paths:
+        try: total += os.path.getsize(path)
+        except (OSError, TypeError): pass
+    return total
+
+
+class RunMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}; self.queue_waits = {} # lane -> [tasks, total seconds, max seconds]
+        self.started_at = time.time(); self.finished_at = None
+        self.devices = [] # per-device I/O from ExtractionScheduler.device_report()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # Times the block; the yielded sample collects child CPU (automatically) and bytes (from the caller).
+        sample = StageSample(); outer_sample = getattr(_thread_state, 'sample', None)
+        _thread_state.sample = sample; started = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            _thread_state.sample = outer_sample
+            self.record(name, time.perf_counter() - started, sample)
+
+    def record(self, name, wall_seconds, sample):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None: stats = self.stages[name] = StageStats()
+            stats.count += 1; stats.wall_seconds += wall_seconds; stats.max_wall_seconds = max(stats.max_wall_seconds, wall_seconds)
+            stats.child_cpu_seconds += sample.child_cpu; stats.bytes_read += sample.bytes_read; stats.bytes_written += sample.bytes_written
+            stats.processes += sample.processes
+
+    def record_queue_wait(self, lane, seconds):
+        with self._lock:
+            waits = self.queue_waits.setdefault(lane, [0, 0.0, 0.0])
+            waits[0] += 1; waits[1] += seconds; waits[2] = max(waits[2], seconds)
+
+    def record_devices(self, devices):
+        with self._lock: self.devices = list(devices)
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            ordered = sorted(self.stages, key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), name))
+            return {"started_at": self.started_at, "finished_at": self.finished_at,
+                    "wall_seconds": round((self.finished_at or time.time()) - self.started_at, 4),
+                    "stages": {name: self.stages[name].to_dict() for name in ordered},
+                    "queue_wait": {lane: {"tasks": tasks, "total_seconds": round(total, 4), "max_seconds": round(longest, 4), "mean_seconds": round(total / tasks, 4) if tasks else 0.0}
+                                   for lane, (tasks, total, longest) in sorted(self.queue_waits.items())},
+                    "devices": list(self.devices)}
+
+    def summary_lines(self):
+        lines = []
+        for name, stats in self.to_dict()["stages"].items():
+            lines.append(f"[METRICS] {name}: {stats['count']}x, {stats['wall_seconds']:.2f}s wall (max {stats['max_wall_seconds']:.2f}s), {stats['child_cpu_seconds']:.2f}s child CPU, "
+                         f"read {stats['bytes_read'] / (1024 * 1024):.1f} MB, wrote {stats['bytes_written'] / (1024 * 1024):.2f} MB.")
+        for lane, waits in self.to_dict()["queue_wait"].items():
+            lines.append(f"[METRICS] {lane} lane queue: {waits['tasks']} task(s), mean wait {waits['mean_seconds']:.2f}s, max {waits['max_seconds']:.2f}s.")
+        return lines
+
+    def prometheus_text(self, run_totals=None):
+        # Textfile-collector format. Everything is a gauge describing the last run, since a new run starts from zero.
+        report = self.to_dict(); out = []
+        def metric(name, help_text, samples):
+            out.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}"); out.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+            out.extend(f"{PROMETHEUS_PREFIX}_{name}{labels} {value}" for labels, value in samples)
+        stages = report["stages"].items()
+        metric("stage_runs", "Times each stage ran in the last run.", [(f'{{stage="{name}"}}', stats["count"]) for name, stats in stages])
+        metric("stage_wall_seconds", "Wall time spent in each stage in the last run.", [(f'{{stage="{name}"}}', stats["wall_seconds"]) for name, stats in stages])
+        metric("stage_child_cpu_seconds", "CPU time of child processes per stage in the last run.", [(f'{{stage="{name}"}}', stats["child_cpu_seconds"]) for name, stats in stages])
+        metric("stage_read_bytes", "Bytes read per stage in the last run.", [(f'{{stage="{name}"}}', stats["bytes_read"]) for name, stats in stages])
+        metric("stage_written_bytes", "Bytes written per stage in the last run.", [(f'{{stage="{name}"}}', stats["bytes_written"]) for name, stats in stages])
+        queue_waits = report["queue_wait"].items()
+        metric("queue_wait_seconds", "Total time tasks waited for a worker in the last run, per lane.", [(f'{{lane="{lane}"}}', waits["total_seconds"]) for lane, waits in queue_waits])
+        metric("queue_wait_max_seconds", "Longest wait for a worker in the last run, per lane.", [(f'{{lane="{lane}"}}', waits["max_seconds"]) for lane, waits in queue_waits])
+        devices = [device for device in report["devices"] if device["files"]]
+        metric("device_files", "Targets read from each device in the last run.", [(f'{{device="{device["device"]}"}}', device["files"]) for device in devices])
+        metric("device_busy_seconds", "Time each device had at least one target running in the last run.", [(f'{{device="{device["device"]}"}}', device["busy_seconds"]) for device in devices])
+        metric("device_bytes_per_second", "Movie bytes per busy second on each device in the last run.", [(f'{{device="{device["device"]}"}}', round(device["bytes"] / device["busy_seconds"], 1) if device["busy_seconds"] else 0) for device in devices])
+        metric("run_wall_seconds", "Wall time of the last run.", [('', report["wall_seconds"])])
+        for key, value in sorted((run_totals or {}).items()): metric(f"run_{key}", f"'{key}' total of the last run.", [('', value)])
+        metric("run_finished_timestamp_seconds", "When the last run finished (Unix time).", [('', round(report["finished_at"] or time.time(), 3))])
+        return '\n'.join(out) + '\n'
+
+
+def write_atomically(path, text):
+    # The textfile collector may read at any moment: write next to the target and rename over it.
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as out_file: out_file.write(text)
+    os.replace(temp_path, path)
+
+
+def write_json_report(path, report):
+    write_atomically(path, json.dumps(report, indent=2, ensure_ascii=False, default=str))
+
+
+class PythonProfiler:
+    # Optional cProfile (every thread started while it runs, merged at the end) and tracemalloc over one run,
+    # for the Python side: demuxers, parsers, bookkeeping. Subprocess stages are covered by RunMetrics.
+    def __init__(self, profile_path=None, trace_memory=False):
+        self.profile_path = profile_path; self.trace_memory = trace_memory
+        self._profiles = []; self._lock = threading.Lock(); self._main_profile = None
+
+    def _profile_new_thread(self, frame, event, arg):
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock: self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        if self.profile_path:
+            threading.setprofile(self._profile_new_thread)
+            self._main_profile = cProfile.Profile(); self._main_profile.enable()
+        if self.trace_memory and not tracemalloc.is_tracing(): tracemalloc.start()
+
+    def stop(self):
+        summary = {}
+        if self._main_profile:
+            threading.setprofile(None); self._main_profile.disable()
+            stats = pstats.Stats(self._main_profile)
+            with self._lock: profiles, self._profiles = self._profiles, []
+            for profile in profiles:
+                try: stats.add(profile)
+                except (TypeError, ValueError): pass # a thread that never ran Python code
+            self._main_profile = None
+            os.makedirs(os.path.dirname(os.path.abspath(self.profile_path)), exist_ok=True)
+            stats.dump_stats(self.profile_path)
+            top = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+            summary["profile_path"] = self.profile_path; summary["profiled_threads"] = len(profiles) + 1
+            summary["top_functions"] = [{"function": f"{os.path.basename(filename)}:{line}({function})", "calls": calls, "own_seconds": round(own, 4), "cumulative_seconds": round(cumulative, 4)}
+                                        for (filename, line, function), (_, calls, own, cumulative, _) in top]
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot(); current_bytes, peak_bytes = tracemalloc.get_traced_memory(); tracemalloc.stop()
+            summary["memory_current_bytes"] = current_bytes; summary["memory_peak_bytes"] = peak_bytes
+            summary["top_allocations"] = [{"line": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count} for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP_LINES]]
+        return summary
@@ -0,0 +1,126 @@
+import json
+import time
+import sqlite3
+import threading
+
+JOB_JOURNAL_FILENAME = "job_journal.sqlite3"
+JOB_JOURNAL_SCHEMA_VERSION = 2
+
+# Job states: planned -> done | failed | timed_out. A job left at 'planned' was interrupted (cancel, crash).
+JOB_DONE, JOB_FAILED, JOB_TIMED_OUT, JOB_PLANNED = 'done', 'failed', 'timed_out', 'planned'
+# File outcomes mirror the engine's summary lists; 'processed' marks a file the run has finished with.
+FILE_OUTCOME_LISTS = {'success': 'files_with_success', 'skipped': 'files_skipped', 'no_subs': 'files_with_no_subs',
+                      'timed_out': 'files_timed_out', 'error': 'files_with_errors'}
+FILE_PROCESSED = 'processed'
+RETRYABLE_FILE_OUTCOMES = {'timed_out', 'error'}
+
+
+class JobJournal:
+    # Crash-safe record of every run: the file list and options it was started with, each planned
+    # (file, stream, output format) job with its outcome and timing, and each file's outcome. Every
+    # outcome is committed as soon as it is known, so a cancelled, crashed or rebooted run can be resumed.
+    def __init__(self, db_path, keep_runs=20):
+        self.db_path = db_path
+        self.keep_runs = max(1, int(keep_runs))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is None or int(row[0]) != JOB_JOURNAL_SCHEMA_VERSION:
+            for table in ('runs', 'jobs', 'file_outcomes'): self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(JOB_JOURNAL_SCHEMA_VERSION),))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, started_at REAL NOT NULL, finished_at REAL, "
+                           "state TEXT NOT NULL, output_format TEXT NOT NULL, languages TEXT, options TEXT NOT NULL, files TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS jobs (run_id INTEGER NOT NULL, path TEXT NOT NULL, stream_index INTEGER NOT NULL, output_format TEXT NOT NULL, "
+                           "output_path TEXT, status TEXT NOT NULL, started_at REAL, finished_at REAL, PRIMARY KEY (run_id, path, stream_index, output_format))")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS file_outcomes (seq INTEGER PRIMARY KEY AUTOINCREMENT, run_id INTEGER NOT NULL, path TEXT NOT NULL, outcome TEXT NOT NULL, recorded_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS file_outcomes_run ON file_outcomes (run_id, path)")
+        self._conn.commit()
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params); self._conn.commit()
+        return cursor
+
+    def begin_run(self, files, output_format, language_filter, options=None):
+        languages = ','.join(sorted(language_filter)) if language_filter else None
+        run_id = self._write("INSERT INTO runs (started_at, state, output_format, languages, options, files) VALUES (?, 'running', ?, ?, ?, ?)",
+                             (time.time(), output_format, languages, json.dumps(options or {}), json.dumps(list(files)))).lastrowid
+        self._prune_runs()
+        return run_id
+
+    def reopen_run(self, run_id):
+        self._write("UPDATE runs SET state = 'running', finished_at = NULL WHERE run_id = ?", (run_id,))
+
+    def end_run(self, run_id, state):
+        self._write("UPDATE runs SET state = ?, finished_at = ? WHERE run_id = ?", (state, time.time(), run_id))
+
+    def get_run(self, run_id=None):
+        # The given run, or the latest run that did not finish. None if there is nothing to resume.
+        with self._lock:
+            if run_id is None: row = self._conn.execute("SELECT run_id, state, output_format, languages, options, files, started_at FROM runs WHERE state != 'finished' ORDER BY run_id DESC LIMIT 1").fetchone()
+            else: row = self._conn.execute("SELECT run_id, state, output_format, languages, options, files, started_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None: return None
+        return {'run_id': row[0], 'state': row[1], 'output_format': row[2], 'language_filter': set(row[3].split(',')) if row[3] else None,
+                'options': json.loads(row[4]), 'files': json.loads(row[5]), 'started_at': row[6]}
+
+    def list_runs(self, limit=20):
+        with self._lock:
+            rows = self._conn.execute("SELECT r.run_id, r.started_at, r.state, r.output_format, r.files, "
+                                      "(SELECT COUNT(DISTINCT path) FROM file_outcomes f WHERE f.run_id = r.run_id AND f.outcome = ?) "
+                                      "FROM runs r ORDER BY r.run_id DESC LIMIT ?", (FILE_PROCESSED, limit)).fetchall()
+        return [{'run_id': run_id, 'started_at': started_at, 'state': state, 'output_format': output_format, 'total_files': len(json.loads(files)), 'processed': processed}
+                for run_id, started_at, state, output_format, files, processed in rows]
+
+    def _prune_runs(self):
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute("SELECT run_id FROM runs ORDER BY run_id DESC LIMIT -1 OFFSET ?", (self.keep_runs,))]
+            for run_id in stale:
+                for table in ('jobs', 'file_outcomes', 'runs'): self._conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+    def plan_jobs(self, run_id, movie_file_path, output_format, jobs):
+        # Finished jobs keep their row; everything else (new, interrupted, retried) goes back to 'planned'.
+        with self._lock:
+            self._conn.executemany("INSERT INTO jobs (run_id, path, stream_index, output_format, output_path, status) VALUES (?, ?, ?, ?, ?, 'planned') "
+                                   "ON CONFLICT (run_id, path, stream_index, output_format) DO UPDATE SET status = 'planned', started_at = NULL, finished_at = NULL WHERE status != 'done'",
+                                   [(run_id, movie_file_path, job['index'], output_format, job['output_path']) for job in jobs])
+            self._conn.commit()
+
+    def finish_job(self, run_id, movie_file_path, output_format, job, status):
+        self._write("UPDATE jobs SET status = ?, started_at = ?, finished_at = ? WHERE run_id = ? AND path = ? AND stream_index = ? AND output_format = ?",
+                    (status, job.get('started_at'), time.time(), run_id, movie_file_path, job['index'], output_format))
+
+    def has_jobs(self, run_id, movie_file_path):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM jobs WHERE run_id = ? AND path = ? LIMIT 1", (run_id, movie_file_path)).fetchone() is not None
+
+    def done_streams(self, run_id, movie_file_path, output_format):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT stream_index FROM jobs WHERE run_id = ? AND path = ? AND output_format = ? AND status = 'done'",
+                                                          (run_id, movie_file_path, output_format))}
+
+    def record_file_outcome(self, run_id, movie_file_path, outcome):
+        self._write("INSERT INTO file_outcomes (run_id, path, outcome, recorded_at) VALUES (?, ?, ?, ?)", (run_id, movie_file_path, outcome, time.time()))
+
+    def file_outcomes(self, run_id, movie_file_path):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT outcome FROM file_outcomes WHERE run_id = ? AND path = ?", (run_id, movie_file_path))}
+
+    def clear_file_outcomes(self, run_id, movie_file_path):
+        self._write("DELETE FROM file_outcomes WHERE run_id = ? AND path = ?", (run_id, movie_file_path))
+
+    def run_outcomes(self, run_id):
+        # [(path, outcome)] in the order they were recorded, 'processed' markers left out.
+        with self._lock:
+            return self._conn.execute("SELECT path, outcome FROM file_outcomes WHERE run_id = ? AND outcome != ? ORDER BY seq", (run_id, FILE_PROCESSED)).fetchall()
+
+    def job_counts(self, run_id):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status", (run_id,)).fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.commit(); self._conn.close()
@@ -0,0 +1,155 @@
+import json
+import re
+
+from config import IMAGE_BASED_CODECS
+
+# One ffprobe call per movie: every subtitle stream with its tags and disposition, plus the container duration.
+# Frame counts come from what the container already records (nb_frames, mkvmerge statistics tags) rather than
+# -count_packets, which would read the whole file.
+PROBE_SHOW_ENTRIES = 'stream=index,codec_type,codec_name,nb_frames,duration:stream_tags:stream_disposition=default,forced,hearing_impaired:format=duration,format_name,size'
+_TAG_DURATION_RE = re.compile(r'^(\d+):(\d{2}):(\d{2}(?:\.\d+)?)$')
+_PROBE_SIZE_RE = re.compile(r'^\s*(\d+)\s*([kmg]?)\s*$', re.IGNORECASE)
+_PROBE_SIZE_UNITS = {'': 1, 'k': 1000, 'm': 1000 ** 2, 'g': 1000 ** 3} # ffmpeg's SI suffixes
+
+# ffmpeg/ffprobe warnings meaning the input was not read far enough to resolve every stream.
+UNRESOLVED_STREAM_HINTS = ('could not find codec parameters', "consider increasing the value for the 'analyzeduration'", 'unspecified size')
+PROBE_SIZE_ESCALATION_FACTOR = 4
+
+
+def parse_probe_size(text):
+    match = _PROBE_SIZE_RE.match(str(text))
+    if not match: raise ValueError(f"Invalid probe size '{text}' (expected e.g. 5M)")
+    return int(match.group(1)) * _PROBE_SIZE_UNITS[match.group(2).lower()]
+
+
+def format_probe_size(size):
+    for suffix, unit in (('G', 1000 ** 3), ('M', 1000 ** 2), ('k', 1000)):
+        if size >= unit and size % unit == 0: return f"{size // unit}{suffix}"
+    return str(size)
+
+
+def probe_input_args(movie_file_path, probe_size):
+    # probesize (bytes) and analyzeduration (microseconds) share one number, as the old fixed 100M did.
+    return ['-analyzeduration', str(probe_size), '-probesize', str(probe_size), '-i', movie_file_path]
+
+
+def next_probe_size(probe_size, max_probe_size):
+    # The next, deeper read, or None once max_probe_size has been tried.
+    if probe_size >= max_probe_size: return None
+    return min(probe_size * PROBE_SIZE_ESCALATION_FACTOR, max_probe_size)
+
+
+def has_unresolved_streams(stderr_text):
+    lowered = (stderr_text or '').lower()
+    return any(hint in lowered for hint in UNRESOLVED_STREAM_HINTS)
+
+
+def build_probe_command(ffprobe_path, movie_file_path, probe_size=None):
+    # -v warning rather than error: the "could not find codec parameters" hint that triggers a deeper probe is a warning.
+    probe_args = ['-analyzeduration', str(probe_size), '-probesize', str(probe_size)] if probe_size else []
+    return [ffprobe_path, '-v', 'warning'] + probe_args + ['-select_streams', 's', '-show_entries', PROBE_SHOW_ENTRIES, '-of', 'json', movie_file_path]
+
+
+def _to_int(value):
+    try: return int(value)
+    except (TypeError, ValueError): return None
+
+
+def _to_float(value):
+    try: return float(value)
+    except (TypeError, ValueError): return None
+
+
+def _tag(tags, name):
+    # Matroska statistics tags may carry a language suffix (NUMBER_OF_FRAMES-eng).
+    if name in tags: return tags[name]
+    for key, value in tags.items():
+        if key.upper().startswith(name + '-'): return value
+    return None
+
+
+def _parse_tag_duration(value):
+    match = _TAG_DURATION_RE.match(value.strip()) if value else None
+    if not match: return None
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3))
+
+
+class StreamInfo:
+    __slots__ = ('index', 'codec', 'lang', 'title', 'default', 'forced', 'hearing_impaired', 'packets', 'duration')
+
+    def __init__(self, index, codec, lang='und', title='', default=False, forced=False, hearing_impaired=False, packets=None, duration=None):
+        self.index = index; self.codec = codec; self.lang = lang; self.title = title
+        self.default = default; self.forced = forced; self.hearing_impaired = hearing_impaired
+        self.packets = packets; self.duration = duration
+
+    @property
+    def is_image_based(self):
+        return self.codec in IMAGE_BASED_CODECS
+
+    @property
+    def is_empty(self):
+        # Only trust an explicit zero; unknown counts (None) are never treated as empty.
+        return self.packets == 0
+
+    def flags_display(self):
+        flags = [name for name, is_set in (('default', self.default), ('forced', self.forced), ('SDH', self.hearing_impaired)) if is_set]
+        return ','.join(flags) or '-'
+
+    def to_list(self):
+        return [self.index, self.codec, self.lang, self.title, int(self.default), int(self.forced), int(self.hearing_impaired), self.packets, self.duration]
+
+    @classmethod
+    def from_list(cls, values):
+        index, codec, lang, title, default, forced, hearing_impaired, packets, duration = values
+        return cls(index, codec, lang, title, bool(default), bool(forced), bool(hearing_impaired), packets, duration)
+
+    def __repr__(self):
+        return f"StreamInfo(index={self.index}, codec={self.codec!r}, lang={self.lang!r}, flags={self.flags_display()}, packets={self.packets})"
+
+
+class FileInfo:
+    __slots__ = ('path', 'size', 'duration', 'format_name', 'streams', 'probe_size')
+
+    def __init__(self, path, size=None, duration=None, format_name='', streams=(), probe_size=None):
+        self.path = path; self.size = size; self.duration = duration; self.format_name = format_name
+        self.streams = list(streams)
+        self.probe_size = probe_size # probesize/analyzeduration that resolved every stream, reused by the extraction
+
+    @property
+    def languages(self):
+        return {stream.lang for stream in self.streams if stream.lang and len(stream.lang) == 3}
+
+    @property
+    def unresolved(self):
+        return any(stream.codec in ('unknown', 'none') for stream in self.streams)
+
+    def estimated_ocr_events(self):
+        return sum(stream.packets or 0 for stream in self.streams if stream.is_image_based)
+
+    def to_dict(self):
+        return {'size': self.size, 'duration': self.duration, 'format_name': self.format_name, 'streams': [stream.to_list() for stream in self.streams], 'probe_size': self.probe_size}
+
+    @classmethod
+    def from_dict(cls, path, data):
+        return cls(path, data.get('size'), data.get('duration'), data.get('format_name', ''), [StreamInfo.from_list(values) for values in data.get('streams', [])], data.get('probe_size'))
+
+
+def parse_probe_output(movie_file_path, probe_stdout):
+    data = json.loads(probe_stdout or '{}')
+    format_section = data.get('format') or {}
+    file_duration = _to_float(format_section.get('duration'))
+    streams = []
+    for raw in data.get('streams') or []:
+        if raw.get('codec_type', 'subtitle') != 'subtitle': continue
+        tags = {key.upper(): value for key, value in (raw.get('tags') or {}).items()}
+        disposition = raw.get('disposition') or {}
+        packets = _to_int(raw.get('nb_frames'))
+        if packets is None: packets = _to_int(_tag(tags, 'NUMBER_OF_FRAMES'))
+        duration = _to_float(raw.get('duration'))
+        if duration is None: duration = _parse_tag_duration(_tag(tags, 'DURATION'))
+        streams.append(StreamInfo(
+            index=_to_int(raw.get('index')), codec=(raw.get('codec_name') or 'unknown').lower(),
+            lang=(tags.get('LANGUAGE') or 'und').strip().lower() or 'und', title=tags.get('TITLE', ''),
+            default=bool(disposition.get('default')), forced=bool(disposition.get('forced')),
+            hearing_impaired=bool(disposition.get('hearing_impaired')), packets=packets, duration=duration))
+    return FileInfo(movie_file_path, _to_int(format_section.get('size')), file_duration, format_section.get('format_name', ''), streams)
@@ -0,0 +1,406 @@
+import os
+import zlib
+
+from pgs_decoder import PGS_CLOCK_HZ
+from subtitle_model import ASS_EVENTS_HEADER, events_to_srt, format_ass_time
+
+# Pure-Python Matroska reader that pulls subtitle tracks out of an .mkv without streaming the whole file.
+# Metadata comes from the elements before the first Cluster (and SeekHead for anything placed after them).
+# Subtitle blocks are then either read directly through the Cues, when the Cues index every block of the
+# wanted tracks, or found by walking cluster and block headers and skipping the audio/video payloads.
+# Anything it does not understand raises MatroskaError and the caller falls back to ffmpeg.
+EBML_HEADER, SEGMENT, SEEK_HEAD, SEEK, SEEK_ID, SEEK_POSITION = 0x1A45DFA3, 0x18538067, 0x114D9B74, 0x4DBB, 0x53AB, 0x53AC
+INFO, TIMESTAMP_SCALE = 0x1549A966, 0x2AD7B1
+TRACKS, TRACK_ENTRY, TRACK_NUMBER, TRACK_TYPE, CODEC_ID, CODEC_PRIVATE, LANGUAGE = 0x1654AE6B, 0xAE, 0xD7, 0x83, 0x86, 0x63A2, 0x22B59C
+CONTENT_ENCODINGS, CONTENT_ENCODING, CONTENT_ENCODING_SCOPE, CONTENT_ENCODING_TYPE = 0x6D80, 0x6240, 0x5032, 0x5033
+CONTENT_COMPRESSION, CONTENT_COMP_ALGO, CONTENT_COMP_SETTINGS = 0x5034, 0x4254, 0x4255
+CUES, CUE_POINT, CUE_TIME, CUE_TRACK_POSITIONS, CUE_TRACK, CUE_CLUSTER_POSITION, CUE_RELATIVE_POSITION = 0x1C53BB6B, 0xBB, 0xB3, 0xB7, 0xF7, 0xF1, 0xF0
+CLUSTER, CLUSTER_TIMESTAMP, SIMPLE_BLOCK, BLOCK_GROUP, BLOCK, BLOCK_DURATION = 0x1F43B675, 0xE7, 0xA3, 0xA0, 0xA1, 0x9B
+CRC32, VOID = 0xBF, 0xEC
+LEVEL1_IDS = {SEEK_HEAD, INFO, TRACKS, CUES, CLUSTER, 0x1941A469, 0x1043A770, 0x1254C367} # + Attachments, Chapters, Tags
+TRACK_TYPE_SUBTITLE = 0x11
+COMP_ZLIB, COMP_HEADER_STRIP = 0, 3
+READ_WINDOW = 4096 # block headers that sit close together share one read; bigger payloads we skip are never fetched
+MAX_ELEMENT_HEADER = 12
+DEFAULT_TIMESTAMP_SCALE = 1000000 # ns per tick
+LAST_EVENT_DURATION = 5.0
+
+# ffprobe codec name -> Matroska CodecID, and the formats that can be written without converting.
+MKV_CODEC_IDS = {'subrip': 'S_TEXT/UTF8', 'srt': 'S_TEXT/UTF8', 'ass': 'S_TEXT/ASS', 'hdmv_pgs_subtitle': 'S_HDMV/PGS'}
+NATIVE_OUTPUT_FORMATS = {'S_TEXT/UTF8': 'srt', 'S_TEXT/ASS': 'ass', 'S_HDMV/PGS': 'sup'}
+
+
+class MatroskaError(ValueError):
+    pass
+
+
+def _vint(data, pos, keep_marker=False):
+    if pos >= len(data): raise MatroskaError("Truncated EBML element")
+    first = data[pos]
+    if not first: raise MatroskaError("Invalid EBML variable-size integer")
+    length = 9 - first.bit_length()
+    if pos + length > len(data): raise MatroskaError("Truncated EBML element")
+    value = first if keep_marker else first & (0xFF >> length)
+    for offset in range(1, length): value = (value << 8) | data[pos + offset]
+    return value, length
+
+
+def _uint(payload):
+    return int.from_bytes(payload, 'big')
+
+
+def _children(data):
+    # (id, payload) of every child element inside an in-memory master element.
+    pos = 0; children = []
+    while pos < len(data):
+        element_id, id_length = _vint(data, pos, keep_marker=True)
+        size, size_length = _vint(data, pos + id_length)
+        start = pos + id_length + size_length
+        children.append((element_id, data[start:start + size])); pos = start + size
+    return children
+
+
+def _first(children, element_id, default=None):
+    for child_id, payload in children:
+        if child_id == element_id: return payload
+    return default
+
+
+class _WindowedFile:
+    def __init__(self, path):
+        self.file = open(path, 'rb', buffering=0)
+        self.size = os.fstat(self.file.fileno()).st_size
+        # We jump over most of the file; kernel read-ahead would fetch the skipped payloads anyway.
+        if hasattr(os, 'posix_fadvise'):
+            try: os.posix_fadvise(self.file.fileno(), 0, 0, os.POSIX_FADV_RANDOM)
+            except OSError: pass
+        self.buffer = b''; self.buffer_start = 0; self.bytes_read = 0; self.reads = 0
+
+    def _fetch(self, offset, length):
+        self.file.seek(offset); data = self.file.read(length)
+        self.bytes_read += len(data); self.reads += 1
+        return data
+
+    def read_at(self, offset, length):
+        buffer_offset = offset - self.buffer_start
+        if 0 <= buffer_offset and buffer_offset + length <= len(self.buffer): return self.buffer[buffer_offset:buffer_offset + length]
+        # Keep whatever part of the request the window already holds and only fetch the rest.
+        head = self.buffer[buffer_offset:] if 0 <= buffer_offset < len(self.buffer) else b''
+        self.buffer = head + self._fetch(offset + len(head), max(READ_WINDOW, length - len(head))); self.buffer_start = offset
+        return self.buffer[:length]
+
+    def element_header(self, offset):
+        # (id, data size or None if unknown, header length) of the element at offset.
+        data = self.read_at(offset, min(MAX_ELEMENT_HEADER, self.size - offset))
+        element_id, id_length = _vint(data, 0, keep_marker=True)
+        size, size_length = _vint(data, id_length)
+        if size == (1 << (7 * size_length)) - 1: size = None
+        return element_id, size, id_length + size_length
+
+    def close(self):
+        self.file.close()
+
+
+class SubtitleTrack:
+    __slots__ = ('number', 'codec_id', 'codec_private', 'language', 'header_strip', 'zlib_frames')
+
+    def __init__(self, number, codec_id, codec_private, language):
+        self.number = number; self.codec_id = codec_id; self.codec_private = codec_private; self.language = language
+        self.header_strip = b''; self.zlib_frames = False
+
+    @property
+    def output_format(self):
+        return NATIVE_OUTPUT_FORMATS.get(self.codec_id)
+
+    def decode_frame(self, frame):
+        if self.zlib_frames:
+            try: frame = zlib.decompress(frame)
+            except zlib.error as e: raise MatroskaError(f"Bad zlib frame in track {self.number}: {e}")
+        return self.header_strip + frame if self.header_strip else frame
+
+
+class MatroskaReader:
+    def __init__(self, path):
+        self.path = path
+        self.source = _WindowedFile(path)
+        self.timestamp_scale = DEFAULT_TIMESTAMP_SCALE
+        self.subtitle_tracks = []; self.mode = None
+        self._cues = None; self._cues_position = None
+        try:
+            self._read_metadata()
+        except Exception:
+            self.source.close(); raise
+
+    @property
+    def bytes_read(self):
+        return self.source.bytes_read
+
+    @property
+    def file_size(self):
+        return self.source.size
+
+    def _read_element(self, offset, size):
+        if size is None or size > self.source.size: raise MatroskaError(f"Element at {offset} has an unusable size")
+        return self.source.read_at(offset, size)
+
+    def _read_metadata(self):
+        element_id, size, header_length = self.source.element_header(0)
+        if element_id != EBML_HEADER: raise MatroskaError("Not a Matroska file")
+        position = header_length + size
+        element_id, size, header_length = self.source.element_header(position)
+        if element_id != SEGMENT: raise MatroskaError("No Segment element")
+        self.segment_start = position + header_length
+        self.segment_end = self.source.size if size is None else min(self.source.size, self.segment_start + size)
+        seek_positions = {}; found = set()
+        position = self.segment_start
+        while position < self.segment_end:
+            element_id, size, header_length = self.source.element_header(position)
+            if element_id == CLUSTER: break
+            data_start = position + header_length
+            if element_id == SEEK_HEAD:
+                for seek_id, payload in _children(self._read_element(data_start, size)):
+                    if seek_id != SEEK: continue
+                    seek = _children(payload)
+                    target_id = _first(seek, SEEK_ID); target_position = _first(seek, SEEK_POSITION)
+                    if target_id and target_position is not None: seek_positions.setdefault(_uint(target_id), self.segment_start + _uint(target_position))
+            elif element_id in (INFO, TRACKS, CUES):
+                self._parse_level1(element_id, self._read_element(data_start, size)); found.add(element_id)
+            if size is None: raise MatroskaError(f"Unknown-size element {element_id:#x} before the first Cluster")
+            position = data_start + size
+        self.first_cluster = position
+        for element_id in (INFO, TRACKS):
+            if element_id in found: continue
+            if element_id not in seek_positions:
+                if element_id == TRACKS: raise MatroskaError("No Tracks element")
+                continue
+            self._parse_level1(element_id, self._read_level1(seek_positions[element_id], element_id))
+        if CUES not in found and CUES in seek_positions: self._cues_position = seek_positions[CUES]
+
+    def _read_level1(self, position, expected_id):
+        element_id, size, header_length = self.source.element_header(position)
+        if element_id != expected_id: raise MatroskaError(f"SeekHead points at {element_id:#x} instead of {expected_id:#x}")
+        return self._read_element(position + header_length, size)
+
+    def _parse_level1(self, element_id, data):
+        if element_id == INFO:
+            scale = _first(_children(data), TIMESTAMP_SCALE)
+            if scale: self.timestamp_scale = _uint(scale)
+        elif element_id == TRACKS:
+            self.subtitle_tracks = [track for track in (self._parse_track(_children(payload)) for entry_id, payload in _children(data) if entry_id == TRACK_ENTRY) if track]
+        elif element_id == CUES:
+            self._cues = data
+
+    def _parse_track(self, fields):
+        if _uint(_first(fields, TRACK_TYPE, b'\0')) != TRACK_TYPE_SUBTITLE: return None
+        track = SubtitleTrack(_uint(_first(fields, TRACK_NUMBER, b'\0')), _first(fields, CODEC_ID, b'').decode('ascii', 'replace').rstrip('\0'),
+                              _first(fields, CODEC_PRIVATE, b''), _first(fields, LANGUAGE, b'eng').decode('ascii', 'replace').rstrip('\0'))
+        encodings = _first(fields, CONTENT_ENCODINGS)
+        if encodings is None: return track
+        for encoding_id, encoding_payload in _children(encodings):
+            if encoding_id != CONTENT_ENCODING: continue
+            encoding = _children(encoding_payload)
+            scope = _uint(_first(encoding, CONTENT_ENCODING_SCOPE, b'\x01'))
+            if _uint(_first(encoding, CONTENT_ENCODING_TYPE, b'\0')) != 0:
+                track.codec_id = 'encrypted'; continue # never written natively
+            compression = _children(_first(encoding, CONTENT_COMPRESSION, b''))
+            algorithm = _uint(_first(compression, CONTENT_COMP_ALGO, b'\0'))
+            if algorithm == COMP_HEADER_STRIP:
+                if scope & 1: track.header_strip = _first(compression, CONTENT_COMP_SETTINGS, b'')
+            elif algorithm == COMP_ZLIB:
+                if scope & 1: track.zlib_frames = True
+                if scope & 2 and track.codec_private:
+                    try: track.codec_private = zlib.decompress(track.codec_private)
+                    except zlib.error as e: raise MatroskaError(f"Bad zlib CodecPrivate in track {track.number}: {e}")
+            else:
+                track.codec_id = 'unsupported-compression'
+        return track
+
+    def _cue_positions(self, track_numbers):
+        # {track: [(cluster position, relative position)]} from the Cues, for the tracks that have relative positions.
+        if self._cues is None and self._cues_position is not None:
+            self._cues = self._read_level1(self._cues_position, CUES)
+        positions = {number: [] for number in track_numbers}; incomplete = set()
+        for point_id, point_payload in _children(self._cues or b''):
+            if point_id != CUE_POINT: continue
+            for field_id, field_payload in _children(point_payload):
+                if field_id != CUE_TRACK_POSITIONS: continue
+                cue = _children(field_payload)
+                track = _uint(_first(cue, CUE_TRACK, b'\0'))
+                if track not in positions: continue
+                relative = _first(cue, CUE_RELATIVE_POSITION)
+                if relative is None: incomplete.add(track); continue
+                positions[track].append((self.segment_start + _uint(_first(cue, CUE_CLUSTER_POSITION, b'\0')), _uint(relative)))
+        return {track: entries for track, entries in positions.items() if track not in incomplete}
+
+    @staticmethod
+    def _parse_block(data):
+        # (track, relative timestamp, frames) of a SimpleBlock/Block payload, with lacing undone.
+        track, length = _vint(data, 0)
+        if length + 3 > len(data): raise MatroskaError("Truncated block")
+        relative = int.from_bytes(data[length:length + 2], 'big', signed=True); flags = data[length + 2]
+        position = length + 3; lacing = (flags >> 1) & 3
+        if not lacing: return track, relative, [data[position:]]
+        if position >= len(data): raise MatroskaError("Truncated lace header")
+        count = data[position] + 1; position += 1; sizes = []
+        if lacing == 1: # Xiph
+            for _ in range(count - 1):
+                size = 0
+                while True:
+                    if position >= len(data): raise MatroskaError("Truncated Xiph lace sizes")
+                    byte = data[position]; position += 1; size += byte
+                    if byte != 255: break
+                sizes.append(size)
+        elif lacing == 3: # EBML: first size, then signed differences
+            size, length = _vint(data, position); position += length; sizes.append(size)
+            for _ in range(count - 2):
+                raw, length = _vint(data, position); position += length
+                size += raw - ((1 << (7 * length - 1)) - 1); sizes.append(size)
+        else: # fixed
+            sizes = [(len(data) - position) // count] * (count - 1)
+        if min(sizes, default=0) < 0 or sum(sizes) > len(data) - position: raise MatroskaError("Lace sizes run past the end of the block")
+        frames = []
+        for size in sizes:
+            frames.append(data[position:position + size]); position += size
+        frames.append(data[position:])
+        return track, relative, frames
+
+    def _block_event(self, element_id, payload, cluster_timestamp, wanted, events):
+        duration = None
+        if element_id == BLOCK_GROUP:
+            group = _children(payload)
+            block = _first(group, BLOCK)
+            if block is None: return
+            raw_duration = _first(group, BLOCK_DURATION)
+            if raw_duration is not None: duration = _uint(raw_duration)
+            payload = block
+        track, relative, frames = self._parse_block(payload)
+        if track not in wanted: return
+        decoder = wanted[track]
+        for frame in frames: events[track].append((cluster_timestamp + relative, duration, decoder.decode_frame(frame)))
+
+    def _peek_block_track(self, element_id, data_start, size):
+        # Track number of a SimpleBlock/BlockGroup from its first few bytes only.
+        if element_id == SIMPLE_BLOCK: return _vint(self.source.read_at(data_start, min(8, size)), 0)[0]
+        position = data_start; end = data_start + size
+        while position < end:
+            child_id, child_size, header_length = self.source.element_header(position)
+            if child_size is None: raise MatroskaError("Unknown-size element inside a BlockGroup")
+            if child_id == BLOCK: return _vint(self.source.read_at(position + header_length, min(8, child_size)), 0)[0]
+            position += header_length + child_size
+        return None
+
+    def _scan_clusters(self, wanted, events):
+        position = self.first_cluster
+        while position < self.segment_end and self.segment_end - position >= 2:
+            element_id, size, header_length = self.source.element_header(position)
+            if element_id != CLUSTER:
+                if size is None: raise MatroskaError(f"Unknown-size element {element_id:#x} between Clusters")
+                position += header_length + size; continue
+            position = self._scan_cluster(position + header_length, size, wanted, events)
+
+    def _scan_cluster(self, data_start, size, wanted, events):
+        cluster_end = self.segment_end if size is None else data_start + size
+        cluster_timestamp = 0; position = data_start
+        while position < cluster_end and cluster_end - position >= 2:
+            element_id, child_size, header_length = self.source.element_header(position)
+            if size is None and element_id in LEVEL1_IDS: return position # end of a live-style unknown-size cluster
+            if child_size is None: raise MatroskaError("Unknown-size element inside a Cluster")
+            child_start = position + header_length
+            if element_id == CLUSTER_TIMESTAMP:
+                cluster_timestamp = _uint(self.source.read_at(child_start, child_size))
+            elif element_id in (SIMPLE_BLOCK, BLOCK_GROUP) and self._peek_block_track(element_id, child_start, child_size) in wanted:
+                self._block_event(element_id, self.source.read_at(child_start, child_size), cluster_timestamp, wanted, events)
+            position = child_start + child_size
+        return cluster_end
+
+    def _cluster_timestamp(self, data_start):
+        position = data_start
+        while True:
+            element_id, size, header_length = self.source.element_header(position)
+            if element_id == CLUSTER_TIMESTAMP: return _uint(self.source.read_at(position + header_length, size))
+            if element_id not in (CRC32, VOID) or size is None: raise MatroskaError("Cluster does not start with its Timestamp")
+            position += header_length + size
+
+    def _read_cued_blocks(self, cue_positions, wanted, events):
+        cluster_timestamps = {}
+        for track, entries in cue_positions.items():
+            for cluster_position, relative_position in entries:
+                element_id, size, header_length = self.source.element_header(cluster_position)
+                if element_id != CLUSTER: raise MatroskaError("Cue points outside a Cluster")
+                data_start = cluster_position + header_length
+                if cluster_position not in cluster_timestamps: cluster_timestamps[cluster_position] = self._cluster_timestamp(data_start)
+                block_id, block_size, block_header = self.source.element_header(data_start + relative_position)
+                if block_id not in (SIMPLE_BLOCK, BLOCK_GROUP) or block_size is None: raise MatroskaError("Cue relative position does not point at a block")
+                before = len(events[track])
+                self._block_event(block_id, self.source.read_at(data_start + relative_position + block_header, block_size), cluster_timestamps[cluster_position], {track: wanted[track]}, events)
+                if len(events[track]) == before: raise MatroskaError("Cue points at a block of another track")
+
+    def extract(self, targets):
+        # targets: {track number: (output path, expected block count or None)}. Writes each track in its native
+        # format (SRT/ASS/SUP) and returns {track number: events written}. The Cues are only trusted for a
+        # track when their entry count matches the block count the container statistics report.
+        tracks = {track.number: track for track in self.subtitle_tracks}
+        wanted = {number: tracks[number] for number in targets if number in tracks and tracks[number].output_format}
+        events = {number: [] for number in wanted}
+        if not wanted: return {}
+        cue_positions = self._cue_positions(wanted) if self._cues is not None or self._cues_position is not None else {}
+        if wanted and all(targets[number][1] and len(cue_positions.get(number, ())) == targets[number][1] for number in wanted):
+            self.mode = 'cues'
+            try:
+                self._read_cued_blocks(cue_positions, wanted, events)
+            except MatroskaError:
+                events = {number: [] for number in wanted}; self.mode = 'scan'; self._scan_clusters(wanted, events)
+        else:
+            self.mode = 'scan'; self._scan_clusters(wanted, events)
+        written = {}
+        for number, track in wanted.items():
+            if not events[number]: written[number] = 0; continue
+            self._write_track(track, events[number], targets[number][0]); written[number] = len(events[number])
+        return written
+
+    def _seconds(self, ticks):
+        return ticks * self.timestamp_scale / 1e9
+
+    def _timed_events(self, raw_events):
+        # [(start s, end s, payload)] sorted by start; a missing BlockDuration ends at the next event.
+        raw_events = sorted(raw_events, key=lambda event: event[0]); timed = []
+        for index, (start, duration, payload) in enumerate(raw_events):
+            if duration is not None: end = self._seconds(start + duration)
+            elif index + 1 < len(raw_events): end = self._seconds(raw_events[index + 1][0])
+            else: end = self._seconds(start) + LAST_EVENT_DURATION
+            timed.append((self._seconds(start), end, payload))
+        return timed
+
+    def _write_track(self, track, raw_events, output_path):
+        timed = self._timed_events(raw_events)
+        if track.output_format == 'sup':
+            with open(output_path, 'wb') as output_file:
+                for start, _end, payload in timed: output_file.write(_pgs_segments(payload, int(round(start * PGS_CLOCK_HZ))))
+            return
+        if track.output_format == 'srt':
+            texts = [(start, end, payload.decode('utf-8', 'replace').replace('\r\n', '\n').strip()) for start, end, payload in timed]
+            with open(output_path, 'w', encoding='utf-8') as output_file: output_file.write(events_to_srt([event for event in texts if event[2]]))
+            return
+        header = track.codec_private.decode('utf-8', 'replace').replace('\r\n', '\n').rstrip('\0').rstrip('\n') + '\n'
+        if '[Events]' not in header: header += '\n' + ASS_EVENTS_HEADER
+        dialogue = []
+        for start, end, payload in timed:
+            # Matroska stores "ReadOrder,Layer,Style,Name,MarginL,MarginR,MarginV,Effect,Text" per block.
+            fields = payload.decode('utf-8', 'replace').split(',', 8)
+            if len(fields) < 9: raise MatroskaError(f"Malformed ASS block in track {track.number}")
+            read_order = int(fields[0]) if fields[0].strip().isdigit() else 0
+            dialogue.append((start, read_order, f"Dialogue: {fields[1]},{format_ass_time(start)},{format_ass_time(end)},{','.join(fields[2:])}"))
+        dialogue.sort(key=lambda line: (line[0], line[1]))
+        with open(output_path, 'w', encoding='utf-8') as output_file: output_file.write(header + ''.join(line + '\n' for _, _, line in dialogue))
+
+    def close(self):
+        self.source.close()
+
+
+def _pgs_segments(payload, pts):
+    # A Matroska PGS block holds bare segments; .sup files prefix each one with "PG", PTS and DTS.
+    out = bytearray(); position = 0; prefix = b'PG' + pts.to_bytes(4, 'big') * 2 # DTS = PTS, as ffmpeg writes it
+    while position + 3 <= len(payload):
+        segment_size = int.from_bytes(payload[position + 1:position + 3], 'big')
+        out += prefix + payload[position:position + 3 + segment_size]; position += 3 + segment_size
+    return bytes(out)
@@ -0,0 +1,247 @@
+import os
+import struct
+
+from subtitle_model import events_to_srt, events_to_vtt
+
+# MP4/MOV timed-text (tx3g / mov_text) reader. Everything it needs is in the moov box: the sample tables
+# (stts, stsc, stsz, stco/co64) give each subtitle sample's time, offset and size, so only those byte ranges
+# of mdat are read (neighbouring samples in one read). Fragmented files, unusual edit lists and other sample
+# formats raise Mp4Error and the caller falls back to ffmpeg.
+BOX_HEADER = struct.Struct('>I4s')
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'dinf'}
+TEXT_HANDLERS = {b'text', b'sbtl'}
+TEXT_SAMPLE_ENTRIES = {b'tx3g', b'text'}
+COALESCE_GAP = 64 * 1024 # read across gaps smaller than this instead of issuing another read
+MAX_COALESCED_READ = 4 * 1024 * 1024
+MP4_CODECS = {'mov_text'}
+NATIVE_OUTPUT_FORMATS = ('srt', 'vtt')
+STYLE_TAGS = ((1, 'b'), (2, 'i'), (4, 'u')) # tx3g face style flags
+
+
+class Mp4Error(ValueError):
+    pass
+
+
+def _boxes(data, start=0, end=None):
+    # (type, payload start, payload end) of each box in data[start:end].
+    end = len(data) if end is None else end; position = start
+    while position + 8 <= end:
+        size, box_type = BOX_HEADER.unpack_from(data, position); header = 8
+        if size == 1: size = struct.unpack_from('>Q', data, position + 8)[0]; header = 16
+        elif size == 0: size = end - position
+        if size < header or position + size > end: raise Mp4Error(f"Corrupt '{box_type.decode('latin-1')}' box")
+        yield box_type, position + header, position + size
+        position += size
+
+
+def _unpack(layout, data, offset, end):
+    # struct.unpack_from that must stay inside its box (end), so a short box is an Mp4Error and not its neighbour's bytes.
+    if offset < 0 or offset + struct.calcsize(layout) > end: raise Mp4Error("Box is shorter than its fields")
+    return struct.unpack_from(layout, data, offset)
+
+
+def _child(data, start, end, box_type):
+    for child_type, child_start, child_end in _boxes(data, start, end):
+        if child_type == box_type: return child_start, child_end
+    return None
+
+
+def _path(data, start, end, *box_types):
+    for box_type in box_types:
+        found = _child(data, start, end, box_type)
+        if found is None: return None
+        start, end = found
+    return start, end
+
+
+class TextTrack:
+    __slots__ = ('number', 'language', 'timescale', 'samples', 'time_offset')
+
+    def __init__(self, number, language, timescale, samples, time_offset):
+        self.number = number; self.language = language; self.timescale = timescale
+        self.samples = samples # [(start ticks, duration ticks, file offset, size)]
+        self.time_offset = time_offset # seconds added by the edit list
+
+
+class Mp4Reader:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb', buffering=0)
+        self.file_size = os.fstat(self.file.fileno()).st_size
+        self.bytes_read = 0; self.reads = 0; self.mode = 'sample tables'
+        self.tracks = {} # stream index (trak order, as ffprobe numbers them) -> TextTrack
+        try:
+            self._read_moov()
+        except (struct.error, IndexError, TypeError) as e:
+            # Anything malformed is an Mp4Error, which the caller answers by handing the file to ffmpeg.
+            self.file.close(); raise Mp4Error(f"Corrupt moov box ({e})") from e
+        except Exception:
+            self.file.close(); raise
+
+    def _read(self, offset, length):
+        self.file.seek(offset); data = self.file.read(length)
+        self.bytes_read += len(data); self.reads += 1
+        if len(data) != length: raise Mp4Error("File is shorter than its sample tables say")
+        return data
+
+    def _read_moov(self):
+        # Walk the top-level box headers (skipping mdat) until moov, then read only moov.
+        position = 0
+        while position + 8 <= self.file_size:
+            header = self._read(position, 16 if position + 16 <= self.file_size else 8)
+            size, box_type = BOX_HEADER.unpack_from(header)
+            header_length = 8
+            if size == 1: size = struct.unpack_from('>Q', header, 8)[0]; header_length = 16
+            elif size == 0: size = self.file_size - position
+            if size < header_length: raise Mp4Error("Corrupt top-level box")
+            if box_type == b'moof': raise Mp4Error("Fragmented MP4")
+            if box_type == b'moov':
+                self._parse_moov(self._read(position + header_length, size - header_length)); return
+            position += size
+        raise Mp4Error("No moov box")
+
+    def _parse_moov(self, moov):
+        if _child(moov, 0, len(moov), b'mvex'): raise Mp4Error("Fragmented MP4")
+        movie_timescale = 1000
+        mvhd = _child(moov, 0, len(moov), b'mvhd')
+        if mvhd:
+            version = _unpack('>B', moov, mvhd[0], mvhd[1])[0]
+            movie_timescale = _unpack('>I', moov, mvhd[0] + (20 if version == 1 else 12), mvhd[1])[0] or 1000
+        stream_index = 0
+        for box_type, start, end in _boxes(moov):
+            if box_type != b'trak': continue
+            try:
+                track = self._parse_trak(moov, start, end, stream_index, movie_timescale)
+                if track: self.tracks[stream_index] = track
+            except Mp4Error as e:
+                self.tracks[stream_index] = e # only an error if that track is asked for
+            except (struct.error, IndexError, TypeError) as e:
+                self.tracks[stream_index] = Mp4Error(f"Corrupt track {stream_index} ({e})")
+            stream_index += 1
+
+    def _parse_trak(self, moov, start, end, stream_index, movie_timescale):
+        hdlr = _path(moov, start, end, b'mdia', b'hdlr')
+        if hdlr is None or moov[hdlr[0] + 8:hdlr[0] + 12] not in TEXT_HANDLERS: return None
+        mdhd = _path(moov, start, end, b'mdia', b'mdhd')
+        if mdhd is None: raise Mp4Error("Text track without a media header")
+        version = _unpack('>B', moov, mdhd[0], mdhd[1])[0]
+        timescale_at = mdhd[0] + (20 if version == 1 else 12)
+        timescale = _unpack('>I', moov, timescale_at, mdhd[1])[0]
+        packed_language = _unpack('>H', moov, timescale_at + (12 if version == 1 else 8), mdhd[1])[0]
+        language = ''.join(chr(((packed_language >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+        stbl = _path(moov, start, end, b'mdia', b'minf', b'stbl')
+        if stbl is None or not timescale: raise Mp4Error("Text track without sample tables")
+        stsd = _child(moov, *stbl, b'stsd')
+        if stsd is None: raise Mp4Error("Text track without sample descriptions")
+        entry_count = _unpack('>I', moov, stsd[0] + 4, stsd[1])[0]
+        sample_entry = moov[stsd[0] + 12:stsd[0] + 16]
+        if entry_count != 1 or sample_entry not in TEXT_SAMPLE_ENTRIES: raise Mp4Error(f"Unsupported text sample format '{sample_entry.decode('latin-1')}'")
+        return TextTrack(stream_index, language, timescale, self._sample_table(moov, stbl), self._edit_offset(moov, start, end, timescale, movie_timescale))
+
+    @staticmethod
+    def _edit_offset(moov, start, end, timescale, movie_timescale):
+        # Supports the common edit lists: none, one plain edit, or an empty edit (delay) followed by one plain edit.
+        elst = _path(moov, start, end, b'edts', b'elst')
+        if elst is None: return 0.0
+        version = moov[elst[0]]; count = struct.unpack_from('>I', moov, elst[0] + 4)[0]
+        entry_format = '>QqhH' if version == 1 else '>IihH'; entry_size = struct.calcsize(entry_format)
+        entries = [_unpack(entry_format, moov, elst[0] + 8 + i * entry_size, elst[1]) for i in range(count)]
+        offset = 0.0
+        if entries and entries[0][1] == -1:
+            offset = entries[0][0] / movie_timescale; entries = entries[1:]
+        if len(entries) > 1 or (entries and (entries[0][2] != 1 or entries[0][3] != 0)): raise Mp4Error("Unsupported edit list")
+        if entries: offset -= entries[0][1] / timescale
+        return offset
+
+    @staticmethod
+    def _sample_table(moov, stbl):
+        def table(box_type, entry_size):
+            # (first entry, entry count), checked against the box size.
+            found = _child(moov, *stbl, box_type)
+            if found is None: return None
+            count = _unpack('>I', moov, found[0] + 4, found[1])[0]
+            if found[0] + 8 + count * entry_size > found[1]: raise Mp4Error(f"'{box_type.decode('latin-1')}' is shorter than its entry count")
+            return found[0] + 8, count
+        stts, stsc, stsz = table(b'stts', 8), table(b'stsc', 12), _child(moov, *stbl, b'stsz')
+        chunk_table = table(b'stco', 4); offset_format = '>I'
+        if chunk_table is None: chunk_table = table(b'co64', 8); offset_format = '>Q'
+        if None in (stts, stsc, stsz, chunk_table): raise Mp4Error("Incomplete sample table")
+        uniform_size, sample_count = _unpack('>II', moov, stsz[0] + 4, stsz[1])
+        sizes = [uniform_size] * sample_count if uniform_size else list(_unpack(f'>{sample_count}I', moov, stsz[0] + 12, stsz[1]))
+        chunk_offsets = list(struct.unpack_from(f'>{chunk_table[1]}{offset_format[1]}', moov, chunk_table[0]))
+        durations = []
+        for i in range(stts[1]):
+            run_count, delta = struct.unpack_from('>II', moov, stts[0] + i * 8); durations.extend([delta] * run_count)
+        chunk_runs = [struct.unpack_from('>III', moov, stsc[0] + i * 12) for i in range(stsc[1])]
+        if len(durations) < sample_count: raise Mp4Error("stts covers fewer samples than stsz")
+        samples = []; sample = 0; time = 0
+        for run, (first_chunk, samples_per_chunk, _description) in enumerate(chunk_runs):
+            last_chunk = chunk_runs[run + 1][0] - 1 if run + 1 < len(chunk_runs) else len(chunk_offsets)
+            if not 0 < first_chunk <= last_chunk + 1 or last_chunk > len(chunk_offsets): raise Mp4Error("stsc refers to a chunk stco does not have")
+            for chunk in range(first_chunk - 1, last_chunk):
+                offset = chunk_offsets[chunk]
+                for _ in range(samples_per_chunk):
+                    if sample >= sample_count: break
+                    samples.append((time, durations[sample], offset, sizes[sample]))
+                    offset += sizes[sample]; time += durations[sample]; sample += 1
+        if sample != sample_count: raise Mp4Error("stsc/stco do not account for every sample")
+        return samples
+
+    def _read_samples(self, samples):
+        # {file offset: bytes} for every sample, merging nearby ranges into one read.
+        ranges = sorted((offset, size) for _, _, offset, size in samples if size)
+        data = {}; index = 0
+        while index < len(ranges):
+            run_start, size = ranges[index]; run_end = run_start + size; last = index
+            while last + 1 < len(ranges) and ranges[last + 1][0] - run_end <= COALESCE_GAP and ranges[last + 1][0] + ranges[last + 1][1] - run_start <= MAX_COALESCED_READ:
+                last += 1; run_end = max(run_end, ranges[last][0] + ranges[last][1])
+            block = self._read(run_start, run_end - run_start)
+            for offset, size in ranges[index:last + 1]: data[offset] = block[offset - run_start:offset - run_start + size]
+            index = last + 1
+        return data
+
+    def extract(self, targets):
+        # targets: {stream index: (output path, output format 'srt'/'vtt')}. Returns {stream index: cues written}.
+        written = {}
+        for stream_index, (output_path, output_format) in targets.items():
+            track = self.tracks.get(stream_index)
+            if isinstance(track, Exception): raise track
+            if track is None: raise Mp4Error(f"Stream {stream_index} is not a timed-text track")
+            sample_data = self._read_samples(track.samples); events = []
+            for start, duration, offset, size in track.samples:
+                text = decode_tx3g_sample(sample_data.get(offset, b'')) if size else ''
+                if text: events.append((start / track.timescale + track.time_offset, (start + duration) / track.timescale + track.time_offset, text))
+            written[stream_index] = len(events)
+            if not events: continue
+            with open(output_path, 'w', encoding='utf-8') as output_file:
+                output_file.write(events_to_vtt(events) if output_format == 'vtt' else events_to_srt(events))
+        return written
+
+    def close(self):
+        self.file.close()
+
+
+def decode_tx3g_sample(sample):
+    # 16-bit length, the text, then optional modifier boxes; 'styl' runs become <b>/<i>/<u> tags.
+    if len(sample) < 2: return ''
+    text_length = struct.unpack_from('>H', sample)[0]
+    raw = sample[2:2 + text_length]
+    text = raw.decode('utf-16') if raw[:2] in (b'\xfe\xff', b'\xff\xfe') else raw.decode('utf-8', 'replace')
+    styles = []
+    try:
+        for box_type, start, end in _boxes(sample, 2 + text_length):
+            if box_type != b'styl': continue
+            for i in range(struct.unpack_from('>H', sample, start)[0]):
+                first_char, last_char, _font, flags = struct.unpack_from('>HHHB', sample, start + 2 + i * 12)
+                if flags & 7 and first_char < last_char: styles.append((first_char, min(last_char, len(text)), flags))
+    except (Mp4Error, struct.error):
+        styles = [] # broken modifier boxes: keep the plain text
+    if styles:
+        opening = {}; closing = {}
+        for first_char, last_char, flags in styles:
+            for bit, tag in STYLE_TAGS:
+                if flags & bit:
+                    opening.setdefault(first_char, []).append(tag); closing.setdefault(last_char, []).insert(0, tag)
+        text = ''.join(''.join(f"</{tag}>" for tag in closing.get(i, ())) + ''.join(f"<{tag}>" for tag in opening.get(i, ())) + char for i, char in enumerate(text)) \
+            + ''.join(f"</{tag}>" for tag in closing.get(len(text), ()))
+    return text.replace('\r\n', '\n').strip()
@@ -0,0 +1,236 @@
+import os
+import json
+import queue
+import shlex
+import shutil
+import tempfile
+import threading
+import subprocess
+
+from process_supervisor import SUPERVISOR
+
+# Track-level OCR backends: recognize_tracks(requests) turns staged image-subtitle files into SRT files and
+# returns one status per request, so one bad track never fails the others. 'template' (one shell command per
+# track) is the original runner and the fallback; 'batch' hands every track of a movie to one tool launch;
+# 'worker' keeps long-lived OCR processes around and feeds them one JSON request per line over stdin.
+OCR_OK, OCR_FAILED, OCR_TIMED_OUT = 'done', 'failed', 'timed_out'
+NO_WINDOW = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+
+
+class OcrRequest:
+    __slots__ = ('input_path', 'output_srt_path', 'lang')
+
+    def __init__(self, input_path, output_srt_path, lang):
+        self.input_path = input_path; self.output_srt_path = output_srt_path; self.lang = lang
+
+
+def _output_ok(path):
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def _ocr_timeout(base_seconds, per_mb_seconds, paths):
+    # The allowance grows with the staged tracks' size: a feature-length PGS track takes far longer than a trailer's.
+    total_bytes = 0
+    for path in paths:
+        try: total_bytes += os.path.getsize(path)
+        except OSError: pass
+    return base_seconds + per_mb_seconds * total_bytes / (1024 * 1024)
+
+
+def _quote(path):
+    return subprocess.list2cmdline([path]) if os.name == 'nt' else shlex.quote(path)
+
+
+class TemplateOcrBackend:
+    name = 'template'
+
+    def __init__(self, settings, log_callback):
+        self.command_template = settings['ocr_command_template']; self.timeout = settings['ffmpeg_ocr_timeout']; self.timeout_per_mb = settings.get('ocr_timeout_per_mb', 0); self.log = log_callback
+
+    def identity(self):
+        return self.command_template
+
+    def recognize_tracks(self, requests):
+        statuses = []
+        for request in requests:
+            command_parts = self.command_template.replace("{INPUT_FILE_PATH}", request.input_path)
+            command_parts = command_parts.replace("{OUTPUT_SRT_PATH}", request.output_srt_path)
+            command_parts = command_parts.replace("{LANG_3_CODE}", request.lang)
+            self.log(f"[OCR CMD] {command_parts}", True)
+            timeout = _ocr_timeout(self.timeout, self.timeout_per_mb, [request.input_path])
+            try:
+                ocr_proc = SUPERVISOR.run(command_parts, shell=True, text=True, encoding='utf-8', timeout=timeout, creationflags=NO_WINDOW)
+            except subprocess.TimeoutExpired:
+                self.log(f"[OCR TIMEOUT] Comlink lost with OCR droid for {os.path.basename(request.input_path)} after {timeout:.0f}s.", True)
+                statuses.append(OCR_TIMED_OUT); continue
+            except FileNotFoundError:
+                self.log(f"[OCR ERROR] OCR Droid (tool) not found. Check Holocron (Config) for: {command_parts}", True)
+                statuses.append(OCR_FAILED); continue
+            if ocr_proc.stdout and ocr_proc.stdout.strip(): self.log(f"[OCR STDOUT]:\n{ocr_proc.stdout.strip()}", False)
+            if ocr_proc.stderr and ocr_proc.stderr.strip(): self.log(f"[OCR STDERR]:\n{ocr_proc.stderr.strip()}", False)
+            self.log(f"[OCR RETURN CODE]: {ocr_proc.returncode}", False)
+            if ocr_proc.returncode == 0 and _output_ok(request.output_srt_path): statuses.append(OCR_OK)
+            else:
+                if ocr_proc.returncode == 0: self.log(f"[OCR FAILED] Droid translation unit (RC 0) but output datapad (SRT) is empty/missing: {request.output_srt_path}", True)
+                else: self.log(f"[OCR FAILED] Droid translation unit malfunctioned (RC {ocr_proc.returncode}).", True)
+                statuses.append(OCR_FAILED)
+        return statuses
+
+    def close(self):
+        pass
+
+
+class BatchOcrBackend:
+    # One tool launch per language for all the given tracks. ocr_batch_command_template placeholders:
+    # {INPUT_FILE_PATHS} (quoted, space separated), {INPUT_LIST_FILE} (one path per line), {OUTPUT_DIR},
+    # {LANG_3_CODE}. The tool must write <input name without extension>.srt into {OUTPUT_DIR}.
+    name = 'batch'
+
+    def __init__(self, settings, log_callback):
+        self.command_template = settings['ocr_batch_command_template']; self.timeout = settings['ffmpeg_ocr_timeout']; self.timeout_per_mb = settings.get('ocr_timeout_per_mb', 0); self.log = log_callback
+        self.temp_dir = settings.get('ocr_temp_dir') or None
+
+    def identity(self):
+        return self.command_template
+
+    def recognize_tracks(self, requests):
+        statuses = [OCR_FAILED] * len(requests)
+        by_lang = {}
+        for position, request in enumerate(requests): by_lang.setdefault(request.lang, []).append(position)
+        for lang, positions in by_lang.items():
+            work_dir = tempfile.mkdtemp(prefix="ocr_batch_", dir=self.temp_dir if self.temp_dir and os.path.isdir(self.temp_dir) else os.path.dirname(requests[positions[0]].input_path))
+            try:
+                input_paths = [requests[position].input_path for position in positions]
+                list_path = os.path.join(work_dir, "inputs.txt")
+                with open(list_path, 'w', encoding='utf-8') as list_file: list_file.write('\n'.join(input_paths) + '\n')
+                command_parts = self.command_template.replace("{INPUT_FILE_PATHS}", ' '.join(_quote(path) for path in input_paths))
+                command_parts = command_parts.replace("{INPUT_LIST_FILE}", list_path).replace("{OUTPUT_DIR}", work_dir).replace("{LANG_3_CODE}", lang)
+                self.log(f"[OCR BATCH CMD] {len(positions)} track(s): {command_parts}", True)
+                batch_status = OCR_FAILED
+                # The batch gets the per-track allowance for each of its tracks.
+                timeout = _ocr_timeout(self.timeout * len(positions), self.timeout_per_mb, input_paths)
+                try:
+                    ocr_proc = SUPERVISOR.run(command_parts, shell=True, text=True, encoding='utf-8', timeout=timeout, creationflags=NO_WINDOW)
+                    if ocr_proc.stderr and ocr_proc.stderr.strip(): self.log(f"[OCR STDERR]:\n{ocr_proc.stderr.strip()}", False)
+                    self.log(f"[OCR BATCH RETURN CODE]: {ocr_proc.returncode}", False)
+                except subprocess.TimeoutExpired:
+                    self.log(f"[OCR TIMEOUT] Comlink lost with OCR droid batch ({len(positions)} tracks) after {timeout:.0f}s.", True)
+                    batch_status = OCR_TIMED_OUT
+                # Judge every track by its own output, whatever the batch's exit code says.
+                for position in positions:
+                    request = requests[position]
+                    produced = os.path.join(work_dir, os.path.splitext(os.path.basename(request.input_path))[0] + ".srt")
+                    if _output_ok(produced):
+                        shutil.move(produced, request.output_srt_path); statuses[position] = OCR_OK
+                    else:
+                        statuses[position] = batch_status
+                        self.log(f"[OCR FAILED] Batch produced no datapad for {os.path.basename(request.input_path)}.", True)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        return statuses
+
+    def close(self):
+        pass
+
+
+class _OcrWorkerProcess:
+    def __init__(self, command):
+        self.process = SUPERVISOR.popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        text=True, encoding='utf-8', bufsize=1, creationflags=NO_WINDOW)
+        self.responses = queue.Queue()
+        threading.Thread(target=self._read_responses, daemon=True, name="ocr-worker-reader").start()
+
+    def _read_responses(self):
+        for line in self.process.stdout:
+            if line.strip(): self.responses.put(line)
+        self.responses.put(None)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def request(self, payload, timeout):
+        self.process.stdin.write(json.dumps(payload) + "\n"); self.process.stdin.flush()
+        line = self.responses.get(timeout=timeout)
+        if line is None: raise EOFError("OCR worker exited")
+        return json.loads(line)
+
+    def kill(self):
+        try: self.process.kill(); self.process.wait(5)
+        except (OSError, subprocess.TimeoutExpired): pass
+
+
+class WorkerOcrBackend:
+    # Long-lived OCR processes started from ocr_worker_command, one per busy OCR lane thread and reused across
+    # movies. Protocol, one JSON object per line: we send {"input": ..., "output": ..., "lang": ...}; the
+    # worker writes the SRT and answers {"ok": true} or {"ok": false, "error": "..."}.
+    name = 'worker'
+
+    def __init__(self, settings, log_callback):
+        self.command = settings['ocr_worker_command']; self.timeout = settings['ffmpeg_ocr_timeout']; self.timeout_per_mb = settings.get('ocr_timeout_per_mb', 0); self.log = log_callback
+        self._idle = []; self._all = []; self._lock = threading.Lock()
+
+    def identity(self):
+        return self.command
+
+    def _acquire(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive(): return worker
+        worker = _OcrWorkerProcess(self.command)
+        with self._lock: self._all.append(worker)
+        self.log(f"[OCR WORKER] Droid worker online (pid {worker.process.pid}): {self.command}", True)
+        return worker
+
+    def _release(self, worker):
+        if worker.alive():
+            with self._lock: self._idle.append(worker)
+
+    def recognize_tracks(self, requests):
+        statuses = []
+        worker = self._acquire()
+        try:
+            for request in requests:
+                if not worker.alive(): worker = self._acquire()
+                timeout = _ocr_timeout(self.timeout, self.timeout_per_mb, [request.input_path])
+                try:
+                    response = worker.request({"input": request.input_path, "output": request.output_srt_path, "lang": request.lang}, timeout)
+                except queue.Empty:
+                    self.log(f"[OCR TIMEOUT] OCR worker gave no answer for {os.path.basename(request.input_path)} after {timeout:.0f}s; restarting it.", True)
+                    worker.kill(); statuses.append(OCR_TIMED_OUT); continue
+                except (OSError, EOFError, ValueError) as e:
+                    self.log(f"[OCR ERROR] OCR worker failed on {os.path.basename(request.input_path)}: {e}", True)
+                    worker.kill(); statuses.append(OCR_FAILED); continue
+                if response.get("ok") and _output_ok(request.output_srt_path): statuses.append(OCR_OK)
+                else:
+                    self.log(f"[OCR FAILED] OCR worker could not translate {os.path.basename(request.input_path)}: {response.get('error') or 'no SRT written'}", True)
+                    statuses.append(OCR_FAILED)
+        finally:
+            self._release(worker)
+        return statuses
+
+    def close(self):
+        with self._lock: workers = self._all; self._all = []; self._idle = []
+        for worker in workers:
+            try: worker.process.stdin.close(); worker.process.wait(5)
+            except (OSError, subprocess.TimeoutExpired): worker.kill()
+
+
+OCR_BACKENDS = {backend.name: backend for backend in (TemplateOcrBackend, BatchOcrBackend, WorkerOcrBackend)}
+BACKEND_COMMAND_SETTINGS = {'template': 'ocr_command_template', 'batch': 'ocr_batch_command_template', 'worker': 'ocr_worker_command'}
+
+
+def ocr_command_configured(settings):
+    return bool(settings.get('ocr_command_template') or settings.get(BACKEND_COMMAND_SETTINGS.get(settings.get('ocr_backend'), 'ocr_command_template')))
+
+
+def create_ocr_backend(settings, log_callback):
+    # The configured backend, or the template runner when that backend has no command configured.
+    backend_name = settings.get('ocr_backend') or 'template'
+    if backend_name not in OCR_BACKENDS:
+        log_callback(f"[WARN] Unknown ocr_backend '{backend_name}', using the command template.", True); backend_name = 'template'
+    if not settings.get(BACKEND_COMMAND_SETTINGS[backend_name]):
+        if backend_name != 'template': log_callback(f"[WARN] ocr_backend '{backend_name}' has no {BACKEND_COMMAND_SETTINGS[backend_name]} set, using the command template.", True)
+        backend_name = 'template'
+        if not settings.get('ocr_command_template'): return None
+    return OCR_BACKENDS[backend_name](settings, log_callback)
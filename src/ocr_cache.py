@@ -0,0 +1,78 @@
+import time
+import hashlib
+import sqlite3
+import threading
+
+OCR_CACHE_FILENAME = "ocr_cache.sqlite3"
+OCR_CACHE_SCHEMA_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as image_sub_file:
+        for chunk in iter(lambda: image_sub_file.read(HASH_CHUNK_SIZE), b''): digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ocr_cache_key(bitstream_hash, ocr_command_template, lang_code):
+    # The same bitstream OCRed with another tool, other options or another language is a different result.
+    return hashlib.sha256('\0'.join((bitstream_hash, ocr_command_template, lang_code)).encode('utf-8')).hexdigest()
+
+
+class OcrCache:
+    # Content-addressed OCR results: SRT text keyed by the hash of the extracted image-subtitle bitstream plus
+    # the OCR command template and language, so duplicate releases and re-runs never OCR the same track twice.
+    # Least-recently-used results are evicted once the stored text exceeds max_bytes.
+    def __init__(self, db_path, max_bytes):
+        self.db_path = db_path
+        self.max_bytes = max(1, int(max_bytes))
+        self.hits = 0; self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is None or int(row[0]) != OCR_CACHE_SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS results")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(OCR_CACHE_SCHEMA_VERSION),))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, srt BLOB NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT srt FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1; return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)); self._conn.commit()
+            self.hits += 1
+        return bytes(row[0])
+
+    def put(self, key, srt_bytes):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO results (key, srt, size, created, last_used) VALUES (?, ?, ?, ?, ?)", (key, srt_bytes, len(srt_bytes), now, now))
+            self._evict_locked(); self._conn.commit()
+
+    def _evict_locked(self):
+        total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total_bytes <= self.max_bytes: return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY last_used ASC"):
+            if total_bytes <= self.max_bytes: break
+            doomed.append((key,)); total_bytes -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results"); self._conn.commit()
+
+    def stats_line(self):
+        total = self.hits + self.misses
+        return f"{self.hits} hit(s), {self.misses} miss(es)" + (f" ({self.hits * 100 // total}% hit rate)" if total else "")
+
+    def close(self):
+        with self._lock:
+            self._conn.commit(); self._conn.close()
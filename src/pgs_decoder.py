@@ -0,0 +1,170 @@
+import mmap
+import struct
+import hashlib
+
+try:
+    import numpy as np
+except ImportError: # optional: without NumPy image subtitles only go through ocr_command_template
+    np = None
+
+# Presentation Graphic Stream (.sup, hdmv_pgs_subtitle) reader. Each display set (PCS, WDS, PDS, ODS..., END)
+# becomes one timed image. Identical images (epoch refreshes, the same line across cuts) share one hash, so
+# only unique bitmaps are RLE-decoded and sent to OCR; the text is then re-expanded to every event.
+PGS_CODECS = {'hdmv_pgs_subtitle', 'pgssub', 'pgs'}
+PGS_MAGIC = b'PG'
+PGS_CLOCK_HZ = 90000
+SEGMENT_HEADER = struct.Struct('>2sIIBH') # magic, pts, dts, segment type, segment size
+PDS, ODS, PCS, WDS, END = 0x14, 0x15, 0x16, 0x17, 0x80
+EPOCH_START = 0x80
+ODS_FIRST_IN_SEQUENCE = 0x80
+OBJECT_CROPPED = 0x80 # composition object flags; 0x40 only marks a forced subtitle and carries no extra fields
+LAST_EVENT_DURATION = 5.0 # seconds, for a final image the stream never clears
+
+
+def decoder_available():
+    return np is not None
+
+
+class DisplaySet:
+    __slots__ = ('start', 'end', 'key', 'objects', 'luma', 'alpha')
+
+    def __init__(self, start, key, objects, luma, alpha):
+        self.start = start; self.end = None; self.key = key
+        self.objects = objects # [(x, y, width, height, crop or None, rle bytes)]
+        self.luma = luma; self.alpha = alpha
+
+
+class PgsStream:
+    # Parses a .sup file through a read-only mmap; bitmaps are only decoded on demand (decode_image).
+    def __init__(self, sup_path):
+        self.sup_path = sup_path
+        self.display_sets = []
+        with open(sup_path, 'rb') as sup_file:
+            with mmap.mmap(sup_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self._parse(buffer)
+
+    def _parse(self, buffer):
+        palettes = {}; objects = {}; composition = None
+        offset = 0; size = len(buffer)
+        while offset + SEGMENT_HEADER.size <= size:
+            magic, pts, _dts, segment_type, segment_size = SEGMENT_HEADER.unpack_from(buffer, offset)
+            if magic != PGS_MAGIC: raise ValueError(f"Not a PGS stream (bad segment magic at byte {offset})")
+            payload = buffer[offset + SEGMENT_HEADER.size:offset + SEGMENT_HEADER.size + segment_size]
+            offset += SEGMENT_HEADER.size + segment_size
+            if segment_type == PCS:
+                composition = self._parse_composition(pts, payload)
+                if composition['state'] & EPOCH_START: palettes.clear(); objects.clear()
+            elif segment_type == PDS:
+                palette_id = payload[0]
+                luma, alpha = palettes.get(palette_id) or (bytearray(256), bytearray(256))
+                for entry in range(2, len(payload) - 4, 5):
+                    # entry id, Y, Cr, Cb, alpha; OCR only needs brightness and coverage.
+                    luma[payload[entry]] = payload[entry + 1]; alpha[payload[entry]] = payload[entry + 4]
+                palettes[palette_id] = (luma, alpha)
+            elif segment_type == ODS:
+                object_id = struct.unpack_from('>H', payload, 0)[0]
+                if payload[3] & ODS_FIRST_IN_SEQUENCE:
+                    width, height = struct.unpack_from('>HH', payload, 7)
+                    objects[object_id] = [width, height, bytearray(payload[11:])]
+                elif object_id in objects:
+                    objects[object_id][2] += payload[4:]
+            elif segment_type == END and composition is not None:
+                self._close_display_set(composition, palettes, objects)
+                composition = None
+
+    @staticmethod
+    def _parse_composition(pts, payload):
+        state, palette_id, object_count = payload[7], payload[9], payload[10]
+        placements = []; position = 11
+        for _ in range(object_count):
+            object_id, _window_id, crop_flag, x, y = struct.unpack_from('>HBBHH', payload, position); position += 8
+            crop = None
+            if crop_flag & OBJECT_CROPPED:
+                crop = struct.unpack_from('>HHHH', payload, position); position += 8
+            placements.append((object_id, x, y, crop))
+        return {'start': pts / PGS_CLOCK_HZ, 'state': state, 'palette_id': palette_id, 'placements': placements}
+
+    def _close_display_set(self, composition, palettes, objects):
+        start = composition['start']
+        if self.display_sets and self.display_sets[-1].end is None: self.display_sets[-1].end = start
+        luma, alpha = palettes.get(composition['palette_id'], (bytearray(256), bytearray(256)))
+        placed = []
+        for object_id, x, y, crop in composition['placements']:
+            if object_id in objects:
+                width, height, rle = objects[object_id]
+                placed.append((x, y, width, height, crop, bytes(rle)))
+        if not placed: return # an empty composition only clears the screen
+        digest = hashlib.sha1(bytes(luma) + bytes(alpha))
+        for x, y, width, height, crop, rle in placed:
+            digest.update(struct.pack('>HHHH', x, y, width, height) + (struct.pack('>HHHH', *crop) if crop else b'') + rle)
+        self.display_sets.append(DisplaySet(start, digest.hexdigest(), placed, bytes(luma), bytes(alpha)))
+
+    def unique_display_sets(self):
+        # First display set for each distinct image, in order of appearance.
+        seen = {}
+        for display_set in self.display_sets: seen.setdefault(display_set.key, display_set)
+        return list(seen.values())
+
+
+def rle_decode(rle, width, height):
+    # PGS run-length coding -> (height, width) uint8 array of palette indexes.
+    starts, lengths, colors = [], [], []
+    i = 0; n = len(rle); x = 0; row_start = 0; rows = 0
+    while i < n and rows < height:
+        byte = rle[i]; i += 1
+        if byte:
+            color = byte; length = 1
+        else:
+            flags = rle[i]; i += 1
+            if flags == 0:
+                rows += 1; row_start += width; x = 0
+                continue
+            length = flags & 0x3F
+            if flags & 0x40: length = (length << 8) | rle[i]; i += 1
+            if flags & 0x80: color = rle[i]; i += 1
+            else: color = 0
+        if color and x < width:
+            starts.append(row_start + x); lengths.append(min(length, width - x)); colors.append(color)
+        x += length
+    pixels = np.zeros(width * height, dtype=np.uint8)
+    if starts:
+        lengths = np.asarray(lengths, dtype=np.int64)
+        run_offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pixels[np.repeat(np.asarray(starts, dtype=np.int64), lengths) + run_offsets] = np.repeat(np.asarray(colors, dtype=np.uint8), lengths)
+    return pixels.reshape(height, width)
+
+
+def decode_image(display_set, margin=10):
+    # Grayscale OCR image: dark glyphs on a white page, cropped to the placed objects plus a margin.
+    left = min(x for x, _, _, _, _, _ in display_set.objects); top = min(y for _, y, _, _, _, _ in display_set.objects)
+    right = max(x + (crop[2] if crop else width) for x, _, width, _, crop, _ in display_set.objects)
+    bottom = max(y + (crop[3] if crop else height) for _, y, _, height, crop, _ in display_set.objects)
+    coverage = np.zeros((bottom - top, right - left), dtype=np.float32)
+    luma = np.frombuffer(display_set.luma, dtype=np.uint8).astype(np.float32)
+    alpha = np.frombuffer(display_set.alpha, dtype=np.uint8).astype(np.float32) / 255.0
+    for x, y, width, height, crop, rle in display_set.objects:
+        indexes = rle_decode(rle, width, height)
+        if crop:
+            crop_x, crop_y, crop_width, crop_height = crop
+            indexes = indexes[crop_y:crop_y + crop_height, crop_x:crop_x + crop_width]
+        region = coverage[y - top:y - top + indexes.shape[0], x - left:x - left + indexes.shape[1]]
+        # Bright, opaque pixels are the glyphs; dark outlines and transparent pixels fall to the background.
+        np.maximum(region, luma[indexes] * alpha[indexes], out=region)
+    page = (255.0 - coverage).clip(0, 255).astype(np.uint8)
+    return np.pad(page, margin, constant_values=255)
+
+
+def expand_events(display_sets, texts_by_key):
+    # [(start, end, text)] for every display set, merging back-to-back repeats of the same text.
+    events = []
+    for index, display_set in enumerate(display_sets):
+        text = (texts_by_key.get(display_set.key) or '').strip()
+        if not text: continue
+        end = display_set.end
+        if end is None: end = display_sets[index + 1].start if index + 1 < len(display_sets) else display_set.start + LAST_EVENT_DURATION
+        if events and events[-1][2] == text and abs(events[-1][1] - display_set.start) < 0.001:
+            events[-1] = (events[-1][0], end, text)
+        else:
+            events.append((display_set.start, end, text))
+    return events
+
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+PROBE_CACHE_FILENAME = "probe_cache.sqlite3"
+PROBE_CACHE_SCHEMA_VERSION = 2
+EVICTION_CHECK_INTERVAL = 500 # puts between size-cap checks
+
+
+class ProbeCache:
+    # Persistent ffprobe results, keyed by (path, size, mtime). A changed size or mtime is a miss
+    # and the stale row is replaced on the next put. Rows are evicted least-recently-used first
+    # once the cache grows past max_entries.
+    def __init__(self, db_path, max_entries=100000):
+        self.db_path = db_path
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0; self.misses = 0
+        self._puts_since_check = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is None or int(row[0]) != PROBE_CACHE_SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS probes")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(PROBE_CACHE_SCHEMA_VERSION),))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS probes (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, probe TEXT NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS probes_last_used ON probes (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(file_path, stat_result=None):
+        st = stat_result or os.stat(file_path)
+        return os.path.abspath(file_path), st.st_size, st.st_mtime_ns
+
+    def get(self, file_path, stat_result=None):
+        try:
+            path, size, mtime_ns = self._key(file_path, stat_result)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns, probe FROM probes WHERE path = ?", (path,)).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE probes SET last_used = ? WHERE path = ?", (time.time(), path))
+            self.hits += 1
+        return json.loads(row[2])
+
+    def put(self, file_path, probe_data, stat_result=None):
+        try:
+            path, size, mtime_ns = self._key(file_path, stat_result)
+        except OSError:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO probes (path, size, mtime_ns, probe, last_used) VALUES (?, ?, ?, ?, ?)",
+                               (path, size, mtime_ns, json.dumps(probe_data, separators=(',', ':')), time.time()))
+            self._puts_since_check += 1
+            if self._puts_since_check >= EVICTION_CHECK_INTERVAL: self._evict_locked()
+            self._conn.commit()
+
+    def update_field(self, file_path, field, value):
+        # Patches one field of a still-current cached probe, without counting as a hit or miss.
+        try:
+            path, size, mtime_ns = self._key(file_path)
+        except OSError:
+            return
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns, probe FROM probes WHERE path = ?", (path,)).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns: return
+            probe_data = json.loads(row[2]); probe_data[field] = value
+            self._conn.execute("UPDATE probes SET probe = ? WHERE path = ?", (json.dumps(probe_data, separators=(',', ':')), path)); self._conn.commit()
+
+    def invalidate(self, file_path):
+        with self._lock:
+            self._conn.execute("DELETE FROM probes WHERE path = ?", (os.path.abspath(file_path),)); self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM probes"); self._conn.commit()
+
+    def _evict_locked(self):
+        self._puts_since_check = 0
+        count = self._conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute("DELETE FROM probes WHERE path IN (SELECT path FROM probes ORDER BY last_used ASC LIMIT ?)", (count - self.max_entries,))
+
+    def flush(self):
+        with self._lock:
+            self._evict_locked(); self._conn.commit()
+
+    def stats_line(self):
+        total = self.hits + self.misses
+        return f"{self.hits} hit(s), {self.misses} miss(es)" + (f" ({self.hits * 100 // total}% hit rate)" if total else "")
+
+    def close(self):
+        with self._lock:
+            self._evict_locked(); self._conn.commit(); self._conn.close()
@@ -0,0 +1,136 @@
+import os
+import time
+import shlex
+import shutil
+import signal
+import atexit
+import threading
+import subprocess
+
+from instrumentation import MeasuredPopen
+
+# Every ffprobe, ffmpeg and OCR process is started through SUPERVISOR. Each child gets its own process group
+# (its own session on POSIX), so killing it also takes down whatever it spawned (OCR shell pipelines, tools that
+# fork helpers), and the supervisor keeps the live ones so a cancel or app close can end them all at once instead
+# of waiting for the current target. Children run under the configured nice/ionice priority; nice and ionice are
+# exec'd in front of the command (same pid), so every thread and grandchild inherits it.
+KILL_GRACE_SECONDS = 3 # between SIGTERM and SIGKILL on cancel
+IO_CLASSES = {'realtime': '1', 'best-effort': '2', 'idle': '3'}
+_WINDOWS_PRIORITY_CLASSES = ((15, 'IDLE_PRIORITY_CLASS'), (1, 'BELOW_NORMAL_PRIORITY_CLASS'))
+
+
+class SupervisedPopen(MeasuredPopen):
+    # terminate()/kill() end the child's whole process group (process tree on Windows).
+    def _signal_group(self, sig):
+        if self.returncode is not None: return
+        if os.name == 'nt': _kill_tree_windows(self.pid); return
+        try: os.killpg(self.pid, sig)
+        except ProcessLookupError: pass
+        except PermissionError: super().send_signal(sig) # the child moved to another group; signal it alone
+
+    def terminate(self):
+        self._signal_group(signal.SIGTERM)
+
+    def kill(self):
+        self._signal_group(signal.SIGKILL if os.name != 'nt' else signal.SIGTERM)
+
+
+def _kill_tree_windows(pid):
+    subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=subprocess.CREATE_NO_WINDOW, check=False)
+
+
+class ProcessSupervisor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._live = set(); self._cancelled = False
+        self.priority_prefix = []; self.windows_priority_flag = 0
+        self.started = 0; self.killed = 0
+
+    def configure(self, settings, log_callback=None):
+        # Builds the nice/ionice prefix from the settings; missing tools are reported once and skipped.
+        nice_level = max(0, min(19, int(settings.get('process_nice', 0) or 0)))
+        io_class = (settings.get('process_io_class') or 'none').strip().lower(); io_level = max(0, min(7, int(settings.get('process_io_level', 4))))
+        prefix = []; windows_flag = 0
+        if os.name == 'nt':
+            windows_flag = next((getattr(subprocess, flag_name, 0) for threshold, flag_name in _WINDOWS_PRIORITY_CLASSES if nice_level >= threshold), 0)
+        else:
+            nice_path = shutil.which('nice') if nice_level else None
+            if nice_path: prefix += [nice_path, '-n', str(nice_level)]
+            elif nice_level and log_callback: log_callback("[PRIORITY] 'nice' not found; child processes keep the normal CPU priority.", True)
+            if io_class in IO_CLASSES:
+                ionice_path = shutil.which('ionice')
+                if ionice_path: prefix += [ionice_path, '-c', IO_CLASSES[io_class]] + (['-n', str(io_level)] if io_class != 'idle' else [])
+                elif log_callback: log_callback("[PRIORITY] 'ionice' not found (Linux only); child processes keep the normal disk priority.", True)
+            elif io_class not in ('', 'none') and log_callback: log_callback(f"[PRIORITY] Unknown process_io_class '{io_class}' (use {', '.join(IO_CLASSES)} or none); ignored.", True)
+        with self._lock: self.priority_prefix = prefix; self.windows_priority_flag = windows_flag
+
+    def _command(self, args, shell):
+        # The priority prefix in front of the command; a shell command becomes an explicit "sh -c" so the prefix
+        # applies to the shell and everything it starts.
+        if not self.priority_prefix: return args, shell
+        if shell: return self.priority_prefix + ['/bin/sh', '-c', args if isinstance(args, str) else shlex.join(args)], False
+        return self.priority_prefix + ([args] if isinstance(args, (str, bytes, os.PathLike)) else list(args)), False
+
+    def popen(self, args, shell=False, creationflags=0, **popen_kwargs):
+        if os.name == 'nt':
+            process = SupervisedPopen(args, shell=shell, creationflags=creationflags | subprocess.CREATE_NEW_PROCESS_GROUP | self.windows_priority_flag, **popen_kwargs)
+        else:
+            command, shell = self._command(args, shell)
+            process = SupervisedPopen(command, shell=shell, start_new_session=True, **popen_kwargs)
+            process.args = args
+        with self._lock:
+            self._live = {live for live in self._live if live.returncode is None}
+            self._live.add(process); self.started += 1; cancelled = self._cancelled
+        # A worker that passed its cancel check just before the cancel still gets its process ended.
+        if cancelled: process.terminate()
+        return process
+
+    def run(self, args, timeout=None, **popen_kwargs):
+        # subprocess.run(capture_output=True, check=False) on a supervised process.
+        with self.popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_kwargs) as process:
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill(); process.communicate()
+                raise
+            except BaseException:
+                process.kill()
+                raise
+        return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+    def live_count(self):
+        with self._lock: return sum(1 for process in self._live if process.returncode is None)
+
+    def reset(self):
+        with self._lock: self._cancelled = False; self.killed = 0
+
+    def terminate_all(self, grace_seconds=KILL_GRACE_SECONDS, wait=False):
+        # SIGTERM to every live process group now, SIGKILL to the groups whose leader is still running after grace_seconds. The
+        # threads that started the processes reap them (and keep their metrics); with wait=False the escalation
+        # runs in the background so a GUI thread never blocks on it. New processes are ended as they start until reset(),
+        # which the engine calls when the cancelled run's workers are done.
+        with self._lock:
+            self._cancelled = True
+            targets = [process for process in self._live if process.returncode is None]
+        if not targets: return 0
+        for process in targets: process.terminate()
+        with self._lock: self.killed += len(targets)
+        def escalate():
+            deadline = time.monotonic() + grace_seconds
+            while time.monotonic() < deadline and any(process.returncode is None for process in targets): time.sleep(0.1)
+            # Only groups whose leader is still unreaped: once it is reaped its pid, and so the group id, may be reused.
+            for process in targets:
+                if process.returncode is None: process.kill()
+        if wait: escalate()
+        else: threading.Thread(target=escalate, daemon=True, name="process-reaper").start()
+        return len(targets)
+
+
+SUPERVISOR = ProcessSupervisor()
+
+
+def _terminate_on_exit():
+    if SUPERVISOR.live_count(): SUPERVISOR.terminate_all(grace_seconds=1, wait=True)
+
+
+atexit.register(_terminate_on_exit)
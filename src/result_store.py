@@ -0,0 +1,98 @@
+import os
+import threading
+
+from job_journal import FILE_OUTCOME_LISTS
+
+# Per-run results keyed by full movie path (which is also the GUI's Treeview iid), so two S01E01.mkv in
+# different folders never share a result. Each file keeps its outcomes, timing and per-stream records.
+OUTCOME_ORDER = ('success', 'skipped', 'no_subs', 'timed_out', 'error')
+ROW_STATUS = {'success': "Completed", 'timed_out': "Failed", 'error': "Failed", 'no_subs': "No Subtitles"}
+
+
+class StreamResult:
+    __slots__ = ('index', 'lang', 'output_path', 'status', 'started_at', 'finished_at', 'bytes_written')
+
+    def __init__(self, job, status, finished_at):
+        self.index = job['index']; self.lang = job['lang']; self.output_path = job['output_path']; self.status = status
+        self.started_at = job.get('started_at'); self.finished_at = finished_at
+        try: self.bytes_written = os.path.getsize(self.output_path) if status == 'done' else 0
+        except OSError: self.bytes_written = 0
+
+
+class FileResult:
+    __slots__ = ('path', 'outcomes', 'streams', 'started_at', 'finished_at', 'file_bytes')
+
+    def __init__(self, path):
+        self.path = path; self.outcomes = []; self.streams = []
+        self.started_at = None; self.finished_at = None; self.file_bytes = 0
+
+    def row_status(self):
+        # Success wins over a partial failure, as in the summary.
+        for outcome in ('success', 'error', 'timed_out', 'no_subs'):
+            if outcome in self.outcomes: return ROW_STATUS[outcome]
+        return None
+
+
+class ResultStore:
+    def __init__(self):
+        self._files = {}; self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock: self._files = {}
+
+    def _file(self, path):
+        result = self._files.get(path)
+        if result is None: result = self._files[path] = FileResult(path)
+        return result
+
+    def file_started(self, path, started_at):
+        with self._lock:
+            result = self._file(path); result.started_at = started_at
+            try: result.file_bytes = os.path.getsize(path)
+            except OSError: pass
+
+    def file_finished(self, path, finished_at):
+        with self._lock:
+            result = self._file(path); result.finished_at = finished_at
+            return result
+
+    def add_outcome(self, path, outcome):
+        with self._lock:
+            outcomes = self._file(path).outcomes
+            if outcome not in outcomes: outcomes.append(outcome)
+
+    def has_outcome(self, path, outcome):
+        with self._lock:
+            result = self._files.get(path)
+            return result is not None and outcome in result.outcomes
+
+    def record_stream(self, path, job, status, finished_at):
+        with self._lock: self._file(path).streams.append(StreamResult(job, status, finished_at))
+
+    def replace_outcomes(self, path_outcomes):
+        # Outcomes as the journal has them for a resumed run (earlier sessions included).
+        with self._lock:
+            for result in self._files.values(): result.outcomes = []
+            for path, outcome in path_outcomes:
+                outcomes = self._file(path).outcomes
+                if outcome not in outcomes: outcomes.append(outcome)
+
+    def files(self):
+        with self._lock: return list(self._files.values())
+
+    def by_outcome(self):
+        # {outcome: [paths]} in one pass, in the order files were first recorded.
+        grouped = {outcome: [] for outcome in OUTCOME_ORDER}
+        for result in self.files():
+            for outcome in result.outcomes: grouped[outcome].append(result.path)
+        return grouped
+
+    def report(self):
+        grouped = self.by_outcome()
+        report = {FILE_OUTCOME_LISTS[outcome]: paths for outcome, paths in grouped.items()}
+        report["files"] = {result.path: {"outcomes": result.outcomes, "file_bytes": result.file_bytes,
+                                         "seconds": round(result.finished_at - result.started_at, 3) if result.started_at and result.finished_at else None,
+                                         "streams": [{"index": stream.index, "lang": stream.lang, "status": stream.status, "output": stream.output_path, "bytes": stream.bytes_written,
+                                                      "seconds": round(stream.finished_at - stream.started_at, 3) if stream.started_at else None} for stream in result.streams]}
+                           for result in self.files() if result.outcomes or result.streams}
+        return report
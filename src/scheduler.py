@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+import collections
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# --- Worker lanes ---
+# Quick stream copies and slow OCR jobs run on separate pools so a long OCR job never
+# holds back the I/O lane (and vice versa). Each lane has its own worker count.
+# I/O tasks are also grouped by the device their movie lives on (st_dev: each disk, partition and network mount
+# has its own). At most the device's limit of them run at once on one device, and free workers take the devices in
+# turn, so several disks stream in parallel instead of all workers seeking on the same spindle.
+IO_LANE = 'io'
+OCR_LANE = 'ocr'
+
+
+def device_key(path):
+    try: return os.stat(path).st_dev
+    except OSError: return None
+
+
+def mount_point(path):
+    # Topmost directory above path that is still on the same device.
+    path = os.path.abspath(path)
+    try: device = os.stat(path).st_dev
+    except OSError: return os.path.dirname(path)
+    while True:
+        parent = os.path.dirname(path)
+        try:
+            if parent == path or os.stat(parent).st_dev != device: return path
+        except OSError:
+            return path
+        path = parent
+
+
+def parse_device_limits(text):
+    # "/mnt/nas=1, /mnt/ssd=4" -> {'/mnt/nas': 1, '/mnt/ssd': 4}; raises ValueError on a malformed entry.
+    limits = {}
+    for entry in (text or '').split(','):
+        if not entry.strip(): continue
+        path, separator, workers = entry.strip().rpartition('=')
+        if not separator or not path.strip(): raise ValueError(f"Device limit '{entry.strip()}' is not in path=workers form")
+        try: limits[path.strip()] = max(0, int(workers))
+        except ValueError: raise ValueError(f"Device limit '{entry.strip()}' has a non-numeric worker count") from None
+    return limits
+
+
+class DeviceLane:
+    __slots__ = ('label', 'limit', 'queue', 'running', 'max_running', 'tasks', 'bytes', 'busy_seconds', 'busy_since')
+
+    def __init__(self, label, limit):
+        self.label = label; self.limit = limit; self.queue = collections.deque()
+        self.running = 0; self.max_running = 0; self.tasks = 0; self.bytes = 0; self.busy_seconds = 0.0; self.busy_since = None
+
+    def to_dict(self):
+        return {"device": self.label, "limit": self.limit or None, "files": self.tasks, "bytes": self.bytes, "busy_seconds": round(self.busy_seconds, 4),
+                "max_concurrent": self.max_running, "mb_per_second": round(self.bytes / self.busy_seconds / (1024 * 1024), 3) if self.busy_seconds else None}
+
+
+class ExtractionScheduler:
+    def __init__(self, io_workers, ocr_workers, cancel_event, metrics=None, device_workers=0, device_limits=None):
+        self.cancel_event = cancel_event
+        self.metrics = metrics # RunMetrics; gets each task's wait for a free worker
+        self.io_workers = max(1, int(io_workers))
+        self.device_workers = max(0, int(device_workers)); self.device_limits = device_limits or {} # 0: no per-device limit
+        self._devices = {}; self._device_turns = collections.deque() # devices with queued tasks, in round-robin order
+        self._dispatch_lock = threading.Lock(); self._device_tasks_running = 0
+        self.pools = {
+            IO_LANE: ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="extract-io"),
+            OCR_LANE: ThreadPoolExecutor(max_workers=max(1, int(ocr_workers)), thread_name_prefix="extract-ocr"),
+        }
+        self._outstanding = 0
+        self._idle = threading.Condition()
+
+    def _task_started(self):
+        with self._idle: self._outstanding += 1
+
+    def _task_done(self):
+        with self._idle:
+            self._outstanding -= 1
+            if self._outstanding == 0: self._idle.notify_all()
+
+    def _run(self, lane, queued_at, fn, args):
+        try:
+            if self.metrics: self.metrics.record_queue_wait(lane, time.perf_counter() - queued_at)
+            # Queued work is drained instead of cancelled so the outstanding count stays exact.
+            if self.cancel_event.is_set(): return None
+            return fn(*args)
+        finally:
+            self._task_done()
+
+    def submit(self, lane, fn, *args):
+        self._task_started()
+        return self.pools[lane].submit(self._run, lane, time.perf_counter(), fn, args)
+
+    def submit_io(self, fn, *args):
+        return self.submit(IO_LANE, fn, *args)
+
+    def submit_ocr(self, fn, *args):
+        return self.submit(OCR_LANE, fn, *args)
+
+    def submit_device(self, device, label, num_bytes, fn, *args):
+        # An I/O-lane task that reads num_bytes from device; it waits here until both a worker and the device are free.
+        self._task_started()
+        future = Future()
+        with self._dispatch_lock:
+            lane = self._devices.get(device)
+            if lane is None: lane = self._devices[device] = DeviceLane(label, self.device_limits.get(device, self.device_workers))
+            lane.queue.append((future, time.perf_counter(), num_bytes, fn, args))
+            if device not in self._device_turns: self._device_turns.append(device)
+        self._dispatch()
+        return future
+
+    def _dispatch(self):
+        # The pool never holds more device tasks than it has workers, so the next free worker always goes to the
+        # next device in turn that is below its limit.
+        with self._dispatch_lock:
+            while self._device_tasks_running < self.io_workers:
+                for _ in range(len(self._device_turns)):
+                    device = self._device_turns[0]; self._device_turns.rotate(-1); lane = self._devices[device]
+                    if not lane.limit or lane.running < lane.limit: break
+                else:
+                    return
+                future, queued_at, num_bytes, fn, args = lane.queue.popleft()
+                if not lane.queue: self._device_turns.remove(device)
+                if not lane.running: lane.busy_since = time.perf_counter()
+                lane.running += 1; lane.max_running = max(lane.max_running, lane.running); self._device_tasks_running += 1
+                self.pools[IO_LANE].submit(self._run_device, device, future, queued_at, num_bytes, fn, args)
+
+    def _run_device(self, device, future, queued_at, num_bytes, fn, args):
+        ran = False
+        try:
+            if self.metrics: self.metrics.record_queue_wait(IO_LANE, time.perf_counter() - queued_at)
+            if self.cancel_event.is_set(): future.set_result(None)
+            else: ran = True; future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._dispatch_lock:
+                lane = self._devices[device]; lane.running -= 1; self._device_tasks_running -= 1
+                if ran: lane.tasks += 1; lane.bytes += num_bytes
+                if not lane.running: lane.busy_seconds += time.perf_counter() - lane.busy_since
+            self._dispatch()
+            self._task_done()
+
+    def device_report(self):
+        # Per device: files read, bytes, time with at least one task running and the resulting throughput.
+        with self._dispatch_lock: return [lane.to_dict() for lane in sorted(self._devices.values(), key=lambda lane: str(lane.label))]
+
+    def when_all(self, futures, callback):
+        # Runs callback once every future has finished; counted as outstanding work until then.
+        self._task_started()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+        def finish():
+            try: callback()
+            finally: self._task_done()
+        def on_done(_future):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]: return
+            finish()
+        if not futures:
+            finish(); return
+        for future in futures: future.add_done_callback(on_done)
+
+    def wait(self):
+        with self._idle:
+            while self._outstanding: self._idle.wait()
+
+    def shutdown(self):
+        for pool in self.pools.values(): pool.shutdown(wait=True)
+
+
+class StagingArea:
+    # Disk budget for image tracks extracted ahead of OCR. Producers (I/O lane) wait for room before
+    # staging the next movie's image tracks, consumers (OCR lane) give the bytes back as each track is
+    # OCRed. Admission is checked before extraction, so usage can overshoot by at most the tracks that
+    # were admitted together; an empty area always admits, so a single huge track can't deadlock.
+    def __init__(self, max_bytes):
+        self.max_bytes = max(1, int(max_bytes))
+        self.used_bytes = 0; self.peak_bytes = 0; self.waits = 0
+        self._room = threading.Condition()
+
+    def is_full(self):
+        with self._room: return self.used_bytes >= self.max_bytes
+
+    def wait_for_room(self, cancel_event):
+        # False if cancelled while waiting.
+        with self._room:
+            if self.used_bytes >= self.max_bytes: self.waits += 1
+            while self.used_bytes >= self.max_bytes and not cancel_event.is_set(): self._room.wait(0.5)
+        return not cancel_event.is_set()
+
+    def add(self, num_bytes):
+        with self._room:
+            self.used_bytes += num_bytes; self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+
+    def release(self, num_bytes):
+        with self._room:
+            self.used_bytes = max(0, self.used_bytes - num_bytes); self._room.notify_all()
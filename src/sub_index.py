@@ -0,0 +1,109 @@
+import os
+import fnmatch
+import threading
+
+from config import MOVIE_EXTENSIONS, SUBTITLE_EXTENSIONS
+
+
+def _dot_prefixes(stem):
+    # "Movie.Part2.eng.forced" -> "Movie.Part2.eng.forced", "Movie.Part2.eng", "Movie.Part2", "Movie"
+    while stem:
+        yield stem
+        cut = stem.rfind('.')
+        if cut <= 0: return
+        stem = stem[:cut]
+
+
+def _matches_any(name, patterns):
+    lowered = name.lower()
+    return any(fnmatch.fnmatchcase(lowered, pattern) for pattern in patterns)
+
+
+def parse_exclude_patterns(value):
+    return tuple(pattern.strip().lower() for pattern in (value or '').split(',') if pattern.strip())
+
+
+class _DirectoryEntry:
+    __slots__ = ('mtime_ns', 'bases_with_subs', 'validated_run')
+
+    def __init__(self, mtime_ns, bases_with_subs):
+        self.mtime_ns = mtime_ns; self.bases_with_subs = bases_with_subs; self.validated_run = 0
+
+
+class SidecarIndex:
+    # Per-directory index of which movies already have sidecar subtitles, built from one directory listing.
+    # A subtitle belongs to a movie only if its name is the movie's base name followed by '.' (or nothing)
+    # and then the subtitle extension, and it is assigned to the longest such movie base in the directory,
+    # so "Movie.Part2.eng.srt" counts for "Movie.Part2.mkv" and not for "Movie.mkv".
+    def __init__(self):
+        self._dirs = {}
+        self._lock = threading.Lock()
+        self._run = 1
+
+    @staticmethod
+    def build_entry(file_names, mtime_ns=None):
+        movie_bases = set(); subtitle_stems = []
+        for file_name in file_names:
+            lowered = file_name.lower()
+            if lowered.endswith(MOVIE_EXTENSIONS): movie_bases.add(os.path.normcase(os.path.splitext(file_name)[0]))
+            elif lowered.endswith(SUBTITLE_EXTENSIONS): subtitle_stems.append(os.path.normcase(os.path.splitext(file_name)[0]))
+        bases_with_subs = set()
+        for stem in subtitle_stems:
+            for prefix in _dot_prefixes(stem):
+                if prefix in movie_bases:
+                    bases_with_subs.add(prefix); break
+        return _DirectoryEntry(mtime_ns, bases_with_subs)
+
+    def add_directory(self, dir_path, file_names, mtime_ns=None):
+        entry = self.build_entry(file_names, mtime_ns)
+        entry.validated_run = self._run
+        with self._lock: self._dirs[os.path.normcase(os.path.abspath(dir_path))] = entry
+
+    def begin_run(self):
+        # Listings made before this point get re-checked (one stat of the directory) on first use.
+        with self._lock: self._run += 1
+
+    def invalidate(self, dir_path):
+        with self._lock: self._dirs.pop(os.path.normcase(os.path.abspath(dir_path)), None)
+
+    def _index_directory(self, dir_path):
+        with os.scandir(dir_path) as entries:
+            file_names = [entry.name for entry in entries if entry.is_file()]
+        self.add_directory(dir_path, file_names, os.stat(dir_path).st_mtime_ns)
+
+    def has_subs(self, movie_file_path):
+        movie_dir = os.path.dirname(os.path.abspath(movie_file_path))
+        key = os.path.normcase(movie_dir)
+        with self._lock: entry = self._dirs.get(key)
+        if entry is not None and entry.validated_run != self._run:
+            current_mtime_ns = os.stat(movie_dir).st_mtime_ns
+            if entry.mtime_ns is None or current_mtime_ns != entry.mtime_ns: entry = None
+            else: entry.validated_run = self._run
+        if entry is None:
+            self._index_directory(movie_dir)
+            with self._lock: entry = self._dirs[key]
+        return os.path.normcase(os.path.splitext(os.path.basename(movie_file_path))[0]) in entry.bases_with_subs
+
+    def walk_movies(self, folder_path, exclude_dirs=(), exclude_files=(), cancel_event=None):
+        # Recursive os.scandir walk that yields movie paths and indexes every directory it lists on the way.
+        # exclude_dirs/exclude_files are case-insensitive glob patterns matched against names (not paths).
+        pending_dirs = [folder_path]
+        while pending_dirs:
+            if cancel_event is not None and cancel_event.is_set(): return
+            dir_path = pending_dirs.pop()
+            try:
+                dir_mtime_ns = os.stat(dir_path).st_mtime_ns
+                with os.scandir(dir_path) as entries:
+                    file_names = []; sub_dirs = []
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not _matches_any(entry.name, exclude_dirs): sub_dirs.append(entry.path)
+                            elif entry.is_file(): file_names.append(entry.name)
+                        except OSError: continue
+            except OSError:
+                continue
+            self.add_directory(dir_path, file_names, dir_mtime_ns)
+            for file_name in sorted(file_names):
+                if file_name.lower().endswith(MOVIE_EXTENSIONS) and not _matches_any(file_name, exclude_files): yield os.path.join(dir_path, file_name)
+            pending_dirs.extend(sorted(sub_dirs, reverse=True))
@@ -0,0 +1,176 @@
+import re
+from array import array
+
+# In-process subtitle events and the SRT/ASS/VTT readers and writers, so one demuxed track can be written in
+# several text formats without running ffmpeg again. Event text is kept in SRT markup: '\n' line breaks and
+# <b>/<i>/<u> tags; anything a format cannot express is dropped when converting to it.
+TEXT_FORMATS = ('srt', 'ass', 'vtt')
+CODEC_TEXT_FORMATS = {'subrip': 'srt', 'srt': 'srt', 'ass': 'ass', 'ssa': 'ass', 'webvtt': 'vtt'} # ffprobe codec -> format it converts to losslessly
+ASS_DEFAULT_HEADER = ("[Script Info]\nScriptType: v4.00+\nPlayResX: 384\nPlayResY: 288\nScaledBorderAndShadow: yes\n\n[V4+ Styles]\n"
+                      "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+                      "Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,0\n\n")
+ASS_EVENTS_HEADER = "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+
+_CUE_TIMES_RE = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})')
+_BLOCK_SPLIT_RE = re.compile(r'\n[ \t]*\n')
+_ASS_TIME_RE = re.compile(r'(\d+):(\d{2}):(\d{2})[.:](\d{1,2})')
+_ASS_OVERRIDE_RE = re.compile(r'\{[^}]*\}')
+_ASS_STYLE_TAG_RE = re.compile(r'\\([biu])([01])(?![0-9])')
+_TAG_RE = re.compile(r'</?([a-zA-Z]+)[^>]*>')
+_KEPT_TAGS = {'b', 'i', 'u'}
+
+
+class SubtitleEvents:
+    __slots__ = ('starts', 'ends', 'texts', 'styles', 'ass_header')
+
+    def __init__(self):
+        self.starts = array('d'); self.ends = array('d') # seconds
+        self.texts = []; self.styles = [] # ASS style names ('' outside ASS)
+        self.ass_header = None # [Script Info]/styles of an ASS source, reused when writing ASS
+
+    def append(self, start, end, text, style=''):
+        self.starts.append(start); self.ends.append(end); self.texts.append(text); self.styles.append(style)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends, self.texts, self.styles)
+
+    def in_time_order(self):
+        # SRT and VTT readers expect cues sorted by start; ASS files are often not.
+        return sorted(range(len(self.texts)), key=self.starts.__getitem__)
+
+
+def _seconds(hours, minutes, seconds, fraction):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction.ljust(3, '0')) / 1000
+
+
+def _ass_seconds(match):
+    # H:MM:SS.cc - the fraction is centiseconds.
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3)) + int(match.group(4).ljust(2, '0')[:2]) / 100
+
+
+def _strip_unkept_tags(text):
+    return _TAG_RE.sub(lambda match: match.group(0).lower() if match.group(1).lower() in _KEPT_TAGS else '', text)
+
+
+def _parse_cues(text, events, vtt):
+    for block in _BLOCK_SPLIT_RE.split(text.replace('\r\n', '\n').replace('\r', '\n')):
+        lines = block.strip('\n').split('\n')
+        for position, line in enumerate(lines[:3]):
+            match = _CUE_TIMES_RE.search(line)
+            if match: break
+        else:
+            continue
+        cue_text = '\n'.join(lines[position + 1:]).strip()
+        if vtt: cue_text = _strip_unkept_tags(cue_text).replace('&lt;', '<').replace('&gt;', '>').replace('&nbsp;', ' ').replace('&amp;', '&')
+        if cue_text: events.append(_seconds(*match.groups()[:4]), _seconds(*match.groups()[4:]), cue_text)
+
+
+def parse_srt(text):
+    events = SubtitleEvents(); _parse_cues(text.lstrip('\ufeff'), events, False)
+    return events
+
+
+def parse_vtt(text):
+    events = SubtitleEvents(); _parse_cues(text.lstrip('\ufeff'), events, True)
+    return events
+
+
+def _ass_text_to_markup(text):
+    def override(match):
+        return ''.join(f"<{tag}>" if state == '1' else f"</{tag}>" for tag, state in _ASS_STYLE_TAG_RE.findall(match.group(0)))
+    return _ASS_OVERRIDE_RE.sub(override, text).replace('\\N', '\n').replace('\\n', '\n').replace('\\h', ' ').strip()
+
+
+def parse_ass(text):
+    events = SubtitleEvents(); header_lines = []; fields = None; in_events = False
+    for line in text.lstrip('\ufeff').replace('\r\n', '\n').split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('['): in_events = stripped.lower() == '[events]'
+        if not in_events:
+            header_lines.append(line); continue
+        key, _, value = stripped.partition(':')
+        if key == 'Format': fields = [field.strip().lower() for field in value.split(',')]
+        elif key == 'Dialogue' and fields:
+            values = value.lstrip().split(',', len(fields) - 1)
+            if len(values) < len(fields): continue
+            row = dict(zip(fields, values)); start, end = _ASS_TIME_RE.match(row['start'].strip()), _ASS_TIME_RE.match(row['end'].strip())
+            cue_text = _ass_text_to_markup(row['text'])
+            if start and end and cue_text: events.append(_ass_seconds(start), _ass_seconds(end), cue_text, row.get('style', '').strip())
+    header = '\n'.join(header_lines).strip('\n')
+    if header: events.ass_header = header + '\n\n'
+    return events
+
+
+def format_srt_time(seconds):
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000); minutes, milliseconds = divmod(milliseconds, 60000); secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+
+def events_to_srt(events):
+    # (start, end, text) tuples.
+    return ''.join(f"{number}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n" for number, (start, end, text) in enumerate(events, 1))
+
+
+def format_vtt_time(seconds):
+    # Hours are left out when zero, as ffmpeg's WebVTT muxer does.
+    timestamp = format_srt_time(seconds).replace(',', '.')
+    return timestamp[3:] if timestamp.startswith('00:') else timestamp
+
+
+def format_ass_time(seconds):
+    centiseconds = int(round(max(0.0, seconds) * 100))
+    hours, centiseconds = divmod(centiseconds, 360000); minutes, centiseconds = divmod(centiseconds, 6000); secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def events_to_vtt(events):
+    # (start, end, text) tuples.
+    return "WEBVTT\n" + ''.join(f"\n{format_vtt_time(start)} --> {format_vtt_time(end)}\n{text}\n" for start, end, text in events)
+
+
+def write_srt(events):
+    return ''.join(f"{number}\n{format_srt_time(events.starts[i])} --> {format_srt_time(events.ends[i])}\n{events.texts[i]}\n\n" for number, i in enumerate(events.in_time_order(), 1))
+
+
+def write_vtt(events):
+    return events_to_vtt((events.starts[i], events.ends[i], _strip_unkept_tags(events.texts[i]).replace('&', '&amp;')) for i in events.in_time_order())
+
+
+def write_ass(events):
+    def to_ass(text):
+        return _TAG_RE.sub(lambda match: '' if match.group(1).lower() not in _KEPT_TAGS else ('{\\%s0}' if match.group(0)[1] == '/' else '{\\%s1}') % match.group(1).lower(), text).replace('\n', '\\N')
+    header = events.ass_header or ASS_DEFAULT_HEADER
+    return header + ASS_EVENTS_HEADER + ''.join(f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},{style or 'Default'},,0,0,0,,{to_ass(text)}\n" for start, end, text, style in events)
+
+
+PARSERS = {'srt': parse_srt, 'ass': parse_ass, 'ssa': parse_ass, 'vtt': parse_vtt}
+WRITERS = {'srt': write_srt, 'ass': write_ass, 'vtt': write_vtt}
+
+
+def read_subtitle_file(path, subtitle_format):
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as subtitle_file: return PARSERS[subtitle_format](subtitle_file.read())
+
+
+def write_subtitle_file(events, path, subtitle_format):
+    with open(path, 'w', encoding='utf-8') as subtitle_file: subtitle_file.write(WRITERS[subtitle_format](events))
+
+
+def split_output_formats(output_format):
+    # "srt,vtt" -> ['srt', 'vtt']: the first format is demuxed, the others are rendered from it in-process.
+    # 'copy' can only come first, since the other formats are converted from whatever it writes.
+    formats = []
+    for subtitle_format in (output_format or '').lower().replace(' ', '').split(','):
+        if subtitle_format and subtitle_format not in formats and (subtitle_format in TEXT_FORMATS or (subtitle_format == 'copy' and not formats)): formats.append(subtitle_format)
+    return formats or ['srt']
+
+
+def formats_for_codec(output_formats, codec):
+    # Demux a text track in its own format when that is one of the requested ones, so e.g. ASS styling survives
+    # in the .ass output while the .srt is rendered from it.
+    source_format = CODEC_TEXT_FORMATS.get(codec)
+    if output_formats[0] == 'copy' or source_format not in output_formats[1:]: return output_formats
+    return [source_format] + [subtitle_format for subtitle_format in output_formats if subtitle_format != source_format]
@@ -4,6 +4,8 @@ import os
 import sys
 import subprocess
 from config import LIGHT_THEME, DARK_THEME
+from subtitle_model import TEXT_FORMATS, split_output_formats
+from ui_events import LOG_LEVELS
 
 class SubtitleExtractorUI:
     def __init__(self, master, app_logic):
@@ -36,6 +38,8 @@ class SubtitleExtractorUI:
         self.folder_label.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         self.select_folder_button = ttk.Button(self.folder_frame, text="Select Folder", command=self.logic.select_folder)
         self.select_folder_button.pack(side=tk.RIGHT)
+        self.stop_scan_button = ttk.Button(self.folder_frame, text="Stop Scan", command=self.logic.stop_folder_scan, state=tk.DISABLED)
+        self.stop_scan_button.pack(side=tk.RIGHT, padx=5)
 
     def _create_file_list_widgets(self):
         self.list_frame = ttk.Frame(self.main_frame_container)
@@ -55,12 +59,20 @@ class SubtitleExtractorUI:
         format_frame = ttk.Frame(self.options_ui_frame)
         format_frame.pack(side=tk.LEFT, padx=(0, 10), fill=tk.X, expand=True)
         ttk.Label(format_frame, text="Output Format:").pack(side=tk.LEFT, padx=(5, 2))
-        self.output_format_var = tk.StringVar(value=self.settings['default_output_format'])
+        output_formats = split_output_formats(self.settings['default_output_format'])
+        self.output_format_var = tk.StringVar(value=output_formats[0])
         self.format_options = ["srt", "ass", "vtt", "copy"]
         self.format_combobox = ttk.Combobox(format_frame, textvariable=self.output_format_var,
                                             values=self.format_options, state="readonly", width=10)
         self.format_combobox.pack(side=tk.LEFT, padx=2)
         self.format_combobox.bind("<<ComboboxSelected>>", self.logic.on_format_selected)
+        # Further formats rendered from the same demux, no second FFmpeg pass.
+        ttk.Label(format_frame, text="Also:").pack(side=tk.LEFT, padx=(8, 2))
+        self.extra_format_vars = {}
+        for subtitle_format in TEXT_FORMATS:
+            self.extra_format_vars[subtitle_format] = tk.BooleanVar(value=subtitle_format in output_formats[1:])
+            ttk.Checkbutton(format_frame, text=subtitle_format.upper(), variable=self.extra_format_vars[subtitle_format],
+                            command=self.logic.on_format_selected, style="TCheckbutton").pack(side=tk.LEFT)
 
         self.select_langs_button = ttk.Button(format_frame, text="Filter Languages...", command=self.logic.open_language_filter_dialog)
         self.select_langs_button.pack(side=tk.LEFT, padx=(10, 5))
@@ -191,6 +203,20 @@ class SubtitleExtractorUI:
         ttk.Label(content_frame, text="Use placeholders: {INPUT_FILE_PATH}, {OUTPUT_SRT_PATH}, {LANG_3_CODE}",
                   font=("Helvetica", 8)).pack(anchor='w', pady=(0, 10))
 
+        ttk.Label(content_frame, text="OCR Engine ('builtin' decodes PGS itself and OCRs each unique image with Tesseract; needs NumPy):").pack(anchor='w')
+        ocr_engine_var = tk.StringVar(value=self.settings.get('ocr_engine', 'template'))
+        ttk.Combobox(content_frame, textvariable=ocr_engine_var, values=['template', 'builtin'], state='readonly', width=12).pack(anchor='w', pady=(0, 10))
+
+        ttk.Label(content_frame, text="OCR Backend ('batch' = one launch per movie, 'worker' = long-lived process; empty command falls back to the template):").pack(anchor='w')
+        ocr_backend_var = tk.StringVar(value=self.settings.get('ocr_backend', 'template'))
+        ttk.Combobox(content_frame, textvariable=ocr_backend_var, values=['template', 'batch', 'worker'], state='readonly', width=12).pack(anchor='w', pady=(0, 5))
+        ttk.Label(content_frame, text="Batch Command ({INPUT_FILE_PATHS}, {INPUT_LIST_FILE}, {OUTPUT_DIR}, {LANG_3_CODE}):").pack(anchor='w')
+        ocr_batch_cmd_var = tk.StringVar(value=self.settings.get('ocr_batch_command_template', ''))
+        ttk.Entry(content_frame, textvariable=ocr_batch_cmd_var).pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(content_frame, text="Worker Command (JSON lines over stdin/stdout):").pack(anchor='w')
+        ocr_worker_cmd_var = tk.StringVar(value=self.settings.get('ocr_worker_command', ''))
+        ttk.Entry(content_frame, textvariable=ocr_worker_cmd_var).pack(fill=tk.X, pady=(0, 10))
+
         ttk.Label(content_frame, text="Default Language for OCR (3-letter code):").pack(anchor='w')
         ocr_lang_var = tk.StringVar(value=self.settings.get('ocr_default_lang', 'eng'))
         ttk.Entry(content_frame, textvariable=ocr_lang_var, width=10).pack(anchor='w', pady=(0, 15))
@@ -202,6 +228,10 @@ class SubtitleExtractorUI:
             self.settings['ocr_enabled'] = ocr_enabled_var.get()
             self.settings['ocr_command_template'] = ocr_cmd_var.get()
             self.settings['ocr_default_lang'] = ocr_lang_var.get()
+            self.settings['ocr_engine'] = ocr_engine_var.get()
+            self.settings['ocr_backend'] = ocr_backend_var.get()
+            self.settings['ocr_batch_command_template'] = ocr_batch_cmd_var.get()
+            self.settings['ocr_worker_command'] = ocr_worker_cmd_var.get()
             self.logic.config.save_config(self.logic.extract_all_languages_flag, self.logic.user_selected_languages)
             self.logic.log_message("OCR Holocron settings updated and saved.", to_console=False)
             dialog.destroy()
@@ -220,10 +250,14 @@ class SubtitleExtractorUI:
         save_button = ttk.Button(log_button_frame, text="Save Mission Log", command=self.logic.save_log_to_file)
         if not self.logic.log_dir_path: save_button.config(state=tk.DISABLED)
         save_button.pack(side=tk.LEFT, padx=5)
+        self.log_level_var = tk.StringVar(value=self.logic.log_view_level if self.logic.log_view_level in LOG_LEVELS else 'debug')
+        log_level_combobox = ttk.Combobox(log_button_frame, textvariable=self.log_level_var, values=LOG_LEVELS, state="readonly", width=8)
+        log_level_combobox.pack(side=tk.RIGHT, padx=5); log_level_combobox.bind("<<ComboboxSelected>>", self.logic.on_log_level_selected)
+        ttk.Label(log_button_frame, text="Show:").pack(side=tk.RIGHT)
         self.logic.log_text_widget = scrolledtext.ScrolledText(self.logic.log_window, wrap=tk.WORD, state=tk.DISABLED, padx=5, pady=5); self.logic.log_text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         if hasattr(self.logic.log_text_widget, 'vbar'): self.logic.log_text_widget.vbar.config(width=12)
         self.logic.log_text_widget.config(state=tk.NORMAL)
-        for msg in self.logic.log_buffer: self.logic.log_text_widget.insert(tk.END, msg)
+        self.logic.log_text_widget.insert(tk.END, self.logic.log_ring.text(self.logic.log_view_level))
         self.logic.log_text_widget.see(tk.END); self.logic.log_text_widget.config(state=tk.DISABLED)
         self.logic.log_text_widget.configure(bg=self.current_theme["log_bg"], fg=self.current_theme["log_fg"], insertbackground=self.current_theme["fg"])
         for child in log_button_frame.winfo_children():
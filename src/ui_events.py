@@ -0,0 +1,86 @@
+import threading
+import collections
+import logging
+import logging.handlers
+
+# Worker threads never touch Tk: they post log lines, status and progress here and the GUI drains the bus on a
+# fixed tick. Status and progress are coalesced (only the latest value per tick is applied) and log lines are
+# appended in one batch per tick. The GUI keeps only the last log_buffer_lines lines; the optional spill file
+# (rotating) keeps the whole run.
+LOG_LEVELS = ('debug', 'info', 'warning')
+_WARNING_TAGS = ('[WARN', '[ERROR', '[CRITICAL', '[TIMEOUT', '[OCR FAILED', '[OCR ERROR', '[OCR TIMEOUT')
+
+
+def message_level(message, to_console):
+    # Engine messages carry no level; console-worthy lines are 'info', the rest (commands, stderr dumps) 'debug'.
+    tag_start = message.lstrip()[:14]
+    if any(tag_start.startswith(tag) for tag in _WARNING_TAGS): return 'warning'
+    return 'info' if to_console else 'debug'
+
+
+def level_allows(level, minimum_level):
+    return LOG_LEVELS.index(level) >= LOG_LEVELS.index(minimum_level if minimum_level in LOG_LEVELS else 'debug')
+
+
+class LogRing:
+    # Bounded in-memory log: (level, line) pairs, oldest dropped first.
+    def __init__(self, max_lines, spill_path=None, spill_max_bytes=0, spill_backups=0):
+        self.lines = collections.deque(maxlen=max_lines); self.dropped = 0
+        self._spill = None
+        if spill_path:
+            handler = logging.handlers.RotatingFileHandler(spill_path, maxBytes=spill_max_bytes, backupCount=spill_backups, encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._spill = logging.getLogger(f"sub_extractor.spill.{id(self)}"); self._spill.propagate = False
+            self._spill.setLevel(logging.DEBUG); self._spill.addHandler(handler)
+        self.spill_path = spill_path
+
+    def extend(self, entries):
+        overflow = len(self.lines) + len(entries) - self.lines.maxlen
+        if overflow > 0: self.dropped += overflow
+        self.lines.extend(entries)
+
+    def spill(self, line):
+        # Called as lines are logged, from any thread (logging handlers lock), so the file misses nothing.
+        if self._spill: self._spill.info(line)
+
+    def clear(self):
+        self.lines.clear(); self.dropped = 0
+
+    def text(self, minimum_level='debug'):
+        return ''.join(line + '\n' for level, line in self.lines if level_allows(level, minimum_level))
+
+    def close(self):
+        if self._spill:
+            for handler in list(self._spill.handlers): handler.close(); self._spill.removeHandler(handler)
+            self._spill = None
+
+
+class UiEventBus:
+    def __init__(self, max_pending_lines):
+        self._lock = threading.Lock()
+        self._lines = collections.deque(maxlen=max_pending_lines) # a stalled tick cannot grow this without limit either
+        self._status = None; self._progress = None; self._calls = []; self._rows = {}
+
+    def post_log(self, level, line):
+        with self._lock: self._lines.append((level, line))
+
+    def set_status(self, message):
+        with self._lock: self._status = message
+
+    def set_progress(self, value):
+        with self._lock: self._progress = value
+
+    def set_row(self, row_id, status):
+        # Latest status per file-list row, applied on the next tick.
+        with self._lock: self._rows[row_id] = status
+
+    def call(self, callback):
+        # Run callback on the Tk thread at the next tick (after that tick's log lines).
+        with self._lock: self._calls.append(callback)
+
+    def drain(self):
+        with self._lock:
+            lines = list(self._lines); self._lines.clear()
+            status, progress, calls, rows = self._status, self._progress, self._calls, self._rows
+            self._status = None; self._progress = None; self._calls = []; self._rows = {}
+        return lines, status, progress, rows, calls
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+
+from config import MOVIE_EXTENSIONS
+
+# inotify(7) constants (linux/inotify.h)
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE = 0x2, 0x8, 0x40, 0x80, 0x100
+IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x400, 0x800, 0x4000, 0x8000, 0x40000000
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    # Minimal ctypes binding, no third-party dependency. Raises OSError when inotify is not available.
+    def __init__(self):
+        if not sys.platform.startswith('linux'): raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs_by_wd = {}
+
+    def add_watch(self, dir_path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno(); raise OSError(err, f"inotify_add_watch failed for {dir_path}: {os.strerror(err)}")
+        self._dirs_by_wd[wd] = dir_path
+
+    def read_events(self, timeout):
+        # [(dir_path, name, mask)]; dir_path is None for a queue overflow.
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready: return []
+        try: buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError: return []
+        events, offset = [], 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + name_length].rstrip(b'\0')); offset += name_length
+            if mask & IN_Q_OVERFLOW: events.append((None, '', mask)); continue
+            dir_path = self._dirs_by_wd.get(wd)
+            if mask & IN_IGNORED: self._dirs_by_wd.pop(wd, None); continue
+            if dir_path is not None: events.append((dir_path, name, mask))
+        return events
+
+    def close(self):
+        if self.fd >= 0: os.close(self.fd); self.fd = -1
+
+
+class FolderWatcher:
+    # Watches folder trees for new or changed movie files and hands each one over once it has stopped
+    # growing (same size and mtime for settle_seconds). Uses inotify where available; otherwise it stats
+    # every known directory each poll and only re-lists the ones whose mtime moved. A periodic full
+    # re-list catches files rewritten in place, which does not touch the directory's mtime.
+    def __init__(self, roots, settle_seconds=30, poll_interval=10, full_rescan_interval=900, use_inotify=True, log_callback=None):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.settle_seconds = settle_seconds; self.poll_interval = poll_interval; self.full_rescan_interval = full_rescan_interval
+        self.log_callback = log_callback or (lambda message, to_console=True: None)
+        self._dir_mtimes = {}
+        self._handled = {} # path -> (size, mtime_ns) last handed over (or present at start-up)
+        self._pending = {} # path -> [size, mtime_ns, unchanged since (monotonic)]
+        self._last_full_rescan = self._last_dir_poll = time.monotonic()
+        self.inotify = None
+        if use_inotify:
+            try: self.inotify = InotifyWatcher()
+            except (OSError, AttributeError) as e: self.log_callback(f"[WATCH] inotify unavailable ({e}), falling back to polling every {poll_interval}s.", True)
+
+    @property
+    def mode(self):
+        return "inotify" if self.inotify else "polling"
+
+    def _add_inotify_watch(self, dir_path):
+        try:
+            self.inotify.add_watch(dir_path)
+        except OSError as e:
+            # Usually fs.inotify.max_user_watches; polling still covers every directory.
+            self.log_callback(f"[WATCH] {e}. Switching to polling.", True)
+            self.inotify.close(); self.inotify = None
+
+    def _mark_pending(self, path, size, mtime_ns):
+        if path not in self._pending: self._pending[path] = [size, mtime_ns, time.monotonic()]
+
+    def _scan_dir(self, dir_path, baseline=False):
+        try:
+            dir_mtime_ns = os.stat(dir_path).st_mtime_ns
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in self._dir_mtimes: self._scan_dir(entry.path, baseline)
+                        elif entry.name.lower().endswith(MOVIE_EXTENSIONS) and entry.is_file():
+                            st = entry.stat(); signature = (st.st_size, st.st_mtime_ns)
+                            if baseline: self._handled[entry.path] = signature
+                            elif self._handled.get(entry.path) != signature: self._mark_pending(entry.path, *signature)
+                    except OSError: continue
+        except OSError:
+            self._dir_mtimes.pop(dir_path, None); return
+        if dir_path not in self._dir_mtimes and self.inotify: self._add_inotify_watch(dir_path)
+        self._dir_mtimes[dir_path] = dir_mtime_ns
+
+    def start(self, process_existing=False):
+        # Files already present are only handed over if process_existing; otherwise they are the baseline.
+        for root in self.roots: self._scan_dir(root, baseline=not process_existing)
+        self.log_callback(f"[WATCH] Watching {len(self._dir_mtimes)} folder(s) under {len(self.roots)} root(s) ({self.mode}), "
+                          f"{len(self._pending) if process_existing else len(self._handled)} existing transmission(s) {'queued' if process_existing else 'ignored'}.", True)
+
+    def _poll_dirs(self):
+        for dir_path, known_mtime_ns in list(self._dir_mtimes.items()):
+            try: current_mtime_ns = os.stat(dir_path).st_mtime_ns
+            except OSError: self._dir_mtimes.pop(dir_path, None); continue
+            if current_mtime_ns != known_mtime_ns: self._scan_dir(dir_path)
+
+    def _apply_events(self, events):
+        for dir_path, name, mask in events:
+            if dir_path is None:
+                self.log_callback("[WATCH] inotify queue overflowed, re-scanning all folders.", True)
+                for known_dir in list(self._dir_mtimes): self._scan_dir(known_dir)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF): self._dir_mtimes.pop(dir_path, None); continue
+            path = os.path.join(dir_path, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and path not in self._dir_mtimes: self._scan_dir(path)
+            elif name.lower().endswith(MOVIE_EXTENSIONS):
+                # Size/mtime are read when settling, so a burst of IN_MODIFY events costs nothing here.
+                self._mark_pending(path, None, None)
+
+    def _collect_settled(self):
+        now = time.monotonic(); settled = []
+        for path, state in list(self._pending.items()):
+            try: st = os.stat(path)
+            except OSError: del self._pending[path]; continue
+            signature = (st.st_size, st.st_mtime_ns)
+            if (state[0], state[1]) != signature:
+                state[0], state[1], state[2] = st.st_size, st.st_mtime_ns, now
+            elif st.st_size > 0 and now - state[2] >= self.settle_seconds and self._handled.get(path) != signature:
+                del self._pending[path]; self._handled[path] = signature; settled.append(path)
+            elif self._handled.get(path) == signature:
+                del self._pending[path]
+        return sorted(settled)
+
+    def next_batch(self, stop_event):
+        # Blocks until at least one file has settled (returns the list) or stop_event is set (returns []).
+        while not stop_event.is_set():
+            # Short ticks keep cancellation and settle checks responsive; directory polling keeps its own interval.
+            if self.inotify:
+                self._apply_events(self.inotify.read_events(1.0))
+            else:
+                if stop_event.wait(1.0 if self._pending else self.poll_interval): break
+                if time.monotonic() - self._last_dir_poll >= self.poll_interval:
+                    self._last_dir_poll = time.monotonic(); self._poll_dirs()
+            if self.full_rescan_interval and time.monotonic() - self._last_full_rescan >= self.full_rescan_interval:
+                self._last_full_rescan = time.monotonic()
+                for dir_path in list(self._dir_mtimes): self._scan_dir(dir_path)
+            settled = self._collect_settled()
+            if settled: return settled
+        return []
+
+    def close(self):
+        if self.inotify: self.inotify.close(); self.inotify = None
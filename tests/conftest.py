@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live flat in src/ and import each other by name.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # An ExtractionEngine on a throwaway app folder, without caches or journal; its log lines collect in engine.messages.
+    from config import AppConfig
+    from engine import ExtractionEngine
+    config = AppConfig(str(tmp_path / "app")); os.makedirs(config.app_dir)
+    config.settings.update(probe_cache_enabled=False, ocr_cache_enabled=False, job_journal_enabled=False)
+    messages = []
+    extraction_engine = ExtractionEngine(config, log_callback=lambda message, to_console=True: messages.append(message))
+    extraction_engine.messages = messages
+    yield extraction_engine
+    extraction_engine.close()
@@ -0,0 +1,35 @@
+import argparse
+
+import cli
+from config import AppConfig
+
+
+class FakeEngine:
+    def __init__(self):
+        self.messages = []; self.runs = []
+
+    def log_message(self, message, to_console=True):
+        self.messages.append(message)
+
+    def run(self, batch, output_format, language_filter):
+        self.runs.append(batch)
+        if len(self.runs) == 1: raise RuntimeError("journal is locked")
+        return "Mission Report: 1/1 targets engaged."
+
+    def cancel(self):
+        pass
+
+
+def test_watch_survives_a_failed_run_and_reports_a_failed_watcher(tmp_path, monkeypatch):
+    batches = [["/watch/a.mkv"], ["/watch/b.mkv"]]
+    def next_batch(watcher, stop_event):
+        if batches: return batches.pop(0)
+        raise OSError("watched folder unmounted")
+    monkeypatch.setattr(cli.FolderWatcher, 'next_batch', next_batch)
+    engine = FakeEngine()
+    exit_code = cli.watch_folders(engine, AppConfig(str(tmp_path)), argparse.Namespace(paths=[str(tmp_path)], process_existing=False))
+    assert exit_code == cli.EXIT_FAILURES
+    assert engine.runs == [["/watch/a.mkv"], ["/watch/b.mkv"]]
+    assert any("failed, still watching: journal is locked" in message for message in engine.messages)
+    assert "Mission Report: 1/1 targets engaged." in engine.messages
+    assert any("watch ended: watched folder unmounted" in message for message in engine.messages)
@@ -0,0 +1,49 @@
+import subprocess
+import threading
+
+from engine import JOB_CANCELLED
+from scheduler import ExtractionScheduler
+
+
+def ocr_job(index):
+    return {"index": index, "lang": "eng", "safe_lang": "eng", "codec": "hdmv_pgs_subtitle", "run_ocr": True, "output_path": f"/nonexistent/movie.eng.{index}.srt"}
+
+
+def file_state_for(movie_path):
+    return {"movie_path": movie_path, "movie_filename": movie_path.rsplit('/', 1)[-1], "output_format": "srt",
+            "had_error": False, "timed_out": False, "subs_extracted": 0, "staged_bytes": {}}
+
+
+def test_builtin_decoder_timeout_is_a_timeout(engine, monkeypatch):
+    def tesseract_hangs(*args): raise subprocess.TimeoutExpired('tesseract', 1)
+    monkeypatch.setattr(engine, '_use_builtin_decoder', lambda codec: True)
+    monkeypatch.setattr(engine, '_ocr_with_builtin_decoder', tesseract_hangs)
+    job = ocr_job(3); file_state = file_state_for("/movies/movie.mkv")
+    results = engine._run_ocr_on_staged_tracks(file_state["movie_path"], [(job, "/tmp/staged3.sup")])
+    assert results == [False]
+    engine._tally_stream_results(file_state, [(job, results[0])])
+    assert engine.result_store.has_outcome(file_state["movie_path"], 'timed_out')
+    assert not engine.result_store.has_outcome(file_state["movie_path"], 'error')
+    assert not any("CRITICAL" in message for message in engine.messages)
+
+
+def test_cancel_with_ocr_batches_queued(engine):
+    scheduler = ExtractionScheduler(1, 1, engine.cancel_requested)
+    started, release = threading.Event(), threading.Event()
+    def running_batch(batch):
+        started.set(); release.wait(5)
+        return [None] * len(batch) # its process was killed by the cancel
+    batches = [[(ocr_job(index), f"/tmp/staged{index}.sup")] for index in range(3)]
+    file_state = file_state_for("/movies/movie.mkv")
+    engine.result_store.file_started(file_state["movie_path"], 0)
+    ocr_futures = [(batch, scheduler.submit_ocr(running_batch, batch)) for batch in batches]
+    assert started.wait(5)
+    engine.cancel_requested.set(); release.set()
+    stream_results = []
+    scheduler.when_all([future for _, future in ocr_futures], lambda: engine._finish_ocr_for_file(file_state, stream_results, ocr_futures, None, 1))
+    scheduler.wait(); scheduler.shutdown()
+    assert [future.result() for _, future in ocr_futures][1:] == [None, None] # drained without running
+    assert not any("CRITICAL" in message for message in engine.messages)
+    assert [job["outcome"] for job, ok in stream_results] == [JOB_CANCELLED] * 3
+    assert not any(ok for _, ok in stream_results)
+    assert not file_state["had_error"]
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import ffmpeg_progress
+from ffmpeg_progress import run_ffmpeg_with_progress, BoundedText, StallTimeout
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="fake ffmpeg is a POSIX script")
+
+
+def fake_ffmpeg(tmp_path, body):
+    # An executable standing in for ffmpeg; it ignores the arguments it is given.
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\nimport os, subprocess, sys, time\n{body}\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+def running(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as stat_file: return stat_file.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return False
+
+
+def test_stalled_run_raises_and_kills_the_process_group(tmp_path, monkeypatch):
+    monkeypatch.setattr(ffmpeg_progress, 'POLL_SECONDS', 0.05)
+    pid_file = tmp_path / "helper.pid"
+    ffmpeg = fake_ffmpeg(tmp_path, f"helper = subprocess.Popen(['sleep', '60']); open({str(pid_file)!r}, 'w').write(str(helper.pid))\n"
+                                   "for us in (0, 500000, 1000000): print(f'out_time_us={us}', flush=True); time.sleep(0.1)\n"
+                                   "time.sleep(60)")
+    fractions = []
+    started = time.monotonic()
+    with pytest.raises(StallTimeout) as raised:
+        run_ffmpeg_with_progress([ffmpeg, '-i', 'movie.mkv'], duration=2.0, stall_seconds=0.5, on_progress=fractions.append)
+    assert time.monotonic() - started < 10
+    assert "No progress from 'ffmpeg' for" in str(raised.value)
+    assert fractions and fractions[-1] == pytest.approx(0.5)
+    helper_pid = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while running(helper_pid) and time.monotonic() < deadline: time.sleep(0.05)
+    assert not running(helper_pid) # the whole group went, not just the leader
+
+
+def test_hard_limit_and_normal_exit(tmp_path, monkeypatch):
+    monkeypatch.setattr(ffmpeg_progress, 'POLL_SECONDS', 0.05)
+    ffmpeg = fake_ffmpeg(tmp_path, "n = 0\nwhile True: n += 1; print(f'total_size={n}', flush=True); time.sleep(0.02)")
+    with pytest.raises(subprocess.TimeoutExpired) as raised:
+        run_ffmpeg_with_progress([ffmpeg], stall_seconds=5, max_seconds=0.3)
+    assert not isinstance(raised.value, StallTimeout)
+    ffmpeg = fake_ffmpeg(tmp_path, "sys.stderr.write('head\\n' + 'x' * 100 + '\\n'); sys.exit(3)")
+    assert run_ffmpeg_with_progress([ffmpeg]) == (3, 'head\n' + 'x' * 100 + '\n')
+
+
+def test_stderr_keeps_only_head_and_tail(tmp_path):
+    ffmpeg = fake_ffmpeg(tmp_path, "for i in range(5000): sys.stderr.write(f'line {i:05}\\n')")
+    returncode, stderr = run_ffmpeg_with_progress([ffmpeg], stderr_max_chars=4096)
+    assert returncode == 0
+    assert stderr.startswith('line 00000\n') and stderr.endswith('line 04999\n')
+    assert "characters of FFmpeg output dropped" in stderr and len(stderr) < 4096 + 200
+
+
+def test_bounded_text():
+    text = BoundedText(2048)
+    for i in range(1000): text.add(f"{i:09}\n")
+    lines = text.text().splitlines()
+    assert lines[0] == '000000000' and lines[-1] == '000000999'
+    assert text.dropped_chars == 10 * 1000 - text.head_chars - text.tail_chars
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from instrumentation import MeasuredPopen, RunMetrics
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'wait4'), reason="rusage needs wait4()")
+BUSY_CHILD = [sys.executable, '-c', 'import time\nend = time.process_time() + 0.2\nwhile time.process_time() < end: pass']
+
+
+def test_poll_records_child_rusage():
+    metrics = RunMetrics()
+    with metrics.stage('extract'):
+        process = MeasuredPopen(BUSY_CHILD)
+        while process.poll() is None: time.sleep(0.01)
+    assert process.returncode == 0
+    assert process.child_cpu >= 0.1 and process.max_rss_kb > 0
+    stats = metrics.to_dict()["stages"]["extract"]
+    assert stats["processes"] == 1 and stats["child_cpu_seconds"] >= 0.1
+
+
+def test_communicate_and_wait_timeout():
+    metrics = RunMetrics()
+    with metrics.stage('probe'):
+        process = MeasuredPopen(BUSY_CHILD, stdout=subprocess.PIPE)
+        process.communicate(timeout=10)
+    assert process.returncode == 0 and metrics.to_dict()["stages"]["probe"]["processes"] == 1
+    sleeper = MeasuredPopen([sys.executable, '-c', 'import time; time.sleep(10)'])
+    with pytest.raises(subprocess.TimeoutExpired): sleeper.wait(timeout=0.1)
+    sleeper.kill()
+    assert sleeper.wait() == -9 and sleeper.poll() == -9
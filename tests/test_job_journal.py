@@ -0,0 +1,65 @@
+import sys
+
+from job_journal import JobJournal, FILE_PROCESSED, JOB_DONE, JOB_FAILED, JOB_TIMED_OUT, JOB_PLANNED
+
+
+def jobs(*indexes):
+    return [{"index": index, "output_path": f"/out/movie.{index}.srt"} for index in indexes]
+
+
+def test_journal_round_trip(tmp_path):
+    db_path = str(tmp_path / "journal.sqlite3")
+    journal = JobJournal(db_path)
+    run_id = journal.begin_run(["/m/a.mkv", "/m/b.mkv"], 'srt', {'eng', 'fre'}, {'skip_if_exists': True})
+    journal.plan_jobs(run_id, "/m/a.mkv", 'srt', jobs(2, 3, 4, 5))
+    for job, status in zip(jobs(2, 3, 4), (JOB_DONE, JOB_FAILED, JOB_TIMED_OUT)): journal.finish_job(run_id, "/m/a.mkv", 'srt', job, status)
+    journal.record_file_outcome(run_id, "/m/a.mkv", 'error'); journal.record_file_outcome(run_id, "/m/a.mkv", FILE_PROCESSED)
+    journal.close() # the run was never ended: interrupted
+
+    journal = JobJournal(db_path)
+    run = journal.get_run()
+    assert run['run_id'] == run_id and run['state'] == 'running' and run['files'] == ["/m/a.mkv", "/m/b.mkv"]
+    assert run['language_filter'] == {'eng', 'fre'} and run['options'] == {'skip_if_exists': True}
+    assert journal.file_outcomes(run_id, "/m/a.mkv") == {'error', FILE_PROCESSED} and journal.run_outcomes(run_id) == [("/m/a.mkv", 'error')]
+    assert journal.done_streams(run_id, "/m/a.mkv", 'srt') == {2}
+    # Planning again keeps the finished job and puts the failed, timed-out and interrupted ones back to planned.
+    journal.plan_jobs(run_id, "/m/a.mkv", 'srt', jobs(2, 3, 4, 5))
+    assert journal.job_counts(run_id) == {JOB_DONE: 1, JOB_PLANNED: 3}
+    assert not journal.has_jobs(run_id, "/m/b.mkv")
+    journal.end_run(run_id, 'finished')
+    assert journal.get_run() is None and journal.get_run(run_id)['state'] == 'finished'
+    journal.close()
+
+
+def test_old_schema_is_replaced(tmp_path):
+    db_path = str(tmp_path / "journal.sqlite3")
+    journal = JobJournal(db_path); journal.begin_run(["/m/a.mkv"], 'srt', None)
+    journal._write("UPDATE meta SET value = '1' WHERE key = 'schema_version'"); journal.close()
+    journal = JobJournal(db_path)
+    assert journal.get_run() is None and journal.list_runs() == []
+    journal.close()
+
+
+def test_resume_skips_finished_files_and_retries_failures(tmp_path, engine):
+    # A fake ffprobe that logs which files were probed and finds no subtitle streams.
+    probed = tmp_path / "probed.txt"; ffprobe = tmp_path / "ffprobe"
+    ffprobe.write_text(f"#!{sys.executable}\nimport sys\nopen({str(probed)!r}, 'a').write(sys.argv[-1] + '\\n')\n"
+                       "print('{\"streams\": [], \"format\": {\"duration\": \"60.0\"}}')\n")
+    ffprobe.chmod(0o755); engine.settings['ffprobe_path'] = str(ffprobe)
+    movies = []
+    for name in ("done.mkv", "timed_out.mkv", "interrupted.mkv"):
+        movie = tmp_path / name; movie.write_bytes(b'\0' * 64); movies.append(str(movie))
+    engine.job_journal = JobJournal(str(tmp_path / "journal.sqlite3"))
+    run_id = engine.job_journal.begin_run(movies, 'srt', None)
+    for movie, outcome in zip(movies, ('success', 'timed_out')):
+        engine.job_journal.record_file_outcome(run_id, movie, outcome); engine.job_journal.record_file_outcome(run_id, movie, FILE_PROCESSED)
+
+    engine.run(movies, 'srt', resume_run_id=run_id)
+    assert probed.read_text().split() == [movies[2]]
+    assert engine.resumable_run(run_id)['state'] == 'finished'
+    assert engine.failed_files() == [movies[1]] # kept from the journal
+
+    probed.unlink()
+    engine.run(movies, 'srt', resume_run_id=run_id, retry_failures=True)
+    assert probed.read_text().split() == [movies[1]]
+    assert engine.failed_files() == []
@@ -0,0 +1,142 @@
+import zlib
+
+import pytest
+
+from mkv_demuxer import (MatroskaReader, MatroskaError, EBML_HEADER, SEGMENT, INFO, TIMESTAMP_SCALE, TRACKS, TRACK_ENTRY, TRACK_NUMBER, TRACK_TYPE, CODEC_ID,
+                         LANGUAGE, CONTENT_ENCODINGS, CONTENT_ENCODING, CONTENT_ENCODING_SCOPE, CONTENT_COMPRESSION, CONTENT_COMP_ALGO,
+                         CONTENT_COMP_SETTINGS, CUES, CUE_POINT, CUE_TIME, CUE_TRACK_POSITIONS, CUE_TRACK, CUE_CLUSTER_POSITION,
+                         CUE_RELATIVE_POSITION, CLUSTER, CLUSTER_TIMESTAMP, SIMPLE_BLOCK, BLOCK_GROUP, BLOCK, BLOCK_DURATION, COMP_HEADER_STRIP, COMP_ZLIB)
+
+
+def element(element_id, payload):
+    # Sizes are always written as 4-byte EBML integers, so an element's length never depends on its values.
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big') + (0x10000000 | len(payload)).to_bytes(4, 'big') + payload
+
+
+def uint(element_id, value, width=4):
+    return element(element_id, value.to_bytes(width, 'big'))
+
+
+def block_payload(track, relative, frames=None, lacing=0, lace_bytes=b''):
+    return bytes([0x80 | track]) + relative.to_bytes(2, 'big', signed=True) + bytes([lacing << 1]) + lace_bytes + b''.join(frames)
+
+
+def track_entry(number, track_type, codec_id, encoding=None):
+    fields = uint(TRACK_NUMBER, number, 1) + uint(TRACK_TYPE, track_type, 1) + element(CODEC_ID, codec_id.encode()) + element(LANGUAGE, b'eng')
+    if encoding: fields += element(CONTENT_ENCODINGS, element(CONTENT_ENCODING, uint(CONTENT_ENCODING_SCOPE, 1, 1) + element(CONTENT_COMPRESSION, encoding)))
+    return element(TRACK_ENTRY, fields)
+
+
+TRACKS_ELEMENT = element(TRACKS, track_entry(1, 1, 'V_MPEG4/ISO/AVC') + track_entry(2, 0x11, 'S_TEXT/UTF8')
+                         + track_entry(3, 0x11, 'S_TEXT/UTF8', uint(CONTENT_COMP_ALGO, COMP_HEADER_STRIP, 1) + element(CONTENT_COMP_SETTINGS, b'Hello'))
+                         + track_entry(4, 0x11, 'S_TEXT/UTF8', uint(CONTENT_COMP_ALGO, COMP_ZLIB, 1)))
+
+
+def clusters():
+    # [(cluster timestamp, [(track, block element)])]; subtitle blocks are BlockGroups with a duration, video is SimpleBlocks.
+    def subtitle(track, relative, text, duration):
+        return track, element(BLOCK_GROUP, element(BLOCK, block_payload(track, relative, [text])) + uint(BLOCK_DURATION, duration, 2))
+    def video(relative, size):
+        return 1, element(SIMPLE_BLOCK, block_payload(1, relative, [b'\0' * size]))
+    return [(1000, [video(0, 5000), subtitle(2, 0, b'First line', 1500), subtitle(3, 200, b', world', 800), video(40, 3000)]),
+            (4000, [subtitle(2, 500, b'Second line', 1000), subtitle(4, 600, zlib.compress(b'Packed text'), 700)])]
+
+
+def build_mkv(path, with_cues, extra_blocks=()):
+    # Info, Tracks, optionally Cues indexing every block of track 2, then the Clusters; extra_blocks end the last one.
+    cluster_elements = []; cue_targets = [] # (cluster index, position of the block inside the cluster)
+    cluster_list = clusters(); cluster_list[-1][1].extend(extra_blocks)
+    for index, (timestamp, blocks) in enumerate(cluster_list):
+        body = uint(CLUSTER_TIMESTAMP, timestamp, 2)
+        for track, block in blocks:
+            if track == 2: cue_targets.append((index, len(body)))
+            body += block
+        cluster_elements.append(element(CLUSTER, body))
+    def cues(cluster_offsets):
+        return element(CUES, b''.join(element(CUE_POINT, uint(CUE_TIME, 0) + element(CUE_TRACK_POSITIONS, uint(CUE_TRACK, 2, 1) + uint(CUE_CLUSTER_POSITION, cluster_offsets[index])
+                                                                                                    + uint(CUE_RELATIVE_POSITION, relative)))
+                                      for index, relative in cue_targets))
+    head = element(INFO, uint(TIMESTAMP_SCALE, 1000000)) + TRACKS_ELEMENT
+    offsets = []; position = len(head) + (len(cues([0] * len(cluster_elements))) if with_cues else 0)
+    for cluster in cluster_elements: offsets.append(position); position += len(cluster)
+    segment = head + (cues(offsets) if with_cues else b'') + b''.join(cluster_elements)
+    path.write_bytes(element(EBML_HEADER, b'') + element(SEGMENT, segment))
+    return str(path)
+
+
+EXPECTED_TRACK_2 = "1\n00:00:01,000 --> 00:00:02,500\nFirst line\n\n2\n00:00:04,500 --> 00:00:05,500\nSecond line\n\n"
+
+
+def extract(path, targets):
+    reader = MatroskaReader(path)
+    try: return reader, reader.extract(targets)
+    finally: reader.close()
+
+
+def test_tracks_and_content_encodings(tmp_path):
+    reader = MatroskaReader(build_mkv(tmp_path / "movie.mkv", with_cues=False)); reader.close()
+    tracks = {track.number: track for track in reader.subtitle_tracks}
+    assert sorted(tracks) == [2, 3, 4]
+    assert tracks[3].header_strip == b'Hello' and not tracks[3].zlib_frames
+    assert tracks[4].zlib_frames and tracks[4].header_strip == b''
+
+
+def test_scan_mode_header_stripping_and_zlib(tmp_path):
+    out = {number: tmp_path / f"track{number}.srt" for number in (2, 3, 4)}
+    reader, written = extract(build_mkv(tmp_path / "movie.mkv", with_cues=False), {number: (str(path), None) for number, path in out.items()})
+    assert reader.mode == 'scan' and written == {2: 2, 3: 1, 4: 1}
+    assert out[2].read_text(encoding='utf-8') == EXPECTED_TRACK_2
+    assert out[3].read_text(encoding='utf-8') == "1\n00:00:01,200 --> 00:00:02,000\nHello, world\n\n"
+    assert out[4].read_text(encoding='utf-8') == "1\n00:00:04,600 --> 00:00:05,300\nPacked text\n\n"
+
+
+def test_cues_mode_matches_scan_mode(tmp_path):
+    path = build_mkv(tmp_path / "movie.mkv", with_cues=True)
+    reader, written = extract(path, {2: (str(tmp_path / "cued.srt"), 2)})
+    assert reader.mode == 'cues' and written == {2: 2}
+    assert (tmp_path / "cued.srt").read_text(encoding='utf-8') == EXPECTED_TRACK_2
+    # Cue count does not match the block count the statistics report: the clusters are walked instead.
+    reader, written = extract(path, {2: (str(tmp_path / "scanned.srt"), 3)})
+    assert reader.mode == 'scan' and written == {2: 2}
+    assert (tmp_path / "scanned.srt").read_text(encoding='utf-8') == EXPECTED_TRACK_2
+
+
+def test_cues_mode_skips_other_payloads(tmp_path):
+    reader, _ = extract(build_mkv(tmp_path / "movie.mkv", with_cues=True), {2: (str(tmp_path / "cued.srt"), 2)})
+    assert reader.bytes_read < reader.file_size
+
+
+def test_xiph_lacing():
+    frames = [b'a' * 300, b'bb', b'ccc']
+    track, relative, parsed = MatroskaReader._parse_block(block_payload(5, -20, frames, lacing=1, lace_bytes=bytes([2, 255, 45, 2])))
+    assert (track, relative, parsed) == (5, -20, frames)
+
+
+def test_fixed_lacing():
+    frames = [b'abcd', b'efgh', b'ijkl']
+    assert MatroskaReader._parse_block(block_payload(2, 7, frames, lacing=2, lace_bytes=bytes([2]))) == (2, 7, frames)
+
+
+def test_ebml_lacing():
+    # Sizes 5, 3, then implied 7: the first as an EBML integer, the second as a signed difference (bias 63 in one byte).
+    frames = [b'12345', b'678', b'abcdefg']
+    lace_bytes = bytes([2, 0x80 | 5, 0x80 | (63 - 2)])
+    assert MatroskaReader._parse_block(block_payload(3, 0, frames, lacing=3, lace_bytes=lace_bytes)) == (3, 0, frames)
+
+
+@pytest.mark.parametrize('lacing, lace_bytes, frames', [
+    (1, b'', []), # no lace count
+    (1, bytes([2, 255, 255]), []), # Xiph sizes cut off mid-size
+    (1, bytes([1, 200]), [b'short']), # Xiph sizes larger than the block
+    (3, bytes([2, 0x80 | 5]), [b'12345']), # EBML difference missing
+    (3, bytes([1, 0x40]), []), # EBML size cut off
+])
+def test_truncated_lacing_is_a_matroska_error(lacing, lace_bytes, frames):
+    with pytest.raises(MatroskaError): MatroskaReader._parse_block(block_payload(2, 0, frames, lacing=lacing, lace_bytes=lace_bytes))
+
+
+def test_truncated_lacing_in_a_file_is_a_matroska_error(tmp_path):
+    # MatroskaError is a ValueError, which the engine answers by handing the file to ffmpeg.
+    broken = (2, element(SIMPLE_BLOCK, block_payload(2, 900, [], lacing=1, lace_bytes=bytes([3, 255]))))
+    path = build_mkv(tmp_path / "movie.mkv", with_cues=False, extra_blocks=[broken])
+    with pytest.raises(MatroskaError): extract(path, {2: (str(tmp_path / "out.srt"), None)})
@@ -0,0 +1,109 @@
+import struct
+
+import pytest
+
+from mp4_demuxer import Mp4Reader, Mp4Error, decode_tx3g_sample
+
+
+def box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type, payload, version=0):
+    return box(box_type, bytes([version, 0, 0, 0]) + payload)
+
+
+def tx3g_sample(text, styles=()):
+    # styles: [(first char, last char, face flags)]
+    raw = text.encode('utf-8'); sample = struct.pack('>H', len(raw)) + raw
+    if styles:
+        sample += box(b'styl', struct.pack('>H', len(styles)) + b''.join(struct.pack('>HHHBB4s', first, last, 1, flags, 18, b'\xff\xff\xff\xff') for first, last, flags in styles))
+    return sample
+
+
+SAMPLES = [tx3g_sample("Hello world", [(0, 5, 1), (6, 11, 2)]), tx3g_sample(""), tx3g_sample("Bye")]
+DURATIONS = [2000, 1000, 1500] # media ticks at 1000 Hz
+PADDING = b'\0' * 37 # between the two chunks
+
+
+def elst(entries):
+    return full_box(b'elst', struct.pack('>I', len(entries)) + b''.join(struct.pack('>IihH', duration, media_time, 1, 0) for duration, media_time in entries))
+
+
+def build_mp4(path, edits=((500, -1), (4500, 0)), broken=None):
+    # ftyp, mdat (chunk 1: samples 0 and 1, padding, chunk 2: sample 2), then moov with a video trak and the text trak.
+    # broken: 'mvhd' (cut short), 'mdhd' (missing) or 'stsz' (fewer sizes than samples).
+    chunk_1 = SAMPLES[0] + SAMPLES[1]; chunk_2 = SAMPLES[2]
+    ftyp = box(b'ftyp', b'isom\0\0\0\0isom')
+    mdat_start = len(ftyp) + 8
+    chunk_offsets = [mdat_start, mdat_start + len(chunk_1) + len(PADDING)]
+    mdat = box(b'mdat', chunk_1 + PADDING + chunk_2)
+    stbl = box(b'stbl', full_box(b'stsd', struct.pack('>I', 1) + box(b'tx3g', b'\0' * 30))
+               + full_box(b'stts', struct.pack('>I', len(DURATIONS)) + b''.join(struct.pack('>II', 1, duration) for duration in DURATIONS))
+               + full_box(b'stsc', struct.pack('>I', 2) + struct.pack('>III', 1, 2, 1) + struct.pack('>III', 2, 1, 1))
+               + full_box(b'stsz', struct.pack('>II', 0, len(SAMPLES)) + b''.join(struct.pack('>I', len(sample)) for sample in SAMPLES[:2 if broken == 'stsz' else None]))
+               + full_box(b'stco', struct.pack('>I', len(chunk_offsets)) + b''.join(struct.pack('>I', offset) for offset in chunk_offsets)))
+    language = sum((ord(char) - 0x60) << shift for char, shift in zip('eng', (10, 5, 0)))
+    mdhd = full_box(b'mdhd', struct.pack('>IIII', 0, 0, 1000, 4500) + struct.pack('>HH', language, 0)) if broken != 'mdhd' else b''
+    mdia = box(b'mdia', mdhd + full_box(b'hdlr', b'\0\0\0\0text' + b'\0' * 12) + box(b'minf', stbl))
+    text_trak = box(b'trak', (box(b'edts', elst(edits)) if edits else b'') + mdia)
+    video_trak = box(b'trak', box(b'mdia', full_box(b'hdlr', b'\0\0\0\0vide' + b'\0' * 12)))
+    mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, 1000, 5000) + b'\0' * 80) if broken != 'mvhd' else full_box(b'mvhd', b'\0' * 6)
+    moov = box(b'moov', mvhd + video_trak + text_trak)
+    path.write_bytes(ftyp + mdat + moov)
+    return str(path)
+
+
+def test_sample_tables_map_samples_to_chunks(tmp_path):
+    reader = Mp4Reader(build_mp4(tmp_path / "movie.mp4")); reader.close()
+    track = reader.tracks[1]
+    assert 0 not in reader.tracks # the video trak keeps its stream index but is not a text track
+    assert track.language == 'eng' and track.timescale == 1000
+    chunk_2 = 28 + len(SAMPLES[0]) + len(SAMPLES[1]) + len(PADDING)
+    assert track.samples == [(0, 2000, 28, len(SAMPLES[0])), (2000, 1000, 28 + len(SAMPLES[0]), len(SAMPLES[1])), (3000, 1500, chunk_2, len(SAMPLES[2]))]
+
+
+def test_empty_edit_then_plain_edit_delays_cues(tmp_path):
+    reader = Mp4Reader(build_mp4(tmp_path / "movie.mp4"))
+    try: written = reader.extract({1: (str(tmp_path / "out.srt"), 'srt')})
+    finally: reader.close()
+    assert written == {1: 2}
+    assert (tmp_path / "out.srt").read_text(encoding='utf-8') == ("1\n00:00:00,500 --> 00:00:02,500\n<b>Hello</b> <i>world</i>\n\n"
+                                                                 "2\n00:00:03,500 --> 00:00:05,000\nBye\n\n")
+
+
+def test_plain_edit_with_media_time_shifts_cues_back(tmp_path):
+    reader = Mp4Reader(build_mp4(tmp_path / "movie.mp4", edits=((4000, 250),))); reader.close()
+    assert reader.tracks[1].time_offset == -0.25
+
+
+def test_unsupported_edit_list_fails_only_when_asked_for(tmp_path):
+    reader = Mp4Reader(build_mp4(tmp_path / "movie.mp4", edits=((1000, 0), (1000, 2000))))
+    try:
+        with pytest.raises(Mp4Error): reader.extract({1: (str(tmp_path / "out.srt"), 'srt')})
+    finally:
+        reader.close()
+
+
+@pytest.mark.parametrize('broken', ['mvhd', 'mdhd', 'stsz'])
+def test_malformed_boxes_fall_back_to_ffmpeg(tmp_path, engine, broken):
+    path = build_mp4(tmp_path / "movie.mp4", broken=broken)
+    try:
+        reader = Mp4Reader(path)
+    except Mp4Error:
+        pass
+    else:
+        try:
+            with pytest.raises(Mp4Error): reader.extract({1: (str(tmp_path / "out.srt"), 'srt')})
+        finally:
+            reader.close()
+    job = {"index": 1, "codec": 'mov_text', "codec_arg": 'srt', "run_ocr": False, "output_path": str(tmp_path / "out.srt")}
+    assert engine._extract_streams_mp4(path, [job]) == ([], [job])
+    assert any("handing it to FFmpeg" in message for message in engine.messages)
+
+
+def test_tx3g_style_runs():
+    assert decode_tx3g_sample(tx3g_sample("bold and underlined", [(0, 4, 1), (9, 19, 4 | 2)])) == "<b>bold</b> and <i><u>underlined</u></i>"
+    assert decode_tx3g_sample(tx3g_sample("plain")) == "plain"
+    # A modifier box cut short keeps the plain text.
+    assert decode_tx3g_sample(tx3g_sample("cut", [(0, 3, 1)])[:-4]) == "cut"
@@ -0,0 +1,48 @@
+import sqlite3
+
+from ocr_cache import OcrCache, hash_file, ocr_cache_key
+
+SRT = b"1\n00:00:01,000 --> 00:00:02,000\nHello\n\n"
+
+
+def test_key_depends_on_bitstream_tool_and_language(tmp_path):
+    track = tmp_path / "track.sup"; track.write_bytes(b'PG' * 1000)
+    copy = tmp_path / "copy.sup"; copy.write_bytes(b'PG' * 1000)
+    assert hash_file(str(track)) == hash_file(str(copy))
+    key = ocr_cache_key(hash_file(str(track)), "tesseract {input}", 'eng')
+    assert key == ocr_cache_key(hash_file(str(copy)), "tesseract {input}", 'eng')
+    assert key != ocr_cache_key(hash_file(str(track)), "tesseract --psm 6 {input}", 'eng')
+    assert key != ocr_cache_key(hash_file(str(track)), "tesseract {input}", 'fre')
+
+
+def test_hit_miss_and_persistence(tmp_path):
+    db_path = str(tmp_path / "ocr.sqlite3")
+    cache = OcrCache(db_path, 1024 * 1024)
+    assert cache.get('a') is None
+    cache.put('a', SRT)
+    assert cache.get('a') == SRT and (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+    cache = OcrCache(db_path, 1024 * 1024)
+    assert cache.get('a') == SRT
+    cache.close()
+
+
+def test_least_recently_used_results_are_evicted_past_the_size_cap(tmp_path):
+    cache = OcrCache(str(tmp_path / "ocr.sqlite3"), len(SRT) * 2)
+    cache.put('a', SRT); cache.put('b', SRT)
+    cache.get('a') # b is now the least recently used
+    cache.put('c', SRT)
+    assert cache.get('b') is None and cache.get('a') == SRT and cache.get('c') == SRT
+    cache.close()
+
+
+def test_schema_is_created_on_an_existing_database(tmp_path):
+    db_path = str(tmp_path / "ocr.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)"); conn.execute("INSERT INTO meta VALUES ('schema_version', '0')")
+    conn.execute("CREATE TABLE results (key TEXT PRIMARY KEY, text TEXT)"); conn.commit(); conn.close()
+    cache = OcrCache(db_path, 1024)
+    assert cache.get('a') is None
+    cache.put('a', SRT)
+    assert cache.get('a') == SRT
+    cache.close()
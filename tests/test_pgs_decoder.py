@@ -0,0 +1,84 @@
+import struct
+
+import pytest
+
+from pgs_decoder import PgsStream, PCS, PDS, ODS, WDS, END, EPOCH_START, PGS_CLOCK_HZ, rle_decode, decode_image
+
+
+def segment(segment_type, pts, payload):
+    return struct.pack('>2sIIBH', b'PG', pts, 0, segment_type, len(payload)) + payload
+
+
+def composition(number, objects):
+    # objects: [(object_id, flags, x, y, crop or None)]
+    payload = struct.pack('>HHBH', 1920, 1080, 0x10, number) + bytes([EPOCH_START, 0, 0, len(objects)])
+    for object_id, flags, x, y, crop in objects:
+        payload += struct.pack('>HBBHH', object_id, 0, flags, x, y)
+        if crop: payload += struct.pack('>HHHH', *crop)
+    return payload
+
+
+def encode_rle(rows):
+    out = bytearray()
+    for row in rows:
+        position = 0
+        while position < len(row):
+            colour = row[position]; run = 1
+            while position + run < len(row) and row[position + run] == colour: run += 1
+            if colour and run < 3: out += bytes([colour]) * run
+            elif colour == 0: out += bytes([0, run]) if run < 64 else bytes([0, 0x40 | (run >> 8), run & 0xFF])
+            else: out += bytes([0, 0x80 | run, colour]) if run < 64 else bytes([0, 0xC0 | (run >> 8), run & 0xFF, colour])
+            position += run
+        out += b'\x00\x00'
+    return bytes(out)
+
+
+def display_set(pcs_payload, rows, pts=PGS_CLOCK_HZ):
+    rle = encode_rle(rows); width, height = len(rows[0]), len(rows)
+    ods = struct.pack('>HBB', 0, 0, 0xC0) + (len(rle) + 4).to_bytes(3, 'big') + struct.pack('>HH', width, height) + rle
+    return (segment(PCS, pts, pcs_payload) + segment(WDS, pts, bytes([1, 0]) + struct.pack('>HHHH', 100, 900, width, height))
+            + segment(PDS, pts, bytes([0, 0, 1, 235, 128, 128, 255])) + segment(ODS, pts, ods) + segment(END, pts, b''))
+
+
+ROWS = [[0, 0, 1, 1, 1, 1, 0, 0], [1] * 8, [0] * 8, [1, 0, 1, 0, 1, 0, 1, 0]]
+
+
+def test_forced_object_has_no_crop_fields(tmp_path):
+    sup_path = tmp_path / "forced.sup"
+    sup_path.write_bytes(display_set(composition(0, [(0, 0x40, 100, 900, None)]), ROWS))
+    stream = PgsStream(str(sup_path))
+    assert len(stream.display_sets) == 1
+    x, y, width, height, crop, _ = stream.display_sets[0].objects[0]
+    assert (x, y, width, height, crop) == (100, 900, 8, 4, None)
+    assert stream.display_sets[0].start == 1.0
+
+
+def test_cropped_object_reads_crop_fields(tmp_path):
+    sup_path = tmp_path / "cropped.sup"
+    sup_path.write_bytes(display_set(composition(0, [(0, 0x80, 120, 950, (2, 1, 4, 2))]), ROWS))
+    x, y, _, _, crop, _ = PgsStream(str(sup_path)).display_sets[0].objects[0]
+    assert (x, y, crop) == (120, 950, (2, 1, 4, 2))
+
+
+def test_clear_display_set_ends_previous_image(tmp_path):
+    sup_path = tmp_path / "clear.sup"
+    clear = segment(PCS, 3 * PGS_CLOCK_HZ, struct.pack('>HHBH', 1920, 1080, 0x10, 1) + bytes([0, 0, 0, 0])) + segment(END, 3 * PGS_CLOCK_HZ, b'')
+    sup_path.write_bytes(display_set(composition(0, [(0, 0, 100, 900, None)]), ROWS) + clear)
+    stream = PgsStream(str(sup_path))
+    assert [(entry.start, entry.end) for entry in stream.display_sets] == [(1.0, 3.0)]
+
+
+def test_rle_round_trip():
+    np = pytest.importorskip("numpy")
+    rows = ROWS + [[2] * 70 + [0] * 70 + [3, 3, 0, 4]]
+    rows = [row + [0] * (144 - len(row)) for row in rows]
+    assert np.array_equal(rle_decode(encode_rle(rows), 144, len(rows)), np.array(rows, dtype=np.uint8))
+
+
+def test_decode_image_applies_crop(tmp_path):
+    pytest.importorskip("numpy")
+    sup_path = tmp_path / "cropped.sup"
+    sup_path.write_bytes(display_set(composition(0, [(0, 0x80, 120, 950, (0, 1, 8, 1))]), ROWS))
+    image = decode_image(PgsStream(str(sup_path)).display_sets[0], margin=0)
+    assert image.shape == (1, 8)
+    assert (image == 20).all() # the full-width row of colour 1 (luma 235, opaque) as dark glyph pixels
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+
+from probe_cache import ProbeCache
+
+PROBE = {"streams": [{"index": 2, "codec_name": "subrip"}], "probe_size": 5000000}
+
+
+def test_hit_miss_and_invalidation_on_change(tmp_path):
+    movie = tmp_path / "movie.mkv"; movie.write_bytes(b'\0' * 100)
+    cache = ProbeCache(str(tmp_path / "probe.sqlite3"))
+    assert cache.get(str(movie)) is None
+    cache.put(str(movie), PROBE)
+    assert cache.get(str(movie)) == PROBE
+    cache.update_field(str(movie), 'probe_size', 20000000)
+    assert cache.get(str(movie))["probe_size"] == 20000000
+    stat_result = os.stat(movie); os.utime(movie, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1000000000))
+    assert cache.get(str(movie)) is None # same size, new mtime
+    cache.put(str(movie), PROBE)
+    movie.write_bytes(b'\0' * 101)
+    assert cache.get(str(movie)) is None # new size
+    assert cache.get(str(tmp_path / "missing.mkv")) is None
+    assert (cache.hits, cache.misses) == (2, 3) # a missing file is not a lookup
+    cache.close()
+
+
+def test_entries_survive_reopen_and_are_evicted_least_recently_used(tmp_path):
+    db_path = str(tmp_path / "probe.sqlite3"); movies = []
+    for index in range(3):
+        movie = tmp_path / f"movie{index}.mkv"; movie.write_bytes(b'\0' * index); movies.append(str(movie))
+    cache = ProbeCache(db_path, max_entries=2)
+    for index, movie in enumerate(movies): cache.put(movie, dict(PROBE, index=index))
+    cache.get(movies[0]) # movie1 is now the least recently used
+    cache.close()
+    cache = ProbeCache(db_path, max_entries=2)
+    assert cache.get(movies[0])["index"] == 0 and cache.get(movies[1]) is None and cache.get(movies[2])["index"] == 2
+    cache.close()
+
+
+def test_schema_is_created_on_an_existing_database(tmp_path):
+    db_path = str(tmp_path / "probe.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE probes (path TEXT PRIMARY KEY, probe TEXT)") # an older layout, no meta table
+    conn.execute("INSERT INTO probes VALUES ('/m/a.mkv', '{}')"); conn.commit(); conn.close()
+    movie = tmp_path / "movie.mkv"; movie.write_bytes(b'\0')
+    cache = ProbeCache(db_path)
+    assert cache.get(str(movie)) is None
+    cache.put(str(movie), PROBE)
+    assert cache.get(str(movie)) == PROBE
+    cache.close()
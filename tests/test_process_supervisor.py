@@ -0,0 +1,39 @@
+import json
+import queue
+import sys
+import threading
+
+from process_supervisor import SUPERVISOR
+
+
+def fake_ffprobe(tmp_path):
+    # Answers every probe with one English SubRip stream.
+    script = tmp_path / "ffprobe"
+    streams = {"streams": [{"index": 2, "codec_type": "subtitle", "codec_name": "subrip", "tags": {"language": "eng"}, "disposition": {}}], "format": {"duration": "60.0"}}
+    script.write_text(f"#!{sys.executable}\nprint({json.dumps(json.dumps(streams))})\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_cancel_then_probe(tmp_path, engine, monkeypatch):
+    engine.settings['ffprobe_path'] = fake_ffprobe(tmp_path)
+    movie = tmp_path / "movie.mkv"; movie.write_bytes(b'\0' * 1024)
+    def cancelled_mid_file(*args):
+        engine.cancel(wait=True)
+        assert SUPERVISOR.run([sys.executable, '-c', 'import time; time.sleep(5)']).returncode != 0 # still this run's cancel
+    monkeypatch.setattr(engine, '_process_movie_file', cancelled_mid_file)
+    engine.run([str(movie)], 'srt')
+    # A language scan after the cancelled run probes normally.
+    results = queue.Queue()
+    engine.discover_languages([str(movie)], threading.Event(), results)
+    assert results.get_nowait() == {'eng'} and results.get_nowait() is None
+
+
+def test_terminate_all_ends_running_process_groups():
+    process = SUPERVISOR.popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        assert SUPERVISOR.terminate_all(grace_seconds=1, wait=True) >= 1
+        assert process.wait(5) != 0
+    finally:
+        SUPERVISOR.reset()
+    assert SUPERVISOR.run(['true']).returncode == 0 # reset() lets new processes run again
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import ExtractionScheduler, StagingArea, parse_device_limits
+
+
+class Gate:
+    # Fake task: records how many run at once (overall and per key) and blocks until released.
+    def __init__(self):
+        self.lock = threading.Lock(); self.release = threading.Event()
+        self.running = {}; self.peak = {}; self.order = []
+
+    def task(self, key, result=None):
+        with self.lock:
+            self.order.append(key)
+            for name in (key, 'all'):
+                self.running[name] = self.running.get(name, 0) + 1; self.peak[name] = max(self.peak.get(name, 0), self.running[name])
+        self.release.wait(5)
+        with self.lock:
+            for name in (key, 'all'): self.running[name] -= 1
+        return result
+
+
+def wait_until(condition, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline; time.sleep(0.01)
+
+
+def test_lanes_run_up_to_their_worker_counts():
+    gate = Gate(); scheduler = ExtractionScheduler(2, 1, threading.Event())
+    futures = [scheduler.submit_io(gate.task, 'io', index) for index in range(4)] + [scheduler.submit_ocr(gate.task, 'ocr', index) for index in range(3)]
+    wait_until(lambda: gate.running.get('all') == 3)
+    time.sleep(0.05); assert gate.running == {'io': 2, 'ocr': 1, 'all': 3}
+    gate.release.set(); scheduler.wait(); scheduler.shutdown()
+    assert gate.peak['io'] == 2 and gate.peak['ocr'] == 1
+    assert [future.result() for future in futures] == [0, 1, 2, 3, 0, 1, 2]
+
+
+def test_devices_are_served_in_turn_within_their_limits():
+    gate = Gate(); scheduler = ExtractionScheduler(3, 1, threading.Event(), device_workers=2, device_limits={'nas': 1})
+    futures = [scheduler.submit_device('disk', 'disk', 100, gate.task, 'disk') for _ in range(4)]
+    futures += [scheduler.submit_device('nas', 'nas', 10, gate.task, 'nas') for _ in range(3)]
+    # The third worker goes to the NAS as soon as it has work, not to a third disk task.
+    wait_until(lambda: gate.running.get('all') == 3)
+    assert gate.running['disk'] == 2 and gate.running['nas'] == 1
+    gate.release.set(); scheduler.wait(); scheduler.shutdown()
+    assert all(future.done() for future in futures)
+    assert gate.peak['disk'] == 2 and gate.peak['nas'] == 1
+    report = {device["device"]: device for device in scheduler.device_report()}
+    assert report['disk']['files'] == 4 and report['disk']['bytes'] == 400 and report['disk']['limit'] == 2
+    assert report['nas']['files'] == 3 and report['nas']['max_concurrent'] == 1
+
+
+def test_cancel_drains_queued_tasks_with_none():
+    gate = Gate(); cancel = threading.Event(); scheduler = ExtractionScheduler(1, 1, cancel)
+    running = scheduler.submit_ocr(gate.task, 'ocr', 'ran')
+    queued = [scheduler.submit_ocr(gate.task, 'ocr', 'queued') for _ in range(2)]
+    running_device = scheduler.submit_device('disk', 'disk', 1, gate.task, 'disk', 'ran')
+    wait_until(lambda: gate.running.get('all') == 2)
+    blocked_device = scheduler.submit_device('disk', 'disk', 1, gate.task, 'disk', 'queued')
+    cancel.set(); gate.release.set(); scheduler.wait(); scheduler.shutdown()
+    assert running.result() == 'ran' and running_device.result() == 'ran'
+    assert [future.result() for future in queued] == [None, None] and blocked_device.result() is None
+    assert gate.order.count('ocr') == 1 and gate.order.count('disk') == 1
+
+
+def test_when_all_runs_after_every_future_and_holds_wait():
+    gate = Gate(); scheduler = ExtractionScheduler(2, 1, threading.Event())
+    futures = [scheduler.submit_io(gate.task, 'io') for _ in range(2)]; finished = []
+    scheduler.when_all(futures, lambda: finished.append(all(future.done() for future in futures)))
+    scheduler.when_all([], lambda: finished.append('empty'))
+    assert finished == ['empty']
+    gate.release.set(); scheduler.wait(); scheduler.shutdown()
+    assert finished == ['empty', True]
+
+
+def test_failed_task_is_reported_and_releases_its_device():
+    scheduler = ExtractionScheduler(1, 1, threading.Event(), device_workers=1)
+    def fail(): raise OSError("disk gone")
+    failed = scheduler.submit_device('disk', 'disk', 1, fail); after = scheduler.submit_device('disk', 'disk', 1, lambda: 'next')
+    scheduler.wait(); scheduler.shutdown()
+    with pytest.raises(OSError): failed.result()
+    assert after.result() == 'next'
+
+
+def test_staging_area_backpressure():
+    staging = StagingArea(100); cancel = threading.Event()
+    assert staging.wait_for_room(cancel) # an empty area always admits
+    staging.add(150)
+    admitted = []
+    producer = threading.Thread(target=lambda: admitted.append(staging.wait_for_room(cancel))); producer.start()
+    time.sleep(0.1); assert not admitted and staging.is_full()
+    staging.release(100); producer.join(5)
+    assert admitted == [True] and staging.waits == 1 and staging.peak_bytes == 150 and staging.used_bytes == 50
+    staging.add(60)
+    producer = threading.Thread(target=lambda: admitted.append(staging.wait_for_room(cancel))); producer.start()
+    cancel.set(); producer.join(5)
+    assert admitted == [True, False]
+
+
+def test_parse_device_limits():
+    assert parse_device_limits(" /mnt/nas=1, /mnt/a=b=4 ,") == {'/mnt/nas': 1, '/mnt/a=b': 4}
+    for text in ("/mnt/nas", "=2", "/mnt/nas=two"):
+        with pytest.raises(ValueError): parse_device_limits(text)
@@ -0,0 +1,35 @@
+import os
+
+from sub_index import SidecarIndex, parse_exclude_patterns
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True); path.write_bytes(b'')
+    return str(path)
+
+
+def test_subtitles_belong_to_the_longest_matching_movie(tmp_path):
+    index = SidecarIndex()
+    index.add_directory(str(tmp_path), ["Movie.mkv", "Movie.Part2.mkv", "Movie.Part2.eng.forced.srt", "Other.mp4", "Other2.srt", "Solo.avi", "Solo.sup"])
+    assert index.has_subs(str(tmp_path / "Movie.Part2.mkv")) and index.has_subs(str(tmp_path / "Solo.avi"))
+    assert not index.has_subs(str(tmp_path / "Movie.mkv")) and not index.has_subs(str(tmp_path / "Other.mp4"))
+
+
+def test_walk_indexes_directories_and_honours_excludes(tmp_path):
+    movies = [touch(tmp_path / "b" / "Two.mkv"), touch(tmp_path / "a" / "One.MP4"), touch(tmp_path / "Top.mkv")]
+    touch(tmp_path / "a" / "One.eng.srt"); touch(tmp_path / "sample" / "Clip.mkv"); touch(tmp_path / "b" / "Two-trailer.mkv"); touch(tmp_path / "notes.txt")
+    index = SidecarIndex()
+    found = list(index.walk_movies(str(tmp_path), parse_exclude_patterns(" Sample, "), parse_exclude_patterns("*-TRAILER.*")))
+    assert found == [movies[2], movies[1], movies[0]]
+    assert index.has_subs(movies[1]) and not index.has_subs(movies[0])
+
+
+def test_changed_directory_is_relisted_on_the_next_run(tmp_path):
+    movie = touch(tmp_path / "Movie.mkv")
+    index = SidecarIndex(); list(index.walk_movies(str(tmp_path)))
+    assert not index.has_subs(movie)
+    touch(tmp_path / "Movie.srt")
+    stat_result = os.stat(tmp_path); os.utime(tmp_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1000000000))
+    assert not index.has_subs(movie) # same run: the listing is trusted
+    index.begin_run()
+    assert index.has_subs(movie)
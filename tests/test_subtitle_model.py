@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+import subtitle_model
+from subtitle_model import (parse_srt, parse_vtt, parse_ass, write_srt, write_vtt, write_ass, read_subtitle_file, write_subtitle_file, split_output_formats, formats_for_codec,
+                            events_to_srt, format_srt_time)
+
+SRT = ("1\n00:00:01,000 --> 00:00:02,500\n<b>Bold</b> start\n\n"
+       "2\n00:00:03,250 --> 00:00:05,000\nTwo\nlines & <i>more</i>\n\n"
+       "3\n01:02:03,004 --> 01:02:04,000\nLate <font color=\"red\">one</font>\n\n")
+
+ASS = ("[Script Info]\nTitle: Sample\nScriptType: v4.00+\n\n[V4+ Styles]\nFormat: Name, Fontname, Fontsize\nStyle: Sign,Arial,20\n\n"
+       "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+       "Dialogue: 0,0:00:04.00,0:00:05.50,Sign,,0,0,0,,{\\an8}Second, with comma\n"
+       "Dialogue: 0,0:00:01.00,0:00:02.50,Default,,0,0,0,,{\\i1}First{\\i0}\\Nline\n")
+
+
+def cues(events):
+    return [(round(start, 3), round(end, 3), text) for start, end, text, _ in events]
+
+
+def test_srt_round_trip():
+    events = parse_srt('﻿' + SRT.replace('\n', '\r\n'))
+    assert cues(events) == [(1.0, 2.5, "<b>Bold</b> start"), (3.25, 5.0, "Two\nlines & <i>more</i>"), (3723.004, 3724.0, "Late <font color=\"red\">one</font>")]
+    assert write_srt(events) == SRT
+    assert cues(parse_srt(write_srt(events))) == cues(events)
+
+
+def test_vtt_round_trip():
+    vtt = write_vtt(parse_srt(SRT))
+    assert vtt == ("WEBVTT\n\n00:01.000 --> 00:02.500\n<b>Bold</b> start\n"
+                   "\n00:03.250 --> 00:05.000\nTwo\nlines &amp; <i>more</i>\n"
+                   "\n01:02:03.004 --> 01:02:04.000\nLate one\n")
+    events = parse_vtt(vtt)
+    assert cues(events) == [(1.0, 2.5, "<b>Bold</b> start"), (3.25, 5.0, "Two\nlines & <i>more</i>"), (3723.004, 3724.0, "Late one")]
+    assert write_vtt(events) == vtt
+
+
+def test_vtt_cue_identifiers_and_settings():
+    events = parse_vtt("WEBVTT\n\nNOTE a comment\n\nintro\n00:00:01.000 --> 00:00:02.000 align:start\n<c.yellow>Hi</c> &lt;there&gt;\n")
+    assert cues(events) == [(1.0, 2.0, "Hi <there>")]
+
+
+def test_ass_round_trip():
+    events = parse_ass(ASS)
+    assert cues(events) == [(4.0, 5.5, "Second, with comma"), (1.0, 2.5, "<i>First</i>\nline")]
+    assert list(events.styles) == ['Sign', 'Default']
+    ass = write_ass(events)
+    assert ass.startswith("[Script Info]\nTitle: Sample\n") and "Style: Sign,Arial,20\n" in ass
+    assert ass.endswith("Dialogue: 0,0:00:04.00,0:00:05.50,Sign,,0,0,0,,Second, with comma\n"
+                        "Dialogue: 0,0:00:01.00,0:00:02.50,Default,,0,0,0,,{\\i1}First{\\i0}\\Nline\n")
+    assert cues(parse_ass(ass)) == cues(events)
+    # SRT output is in time order even though the ASS events are not.
+    assert write_srt(events).startswith("1\n00:00:01,000 --> 00:00:02,500\n<i>First</i>\nline\n\n2\n00:00:04,000")
+
+
+def test_srt_to_ass_uses_default_header():
+    ass = write_ass(parse_srt(SRT))
+    assert "Style: Default," in ass
+    assert "Dialogue: 0,0:00:01.00,0:00:02.50,Default,,0,0,0,,{\\b1}Bold{\\b0} start\n" in ass
+    assert "Dialogue: 1" not in ass and ",,Late one\n" in ass
+
+
+def test_files_round_trip(tmp_path):
+    events = parse_srt(SRT)
+    for subtitle_format in ('srt', 'vtt', 'ass'):
+        path = tmp_path / f"out.{subtitle_format}"
+        write_subtitle_file(events, str(path), subtitle_format)
+        assert [start for start, _, _ in cues(read_subtitle_file(str(path), subtitle_format))] == [1.0, 3.25, 3723.0 if subtitle_format == 'ass' else 3723.004]
+
+
+def test_output_formats():
+    assert split_output_formats("SRT, vtt,srt,bogus") == ['srt', 'vtt']
+    assert split_output_formats("vtt,copy") == ['vtt']
+    assert split_output_formats("") == ['srt']
+    assert formats_for_codec(['srt', 'ass'], 'ass') == ['ass', 'srt']
+    assert formats_for_codec(['srt', 'vtt'], 'hdmv_pgs_subtitle') == ['srt', 'vtt']
+
+
+def test_srt_timing_lives_in_the_text_model():
+    assert format_srt_time(3723.0046) == "01:02:03,005" and format_srt_time(-1) == "00:00:00,000"
+    assert events_to_srt([(1.0, 2.5, "One"), (3.0, 4.0, "Two")]) == "1\n00:00:01,000 --> 00:00:02,500\nOne\n\n2\n00:00:03,000 --> 00:00:04,000\nTwo\n\n"
+    # The text model loads without the PGS image decoder (and NumPy).
+    check = "import sys, subtitle_model, mp4_demuxer; print('pgs_decoder' in sys.modules, 'numpy' in sys.modules)"
+    src_dir = os.path.dirname(subtitle_model.__file__)
+    assert subprocess.run([sys.executable, '-c', check], cwd=src_dir, capture_output=True, text=True).stdout.strip() == 'False False'
@@ -0,0 +1,47 @@
+import threading
+
+from ui_events import LogRing, UiEventBus, message_level, level_allows
+
+
+def test_ring_overflow_drops_oldest_and_spill_keeps_everything(tmp_path):
+    spill_path = tmp_path / "run.log"
+    ring = LogRing(5, str(spill_path), spill_max_bytes=1024 * 1024, spill_backups=1)
+    lines = [f"line {i}" for i in range(12)]
+    for line in lines: ring.spill(line)
+    ring.extend([('info', line) for line in lines[:4]]); ring.extend([('info', line) for line in lines[4:]])
+    assert ring.dropped == 7 and ring.text() == ''.join(line + '\n' for line in lines[7:])
+    ring.close()
+    assert spill_path.read_text(encoding='utf-8').splitlines() == lines
+
+
+def test_spill_file_rotates(tmp_path):
+    spill_path = tmp_path / "run.log"
+    ring = LogRing(10, str(spill_path), spill_max_bytes=200, spill_backups=2)
+    for i in range(100): ring.spill(f"line {i:03}")
+    ring.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["run.log", "run.log.1", "run.log.2"]
+    assert spill_path.read_text(encoding='utf-8').splitlines()[-1] == "line 099" and spill_path.stat().st_size <= 200
+
+
+def test_levels_filter_the_text():
+    ring = LogRing(10)
+    entries = [(message_level(message, to_console), message) for message, to_console in
+               (("[INFO] Target done", True), ("ffmpeg -i movie.mkv", False), ("[WARN] Probe cache unavailable", True), ("  [ERROR] bad", False))]
+    assert [level for level, _ in entries] == ['info', 'debug', 'warning', 'warning']
+    ring.extend(entries)
+    assert ring.text('warning') == "[WARN] Probe cache unavailable\n  [ERROR] bad\n"
+    assert ring.text('info').count('\n') == 3 and level_allows('debug', 'bogus')
+
+
+def test_bus_coalesces_and_bounds_pending_lines():
+    bus = UiEventBus(max_pending_lines=3)
+    def worker(n):
+        for i in range(50): bus.post_log('info', f"{n}-{i}"); bus.set_progress(i); bus.set_row(f"row{n}", f"status {i}")
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    bus.set_status("Scanning"); bus.set_status("Done"); bus.call(len)
+    lines, status, progress, rows, calls = bus.drain()
+    assert len(lines) == 3 and status == "Done" and progress == 49 and calls == [len]
+    assert rows == {f"row{n}": "status 49" for n in range(4)}
+    assert bus.drain() == ([], None, None, {}, [])
@@ -0,0 +1,45 @@
+import os
+import threading
+import time
+
+from watcher import FolderWatcher
+
+
+def next_batch(watcher, seconds=10):
+    stop = threading.Event(); timer = threading.Timer(seconds, stop.set); timer.start()
+    try: return watcher.next_batch(stop)
+    finally: timer.cancel()
+
+
+def test_polling_watcher_hands_over_settled_and_renamed_files(tmp_path):
+    (tmp_path / "existing.mkv").write_bytes(b'old')
+    watcher = FolderWatcher([str(tmp_path)], settle_seconds=0.3, poll_interval=0.1, full_rescan_interval=0, use_inotify=False)
+    watcher.start()
+    assert watcher.mode == "polling"
+
+    # A download that finishes under a temporary name, then is renamed into place.
+    (tmp_path / "incoming.part").write_bytes(b'x' * 1000)
+    os.rename(tmp_path / "incoming.part", tmp_path / "incoming.mkv")
+    assert next_batch(watcher) == [str(tmp_path / "incoming.mkv")]
+
+    # A file still being written is only handed over once it stops growing, and new sub-folders are picked up.
+    growing = tmp_path / "season" / "ep1.mkv"; growing.parent.mkdir(); growing.write_bytes(b'x')
+    def keep_writing():
+        for _ in range(8):
+            time.sleep(0.15)
+            with open(growing, 'ab') as growing_file: growing_file.write(b'x' * 100)
+    writer = threading.Thread(target=keep_writing); writer.start()
+    batch = next_batch(watcher)
+    writer_was_done = not writer.is_alive(); writer.join()
+    assert batch == [str(growing)] and writer_was_done
+    watcher.close()
+
+
+def test_polling_watcher_can_queue_existing_files(tmp_path):
+    (tmp_path / "existing.mkv").write_bytes(b'old'); (tmp_path / "notes.txt").write_bytes(b'x')
+    watcher = FolderWatcher([str(tmp_path)], settle_seconds=0, poll_interval=0.1, use_inotify=False)
+    watcher.start(process_existing=True)
+    assert next_batch(watcher) == [str(tmp_path / "existing.mkv")]
+    stop = threading.Event(); stop.set()
+    assert watcher.next_batch(stop) == []
+    watcher.close()